@@ -3,6 +3,9 @@ import pandas as pd
 import logging
 import os
 from dotenv import load_dotenv
+from mock_exchange import mock_exchange_from_env
+from order_router import bar_intent_id, route_order
+from market_data_bus import shared_ohlcv
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -13,7 +16,12 @@ load_dotenv(dotenv_path=r'C:\Users\amrita\Desktop\improvised-code-of-the-pdf-GPT
 def initialize_exchange(api_key: str, api_secret: str) -> ccxt.Exchange:
     """
     Initialize the exchange with API key and secret.
+    Returns the in-process mock exchange instead when USE_MOCK_EXCHANGE is set.
     """
+    mock_exchange = mock_exchange_from_env()
+    if mock_exchange is not None:
+        return mock_exchange
+
     try:
         exchange = ccxt.bybit({
             'apiKey': api_key,
@@ -31,6 +39,9 @@ def fetch_ohlcv(exchange: ccxt.Exchange, symbol: str, timeframe: str = '1h', lim
     Fetch OHLCV data.
     """
     try:
+        df = shared_ohlcv(symbol, timeframe, limit or None)
+        if df is not None:
+            return df
         params = {'recvWindow': 30000}  # Increase recv_window to 30 seconds
         ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit, params=params)
         df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
@@ -78,7 +89,7 @@ def define_trading_strategy(df: pd.DataFrame) -> pd.DataFrame:
         logging.error("Failed to define trading strategy: %s", e)
         raise
 
-def place_order(exchange: ccxt.Exchange, symbol: str, order_type: str, side: str, amount: float, price=None):
+def place_order(exchange: ccxt.Exchange, symbol: str, order_type: str, side: str, amount: float, price=None, intent_id=None):
     """
     Place an order on the exchange.
 
@@ -89,15 +100,17 @@ def place_order(exchange: ccxt.Exchange, symbol: str, order_type: str, side: str
     - side (str): Order side ('buy' or 'sell').
     - amount (float): Amount to trade.
     - price (float, optional): Price for limit orders.
+    - intent_id (optional): Identifies the signal, e.g. bar_intent_id of its candle, so a retry
+      of the same signal does not place a second order.
 
     Returns:
     - order: The order object returned by the exchange API.
     """
     try:
         if order_type == 'market':
-            order = exchange.create_market_order(symbol, side, amount)
+            order = route_order(exchange, symbol, side, amount, intent_id=intent_id)
         elif order_type == 'limit':
-            order = exchange.create_limit_order(symbol, side, amount, price)
+            order = route_order(exchange, symbol, side, amount, type='limit', price=price, intent_id=intent_id)
         logging.info("Placed %s order for %s %s at %s", side, amount, symbol, price if price else 'market price')
         return order
     except ccxt.InsufficientFunds as insf:
@@ -111,28 +124,39 @@ def place_order(exchange: ccxt.Exchange, symbol: str, order_type: str, side: str
     except ValueError as ve:
         logging.error("Invalid parameter: %s", ve)
         
-def manage_leverage(exchange: ccxt.Exchange, symbol: str, amount: float, risk_percent: float):
+def manage_leverage(exchange: ccxt.Exchange, symbol: str, amount: float, risk_percent: float, risk_gate=None):
     """
     Dynamically manage leverage based on account balance and risk management.
+    With a PreTradeRiskGate, equity and the mark price come from its in-memory state
+    instead of fetch_balance/fetch_ticker, and leverage is capped at its limit.
     """
     try:
-        balance = exchange.fetch_balance()
-        available_margin = balance['total']['USDT']
+        if risk_gate is not None:
+            available_margin = risk_gate.equity
+        else:
+            balance = exchange.fetch_balance()
+            available_margin = balance['total']['USDT']
         logging.info("Available margin: %s USDT", available_margin)
         
         # Calculate maximum allowable loss
         max_loss = available_margin * risk_percent
         
         # Fetch ticker and leverage limit
-        ticker = exchange.fetch_ticker(symbol)
+        last_price = risk_gate.marks.get(symbol) if risk_gate is not None else None
+        if last_price is None:
+            last_price = exchange.fetch_ticker(symbol)['last']
         max_leverage = exchange.markets[symbol]['limits']['leverage']['max'] if symbol in exchange.markets else 1
+        if risk_gate is not None and risk_gate.limits.max_leverage is not None:
+            max_leverage = min(max_leverage, risk_gate.limits.max_leverage)
         
         # Calculate maximum leverage
-        calculated_leverage = max(min(max_loss / (amount * ticker['last']), max_leverage), 1)
+        calculated_leverage = max(min(max_loss / (amount * last_price), max_leverage), 1)
 
         
         # Set the leverage on the exchange if within bounds
         if 1 <= calculated_leverage <= max_leverage:
+            if risk_gate is not None:
+                risk_gate.set_leverage(symbol, calculated_leverage)
             exchange.set_leverage(calculated_leverage, symbol)
             logging.info("Dynamically set leverage to %.2f for %s based on risk management", calculated_leverage, symbol)
         else:
@@ -147,20 +171,20 @@ def manage_leverage(exchange: ccxt.Exchange, symbol: str, amount: float, risk_pe
         logging.error("Failed to manage leverage: %s", e)
         raise
 
-def place_order(exchange, symbol, order_type, side, amount, price=None):
+def place_order(exchange, symbol, order_type, side, amount, price=None, intent_id=None):
     try:
         if order_type == 'limit':
-            order = exchange.create_order(symbol, order_type, side, amount, price)
+            order = route_order(exchange, symbol, side, amount, type=order_type, price=price, intent_id=intent_id)
         elif order_type == 'market':
-            order = exchange.create_order(symbol, order_type, side, amount)
+            order = route_order(exchange, symbol, side, amount, intent_id=intent_id)
         return order
     except Exception as e:
         print(f"An error occurred: {e}")
         return None
 
-def place_order(exchange, side, price, symbol, amount):
+def place_order(exchange, side, price, symbol, amount, intent_id=None):
     try:
-        order = exchange.create_order(symbol, 'market', side, amount)
+        order = route_order(exchange, symbol, side, amount, intent_id=intent_id)
         logging.info(f"Placed {side} order for {amount} {symbol} at {price}")
         return order
     except ccxt.NetworkError as e:
@@ -177,9 +201,10 @@ def execute_trading_decision(signal):
     elif signal == 'sell':
         place_order(exchange, 'BTCUSDT', 'market', 'sell', 0.01)
 
-def execute_trading_strategy(exchange: ccxt.Exchange, df: pd.DataFrame, symbol: str, amount: float, risk_percent: float):
+def execute_trading_strategy(exchange: ccxt.Exchange, df: pd.DataFrame, symbol: str, amount: float, risk_percent: float, risk_gate=None):
     """
     Execute the trading strategy based on signals.
+    With a PreTradeRiskGate, each order is checked against its limits first and fills are fed back into it.
     """
     try:
         markets = exchange.load_markets()
@@ -191,15 +216,30 @@ def execute_trading_strategy(exchange: ccxt.Exchange, df: pd.DataFrame, symbol:
         for i in range(len(df)):
             logging.info("Processing signal: %s at index %d", df['signal'][i], i)
             if df['signal'][i] in ['buy', 'sell']:
+                if risk_gate is not None:
+                    risk_gate.update_mark(symbol, df['close'][i])
+                    approved, reason = risk_gate.check(symbol, df['signal'][i], amount)
+                    if not approved:
+                        logging.warning("Pre-trade risk check rejected %s order: %s", df['signal'][i], reason)
+                        continue
+
                 # Dynamically manage leverage before placing an order
-                manage_leverage(exchange, symbol, amount, risk_percent)
+                manage_leverage(exchange, symbol, amount, risk_percent, risk_gate)
                 
+                # The signal candle identifies the order, so rerunning on the same data does not trade twice
+                intent_id = bar_intent_id(df['timestamp'][i] if 'timestamp' in df else df.index[i])
+                # place_order is the last definition above, which sends market orders
+                order = None
                 if df['signal'][i] == 'buy':
                     logging.info("Buy Signal - Placing Buy Order")
-                    place_order(exchange, symbol, 'market', 'buy', amount)
+                    order = place_order(exchange, 'buy', df['close'][i], symbol, amount, intent_id=intent_id)
                 elif df['signal'][i] == 'sell':
                     logging.info("Sell Signal - Placing Sell Order")
-                    place_order(exchange, symbol, 'market', 'sell', amount)
+                    order = place_order(exchange, 'sell', df['close'][i], symbol, amount, intent_id=intent_id)
+
+                if risk_gate is not None and order and order.get('filled'):
+                    fee = (order.get('fee') or {}).get('cost') or 0.0
+                    risk_gate.on_fill(symbol, df['signal'][i], order['filled'], order['average'], fee)
 
     except ccxt.BaseError as e:
         logging.error("An error occurred: %s", e)
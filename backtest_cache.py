@@ -0,0 +1,244 @@
+import hashlib
+import inspect
+import io
+import itertools
+import json
+import logging
+import os
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+BACKTEST_CACHE_DIR = os.getenv('BACKTEST_CACHE_DIR', 'backtest_cache')
+BACKTEST_CACHE_MAX_BYTES = int(os.getenv('BACKTEST_CACHE_MAX_BYTES', str(1 << 30)))
+
+def _update(digest, value):
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr(list(map(str, value.columns))).encode())
+        for name in value.columns:
+            _update(digest, value[name])
+    elif isinstance(value, pd.Series):
+        values = value.to_numpy()
+        if values.dtype == object:
+            values = pd.util.hash_pandas_object(value, index=False).to_numpy()
+        _update(digest, values)
+    elif isinstance(value, np.ndarray):
+        if value.dtype == object:
+            values = pd.util.hash_pandas_object(pd.Series(value.ravel()), index=False).to_numpy()
+            value = values.reshape(value.shape)
+        digest.update(f"{value.dtype.str}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+
+def fingerprint(*inputs):
+    """
+    Content hash of arrays, Series, DataFrames or JSON-able values.
+
+    Arrays are hashed by dtype, shape and raw bytes, so equal data gives the same fingerprint
+    whatever object holds it; DataFrames also include their column names but not the index.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for value in inputs:
+        _update(digest, value)
+    return digest.hexdigest()
+
+def code_version(*functions):
+    """
+    Hash of the source code of the given functions, so editing a strategy invalidates its results.
+
+    Only the listed functions are hashed; pass every function whose logic affects the result.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for function in functions:
+        try:
+            source = inspect.getsource(function)
+        except (OSError, TypeError):
+            source = f"{getattr(function, '__module__', '')}.{getattr(function, '__qualname__', repr(function))}"
+        digest.update(source.encode())
+    return digest.hexdigest()
+
+class BacktestCache:
+    """
+    Content-addressed on-disk cache of backtest results.
+
+    An entry is keyed by the fingerprint of the input data, the strategy code version and the
+    parameters, and holds named arrays (equity curve, positions, ...) plus a dict of metrics in
+    one .npz file. Entries are written to a temporary file and renamed, so readers never see a
+    partial entry. Hits refresh the file's modification time; once the cache grows past
+    max_bytes the least recently used entries are deleted.
+
+    Parameters:
+    - root (str): Cache directory.
+    - max_bytes (int): Size bound of all entries together.
+    """
+
+    def __init__(self, root=BACKTEST_CACHE_DIR, max_bytes=BACKTEST_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._entries = None
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(data, version, params):
+        """
+        Cache key of a run.
+
+        Parameters:
+        - data: Input arrays or DataFrame (or a tuple of them).
+        - version (str): Strategy code version, e.g. from code_version().
+        - params (dict): Strategy parameters.
+        """
+        return fingerprint(fingerprint(data), version, params)
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + '.npz')
+
+    def _scan(self):
+        # Entries from oldest to newest use, as other processes may have added or removed some
+        entries = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith('.npz'):
+                    try:
+                        stat = os.stat(os.path.join(directory, name))
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        entries.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in entries)
+        self._size = sum(self._entries.values())
+
+    def get(self, key):
+        """
+        Return (arrays, metrics) of a cached run, or None.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                arrays = {name: entry[name] for name in entry.files if name != '__metrics__'}
+                metrics = json.loads(str(entry['__metrics__']))
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            self.misses += 1
+            return None
+        if self._entries is not None and key in self._entries:
+            self._entries.move_to_end(key)
+        self.hits += 1
+        return arrays, metrics
+
+    def put(self, key, arrays, metrics):
+        """
+        Store a run's arrays (name -> np.ndarray) and JSON-able metrics, evicting old entries
+        if the cache gets too large.
+        """
+        buffer = io.BytesIO()
+        np.savez(buffer, __metrics__=np.array(json.dumps(metrics, sort_keys=True, default=float)),
+                 **{name: np.asarray(values) for name, values in arrays.items()})
+        payload = buffer.getvalue()
+        if len(payload) > self.max_bytes:
+            logging.warning("Backtest result of %d bytes exceeds the cache size; not cached", len(payload))
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+        if self._entries is None:
+            self._scan()
+        else:
+            self._size += len(payload) - self._entries.pop(key, 0)
+            self._entries[key] = len(payload)
+        if self._size > self.max_bytes:
+            self._evict(keep=key)
+
+    def _evict(self, keep):
+        self._scan()
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            key, size = next(iter(self._entries.items()))
+            if key == keep:
+                self._entries.move_to_end(key)
+                continue
+            del self._entries[key]
+            self._size -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            logging.debug("Evicted backtest result %s", key)
+
+    def sweep(self, run, data, param_grid, version):
+        """
+        Run a parameter sweep, computing only the cells that are not cached yet.
+
+        Parameters:
+        - run (callable): run(**params) -> (arrays, metrics) for one cell.
+        - data: The sweep's input data, used only for the cache key.
+        - param_grid (dict or list): {name: [values, ...]} for the full grid, or a list of
+          parameter dicts.
+        - version (str): Strategy code version.
+
+        Returns:
+        - list: (params, arrays, metrics) per cell, in grid order.
+        """
+        if isinstance(param_grid, dict):
+            names = list(param_grid)
+            param_grid = [dict(zip(names, values)) for values in itertools.product(*param_grid.values())]
+        data_key = fingerprint(data)
+        results = []
+        computed = 0
+        for params in param_grid:
+            key = fingerprint(data_key, version, params)
+            entry = self.get(key)
+            if entry is None:
+                entry = run(**params)
+                self.put(key, *entry)
+                computed += 1
+            results.append((params,) + tuple(entry))
+        logging.info("Sweep of %d cells: %d cached, %d computed", len(results), len(results) - computed, computed)
+        return results
+
+_default_cache = None
+
+def get_backtest_cache():
+    """
+    The process-wide cache in BACKTEST_CACHE_DIR.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = BacktestCache()
+    return _default_cache
+
+if __name__ == "__main__":
+    # Example: an SMA crossover sweep; the second run only computes the new slow lengths
+    import shutil
+    import tempfile
+    import time
+    from performance_metrics import compute_metrics
+
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 24 * 365)))
+
+    def sma_crossover(fast, slow):
+        fast_ma = pd.Series(close).rolling(fast).mean().to_numpy()
+        slow_ma = pd.Series(close).rolling(slow).mean().to_numpy()
+        position = np.r_[0.0, (fast_ma > slow_ma)[:-1]]
+        equity = 1000 * np.cumprod(1 + position * np.r_[0.0, np.diff(close) / close[:-1]])
+        return {'equity': equity, 'position': position}, compute_metrics(equity, positions=position)
+
+    root = tempfile.mkdtemp()
+    cache = BacktestCache(root, max_bytes=50 << 20)
+    version = code_version(sma_crossover)
+    for slow_lengths in ([50, 100, 200], [50, 100, 200, 400]):
+        start = time.perf_counter()
+        results = cache.sweep(sma_crossover, close, {'fast': [5, 10, 20, 30], 'slow': slow_lengths}, version)
+        best = max(results, key=lambda result: result[2]['sharpe'])
+        logging.info("%.2f s, best %s with Sharpe %.2f", time.perf_counter() - start, best[0], best[2]['sharpe'])
+    shutil.rmtree(root)
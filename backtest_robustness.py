@@ -0,0 +1,197 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from performance_metrics import max_drawdown, sharpe_ratio
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PERCENTILES = (5, 25, 50, 75, 95)
+# Simulated values held in memory at once per worker (paths x steps)
+_CHUNK_ELEMENTS = 2000000
+
+def trade_ledger(backtest_df, initial_capital=1000):
+    """
+    Reconstruct the round-trip trades of a backtesting.backtest_strategy result.
+
+    backtest_strategy records each entry as a debit and each exit as a credit to the 'capital'
+    column of the bar where it happened; entries and exits alternate.
+
+    Returns:
+    - pd.DataFrame: entry_index, exit_index, cost, proceeds, pnl and return per closed trade.
+    """
+    changes = backtest_df['capital'].to_numpy(dtype=float) - initial_capital
+    rows = np.flatnonzero(changes)
+    debits = rows[changes[rows] < 0]
+    credits = rows[changes[rows] > 0]
+    entries, exits = [], []
+    for entry in debits:
+        following = credits[credits > entry]
+        if len(following) and (not exits or entry > exits[-1]):
+            entries.append(entry)
+            exits.append(following[0])
+    cost = -changes[entries]
+    proceeds = changes[exits]
+    return pd.DataFrame({'entry_index': backtest_df.index[entries], 'exit_index': backtest_df.index[exits],
+                         'cost': cost, 'proceeds': proceeds, 'pnl': proceeds - cost,
+                         'return': (proceeds - cost) / cost if len(cost) else []})
+
+def _path_metrics(equity, returns, initial_capital, periods_per_year):
+    worst, _ = max_drawdown(equity, initial_capital)
+    return equity[:, -1], sharpe_ratio(returns, periods_per_year), worst
+
+def _simulate(kind, data, rng, count, method='bootstrap', block_size=1, initial_capital=1000, periods_per_year=1):
+    n = len(data)
+    results = np.empty((3, count))
+    rows = max(_CHUNK_ELEMENTS // max(n, 1), 1)
+    for begin in range(0, count, rows):
+        paths = min(rows, count - begin)
+        if kind == 'trades':
+            if method == 'shuffle':
+                steps = rng.permuted(np.broadcast_to(data, (paths, n)), axis=1)
+            else:
+                steps = data[rng.integers(0, n, size=(paths, n))]
+            equity = np.cumsum(steps, axis=1)
+            equity += initial_capital
+            returns = steps / (equity - steps)
+        else:
+            n_blocks = -(-n // block_size)
+            starts = rng.integers(0, n - block_size + 1, size=(paths, n_blocks))
+            index = (starts[:, :, None] + np.arange(block_size)).reshape(paths, -1)[:, :n]
+            returns = data[index]
+            equity = np.cumprod(1.0 + returns, axis=1)
+            equity *= initial_capital
+        results[:, begin:begin + paths] = _path_metrics(equity, returns, initial_capital, periods_per_year)
+    return results
+
+# Worker-side view of the shared input array
+_shared = {}
+
+def _attach(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    _shared['shm'] = shm
+    _shared['data'] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _simulate_shared(kind, seed, count, params):
+    return _simulate(kind, _shared['data'], np.random.default_rng(seed), count, **params)
+
+class RobustnessReport:
+    """
+    Distribution of final balance, Sharpe ratio and max drawdown over resampled paths.
+
+    Attributes:
+    - samples (dict): Array of every path's value per metric.
+    - bands (dict): Percentile -> value per metric, for PERCENTILES.
+    - original (dict): The metrics of the unresampled path.
+    - probability_of_loss (float): Share of paths ending below the initial capital.
+    """
+    def __init__(self, results, original, initial_capital, elapsed):
+        self.samples = {'final_balance': results[0], 'sharpe': results[1], 'max_drawdown': results[2]}
+        self.original = original
+        self.elapsed = elapsed
+        self.bands = {name: dict(zip(PERCENTILES, np.nanpercentile(values, PERCENTILES))) if np.isfinite(values).any() else {}
+                      for name, values in self.samples.items()}
+        self.probability_of_loss = float((results[0] < initial_capital).mean())
+
+    def summary(self):
+        lines = [f"{len(self.samples['final_balance'])} resamples in {self.elapsed:.2f} s, "
+                 f"probability of loss {self.probability_of_loss:.1%}"]
+        for name, band in self.bands.items():
+            values = ' / '.join(f"{value:.4g}" for value in band.values())
+            lines.append(f"{name}: original {self.original[name]:.4g}, percentiles {PERCENTILES}: {values}")
+        return '\n'.join(lines)
+
+def _run(kind, data, n_resamples, seed, n_jobs, params):
+    start = time.perf_counter()
+    data = np.ascontiguousarray(data, dtype=float)
+    if not len(data):
+        raise ValueError("Nothing to resample")
+    if kind == 'returns' and len(data) < params['block_size']:
+        raise ValueError("Block size is longer than the return series")
+    if n_jobs is None:
+        # Process start-up only pays off for large jobs
+        n_jobs = (os.cpu_count() or 1) if n_resamples * len(data) > 20 * _CHUNK_ELEMENTS else 1
+    seeds = np.random.SeedSequence(seed).spawn(n_jobs)
+    counts = [n_resamples // n_jobs + (i < n_resamples % n_jobs) for i in range(n_jobs)]
+
+    if n_jobs == 1:
+        results = _simulate(kind, data, np.random.default_rng(seeds[0]), n_resamples, **params)
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=data.nbytes)
+        try:
+            np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)[:] = data
+            with ProcessPoolExecutor(n_jobs, initializer=_attach, initargs=(shm.name, data.shape, data.dtype)) as pool:
+                parts = pool.map(_simulate_shared, [kind] * n_jobs, seeds, counts, [params] * n_jobs)
+                results = np.concatenate(list(parts), axis=1)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    if kind == 'trades':
+        equity = params['initial_capital'] + np.cumsum(data)[None, :]
+        returns = data[None, :] / (equity - data[None, :])
+    else:
+        returns = data[None, :]
+        equity = params['initial_capital'] * np.cumprod(1.0 + data)[None, :]
+    original = dict(zip(('final_balance', 'sharpe', 'max_drawdown'),
+                        (float(v[0]) for v in _path_metrics(equity, returns, params['initial_capital'], params['periods_per_year']))))
+    return RobustnessReport(results, original, params['initial_capital'], time.perf_counter() - start)
+
+def resample_trades(trade_pnls, n_resamples=10000, method='bootstrap', initial_capital=1000, periods_per_year=1,
+                    seed=None, n_jobs=None):
+    """
+    Resample the sequence of trade P&Ls to see how much of a backtest's result is luck of ordering.
+
+    Parameters:
+    - trade_pnls (array-like): P&L of each closed trade in order, e.g. trade_ledger(df)['pnl'].
+    - n_resamples (int): Number of simulated trade sequences.
+    - method (str): 'bootstrap' draws trades with replacement; 'shuffle' permutes them, which keeps
+      the final balance and only varies the path (drawdown, Sharpe).
+    - initial_capital (float): Starting balance.
+    - periods_per_year (float): Trades per year, to annualize the Sharpe ratio (1 leaves it per trade).
+    - seed (int): Seed; results are reproducible for the same seed and n_jobs.
+    - n_jobs (int): Worker processes. Defaults to 1 for small jobs and all CPUs otherwise.
+
+    Returns:
+    - RobustnessReport
+    """
+    if method not in ('bootstrap', 'shuffle'):
+        raise ValueError(f"Unknown method: {method}")
+    params = {'method': method, 'initial_capital': initial_capital, 'periods_per_year': periods_per_year}
+    return _run('trades', trade_pnls, n_resamples, seed, n_jobs, params)
+
+def bootstrap_returns(returns, n_resamples=10000, block_size=20, initial_capital=1000, periods_per_year=24 * 365,
+                      seed=None, n_jobs=None):
+    """
+    Block-bootstrap a per-bar strategy return series into alternative equity paths of the same length.
+
+    Parameters:
+    - returns (array-like): Strategy return of each bar.
+    - block_size (int): Length of the resampled blocks, which keeps short-range autocorrelation.
+    - periods_per_year (float): Bars per year, to annualize the Sharpe ratio (default hourly).
+    - See resample_trades for the other parameters.
+
+    Returns:
+    - RobustnessReport
+    """
+    returns = np.asarray(returns, dtype=float)
+    returns = returns[np.isfinite(returns)]
+    params = {'block_size': max(int(block_size), 1), 'initial_capital': initial_capital, 'periods_per_year': periods_per_year}
+    return _run('returns', returns, n_resamples, seed, n_jobs, params)
+
+if __name__ == "__main__":
+    # Example: 200 trades and two years of hourly strategy returns
+    rng = np.random.default_rng(0)
+    trades = rng.normal(2.0, 25.0, 200)
+    for method in ('bootstrap', 'shuffle'):
+        report = resample_trades(trades, 10000, method=method, seed=1)
+        logging.info("Trades, %s:\n%s", method, report.summary())
+
+    hourly = rng.normal(0.00005, 0.004, 24 * 365 * 2)
+    for n_jobs in (1, os.cpu_count()):
+        report = bootstrap_returns(hourly, 10000, block_size=24, seed=1, n_jobs=n_jobs)
+        logging.info("Hourly returns, %d process(es):\n%s", n_jobs, report.summary())
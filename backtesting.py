@@ -10,6 +10,10 @@ from sympy import Order
 import exchanges
 from trading_strategy import fetch_ohlcv
 from database import create_db_connection, fetch_historical_data, close_db_connection
+from sentiment_stream import sentiment_aggregator
+from backtest_robustness import resample_trades, trade_ledger
+from performance_metrics import compute_metrics
+from backtest_cache import code_version, get_backtest_cache
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -74,8 +78,9 @@ def fetch_multiple_timeframes(exchange, symbol, timeframes):
     combined_df = pd.concat(df_list)
     return combined_df
 
-def detect_signals(df, sma_short=20, sma_long=50, rsi_overbought=70, rsi_oversold=30):
-    """Detect trading signals based on technical indicators."""
+def detect_signals(df, sma_short=20, sma_long=50, rsi_overbought=70, rsi_oversold=30, sentiment_score=None):
+    """Detect trading signals based on technical indicators.
+    The market sentiment is read from analyze_market_sentiment unless sentiment_score is given."""
     try:
         latest = df.iloc[-1]
         previous = df.iloc[-2]
@@ -137,7 +142,8 @@ def detect_signals(df, sma_short=20, sma_long=50, rsi_overbought=70, rsi_oversol
             print("Sell signal detected near Fibonacci resistance level")
             return 'sell'
 
-        sentiment_score = analyze_market_sentiment()
+        if sentiment_score is None:
+            sentiment_score = analyze_market_sentiment()
         if sentiment_score > 0.5:
             logging.info("Positive market sentiment detected")
             # Adjust signals based on sentiment
@@ -164,9 +170,13 @@ def fetch_real_time_balance(exchange, currency='USDT'):
         logging.error("Error fetching real-time balance: %s", error)
         raise error
 
-def analyze_market_sentiment():
-    # Placeholder function for market sentiment analysis
-    sentiment_score = fetch_market_sentiment_data()  # Fetch sentiment data from an external source
+def analyze_market_sentiment(symbol='BTCUSDT'):
+    # Read the streaming aggregate without blocking; fall back to the one-shot source until it has data
+    snapshot = sentiment_aggregator.snapshot(symbol)
+    if snapshot is not None and snapshot['count'] >= 1:
+        sentiment_score = snapshot['mean']
+    else:
+        sentiment_score = fetch_market_sentiment_data()  # Fetch sentiment data from an external source
     logging.info(f"Market sentiment score: {sentiment_score}")
     return sentiment_score
 
@@ -176,9 +186,9 @@ def fetch_market_sentiment_data():
     sentiment_score = 0.7  # Positive sentiment score as an example
     return sentiment_score
 
-def backtest_strategy(df, initial_capital=1000, position_size=1, transaction_cost=0.001, stop_loss_pct=0.02, take_profit_pct=0.05):
+def backtest_strategy(df, initial_capital=1000, position_size=1, transaction_cost=0.001, stop_loss_pct=0.02, take_profit_pct=0.05, sentiment_score=None):
     try:
-        df['signal'] = df.apply(lambda row: detect_signals(df), axis=1)
+        df['signal'] = df.apply(lambda row: detect_signals(df, sentiment_score=sentiment_score), axis=1)
         df['position'] = 0  # 1 for long, -1 for short, 0 for no position
         df['capital'] = initial_capital
         df['balance'] = initial_capital
@@ -236,6 +246,36 @@ def calculate_position_size(capital, risk_per_trade, entry_price, stop_loss_pric
     position_size = risk_amount / abs(entry_price - stop_loss_price)
     return position_size
 
+def cached_backtest(df, **params):
+    """
+    Run backtest_strategy through the on-disk result cache.
+
+    The live market sentiment is read once and used for the whole run (pass sentiment_score to
+    pin it). The key covers the OHLCV data, the sentiment score, the source of the indicator,
+    signal, sentiment and backtest functions and the parameters; a hit restores the signal,
+    position, capital and balance columns without re-running.
+
+    Returns:
+    - tuple: (backtest DataFrame, final balance) as from backtest_strategy.
+    """
+    cache = get_backtest_cache()
+    if params.get('sentiment_score') is None:
+        params['sentiment_score'] = analyze_market_sentiment()
+    data = df[[column for column in ('timestamp', 'open', 'high', 'low', 'close', 'volume') if column in df.columns]]
+    version = code_version(backtest_strategy, detect_signals, calculate_indicators, analyze_market_sentiment,
+                           fetch_market_sentiment_data)
+    key = cache.key(data, version, params)
+    entry = cache.get(key)
+    if entry is not None:
+        arrays, metrics = entry
+        logging.info("Using cached backtest result %s", key[:12])
+        return df.assign(**arrays), metrics['final_balance']
+    backtest_df, final_balance = backtest_strategy(df, **params)
+    arrays = {name: backtest_df[name].to_numpy() for name in ('position', 'capital', 'balance')}
+    arrays['signal'] = backtest_df['signal'].to_numpy().astype(str)
+    cache.put(key, arrays, {'final_balance': float(final_balance)})
+    return backtest_df, final_balance
+
 def perform_backtesting(exchange):
     """
     Perform backtesting on BTCUSDT pair using the provided exchange.
@@ -248,11 +288,21 @@ def perform_backtesting(exchange):
         df = calculate_indicators(df)
 
         # Run backtest
-        backtest_df, final_capital = backtest_strategy(df)
+        backtest_df, final_capital = cached_backtest(df)
 
         # Output results
         print(backtest_df.tail())
         logging.info("Final capital after backtesting: %.2f", final_capital)
+
+        # How much of the result depends on the particular order and selection of trades
+        trades = trade_ledger(backtest_df)
+        if len(trades):
+            metrics = compute_metrics(1000 + trades['pnl'].cumsum(), trade_pnls=trades['pnl'], periods_per_year=1, initial_capital=1000)
+            logging.info("Per-trade Sharpe %.2f, max drawdown %.2f%%, win rate %.1f%%, profit factor %.2f",
+                         metrics['sharpe'], 100 * metrics['max_drawdown'], 100 * metrics['win_rate'], metrics['profit_factor'])
+        if len(trades) > 1:
+            report = resample_trades(trades['pnl'], n_resamples=10000, seed=0)
+            logging.info("Trade resampling:\n%s", report.summary())
     except Exception as e:
         logging.error("Error during backtesting: %s", e)
 
@@ -0,0 +1,249 @@
+import json
+import logging
+import os
+import time
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class CovarianceEstimator:
+    """
+    Streaming estimator of mean returns and the return covariance matrix.
+
+    Each bar updates the running (weighted) mean and co-moment matrix in O(N^2), Welford style, so
+    the estimates never require rescanning the price history. With halflife set, observations are
+    weighted exponentially (EWMA); otherwise all bars count equally and the covariance equals
+    pandas' DataFrame.cov().
+
+    Ledoit-Wolf shrinkage towards a scaled identity is computed from running second and fourth
+    moment sums. Like sklearn's ledoit_wolf with assume_centered=True, the shrinkage intensity
+    treats returns as centred, which is accurate because mean bar returns are tiny next to their
+    dispersion; the shrunk matrix itself is built from the demeaned covariance.
+
+    Parameters:
+    - n_assets (int): Number of assets; taken from the first update if omitted.
+    - halflife (float): EWMA half-life in bars, or None for equal weights.
+    - annualization (float): Bars per year used to annualize means and covariances.
+    - shrinkage (str or float): 'ledoit_wolf', a fixed intensity in [0, 1], or None.
+    - assets (list): Optional asset names, used by calculate_returns for labelled output.
+    """
+
+    def __init__(self, n_assets=None, halflife=None, annualization=252, shrinkage='ledoit_wolf', assets=None):
+        self.halflife = halflife
+        self.decay = 0.5 ** (1.0 / halflife) if halflife else 1.0
+        self.annualization = annualization
+        self.shrinkage = shrinkage
+        self.assets = list(assets) if assets is not None else None
+        self.count = 0
+        self.last_index = None
+        self.last_prices = None
+        if n_assets is None and assets is not None:
+            n_assets = len(assets)
+        self._allocate(n_assets)
+
+    def _allocate(self, n_assets):
+        self.n_assets = n_assets
+        if n_assets is None:
+            self.weight = self.weight_squares = 0.0
+            self.mean = self.comoment = self.raw_moment = self.fourth_moment = None
+            return
+        self.weight = 0.0  # Sum of observation weights
+        self.weight_squares = 0.0  # Sum of squared weights, for the unbiased EWMA covariance
+        self.mean = np.zeros(n_assets)
+        self.comoment = np.zeros((n_assets, n_assets))  # Weighted sum of demeaned outer products
+        self.raw_moment = np.zeros((n_assets, n_assets))  # Weighted sum of x x'
+        self.fourth_moment = np.zeros((n_assets, n_assets))  # Weighted sum of x_i^2 x_j^2
+
+    def update(self, returns):
+        """
+        Add one bar of returns (one value per asset).
+        """
+        self.update_many(np.asarray(returns, dtype=float)[None, :])
+
+    def update_many(self, returns):
+        """
+        Add several bars of returns at once (rows are bars, oldest first).
+
+        The batch's moments are computed with matrix products and merged into the running state
+        with the parallel (Chan et al.) update, giving the same result as adding the rows one by one.
+        """
+        X = np.atleast_2d(np.asarray(returns, dtype=float))
+        if not len(X):
+            return
+        if self.mean is None:
+            self._allocate(X.shape[1])
+        if X.shape[1] != self.n_assets:
+            raise ValueError(f"Expected {self.n_assets} assets, got {X.shape[1]}")
+
+        k = len(X)
+        # Weight of each new row after the whole batch is in: newest 1, decaying towards the oldest
+        weights = self.decay ** np.arange(k - 1, -1, -1, dtype=float)
+        batch_weight = weights.sum()
+        batch_mean = weights @ X / batch_weight
+        centered = X - batch_mean
+        batch_comoment = (centered * weights[:, None]).T @ centered
+        weighted = X * weights[:, None]
+        squares = X * X
+
+        old_scale = self.decay ** k
+        old_weight = self.weight * old_scale
+        total = old_weight + batch_weight
+        delta = batch_mean - self.mean
+        self.comoment *= old_scale
+        self.comoment += batch_comoment + np.outer(delta, delta) * (old_weight * batch_weight / total)
+        self.mean += delta * (batch_weight / total)
+        self.raw_moment *= old_scale
+        self.raw_moment += weighted.T @ X
+        self.fourth_moment *= old_scale
+        self.fourth_moment += (squares * weights[:, None]).T @ squares
+        self.weight = total
+        self.weight_squares = self.weight_squares * old_scale ** 2 + (weights ** 2).sum()
+        self.count += k
+
+    def update_prices(self, prices, index=None):
+        """
+        Add one bar of prices; the return against the previous bar's prices is added.
+
+        Parameters:
+        - prices (array-like): Latest price per asset.
+        - index: Label of the bar (e.g. its timestamp), remembered as last_index.
+        """
+        self.update_prices_many(np.asarray(prices, dtype=float)[None, :], None if index is None else [index])
+
+    def update_prices_many(self, prices, index=None):
+        """
+        Add several bars of prices (rows, oldest first). Returns are simple returns, as pct_change
+        computes them; bars with a missing price for any asset are skipped.
+        """
+        prices = np.atleast_2d(np.asarray(prices, dtype=float))
+        if not len(prices):
+            return
+        if self.last_prices is not None:
+            prices_with_last = np.vstack([self.last_prices, prices])
+        else:
+            prices_with_last = prices
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = prices_with_last[1:] / prices_with_last[:-1] - 1.0
+        returns = returns[np.isfinite(returns).all(axis=1)]
+        self.update_many(returns)
+        valid = np.isfinite(prices).all(axis=1)
+        if valid.any():
+            self.last_prices = prices[np.flatnonzero(valid)[-1]].copy()
+        if index is not None and len(index):
+            self.last_index = index[-1]
+
+    def mean_returns(self, annualize=True):
+        """
+        Weighted mean return per asset, annualized by default.
+        """
+        return self.mean * (self.annualization if annualize else 1.0)
+
+    def sample_covariance(self):
+        """
+        Covariance per bar without shrinkage. Uses the unbiased (reliability-weighted) denominator,
+        which is count - 1 with equal weights.
+        """
+        denominator = self.weight - self.weight_squares / self.weight if self.weight else 0.0
+        if denominator <= 0:
+            return np.full((self.n_assets, self.n_assets), np.nan)
+        return self.comoment / denominator
+
+    def shrinkage_intensity(self):
+        """
+        Ledoit-Wolf shrinkage intensity in [0, 1] from the running moment sums.
+        """
+        if not isinstance(self.shrinkage, str):
+            return float(self.shrinkage or 0.0)
+        if self.shrinkage != 'ledoit_wolf':
+            raise ValueError(f"Unknown shrinkage: {self.shrinkage}")
+        if self.weight <= 0:
+            return 0.0
+        n_assets = self.n_assets
+        # Effective number of observations for weighted data
+        n = self.weight ** 2 / self.weight_squares
+        second = self.raw_moment / self.weight
+        trace_mean = np.trace(second) / n_assets
+        beta_sum = self.fourth_moment.sum() / self.weight
+        delta_sum = (second ** 2).sum()
+        beta = (beta_sum - delta_sum) / (n_assets * n)
+        delta = (delta_sum - 2 * trace_mean * np.trace(second) + n_assets * trace_mean ** 2) / n_assets
+        if delta <= 0:
+            return 0.0
+        return float(min(max(beta, 0.0), delta) / delta)
+
+    def covariance(self, annualize=True):
+        """
+        Covariance matrix with the configured shrinkage, annualized by default.
+        """
+        cov = self.sample_covariance()
+        intensity = self.shrinkage_intensity()
+        if intensity > 0:
+            target = np.trace(cov) / self.n_assets
+            cov = (1.0 - intensity) * cov
+            cov[np.diag_indices_from(cov)] += intensity * target
+        return cov * (self.annualization if annualize else 1.0)
+
+    def to_dict(self):
+        """
+        State as plain Python types, e.g. for JSON.
+        """
+        def matrix(value):
+            return None if value is None else value.tolist()
+        return {'halflife': self.halflife, 'annualization': self.annualization, 'shrinkage': self.shrinkage,
+                'assets': self.assets, 'n_assets': self.n_assets, 'count': self.count, 'weight': float(self.weight),
+                'weight_squares': float(self.weight_squares), 'mean': matrix(self.mean), 'comoment': matrix(self.comoment),
+                'raw_moment': matrix(self.raw_moment), 'fourth_moment': matrix(self.fourth_moment),
+                'last_prices': matrix(self.last_prices),
+                'last_index': self.last_index if isinstance(self.last_index, (int, float, str, type(None))) else str(self.last_index)}
+
+    @classmethod
+    def from_dict(cls, state):
+        estimator = cls(state['n_assets'], state['halflife'], state['annualization'], state['shrinkage'], state['assets'])
+        estimator.count = state['count']
+        estimator.weight = state['weight']
+        estimator.weight_squares = state['weight_squares']
+        for name in ('mean', 'comoment', 'raw_moment', 'fourth_moment', 'last_prices'):
+            if state[name] is not None:
+                setattr(estimator, name, np.asarray(state[name], dtype=float))
+        estimator.last_index = state['last_index']
+        return estimator
+
+    def save(self, path):
+        """
+        Write the state to an .npz file, atomically.
+        """
+        state = self.to_dict()
+        arrays = {name: np.asarray(value, dtype=float) for name, value in state.items()
+                  if name in ('mean', 'comoment', 'raw_moment', 'fourth_moment', 'last_prices') and value is not None}
+        meta = {name: value for name, value in state.items() if name not in arrays}
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            state = json.loads(str(data['meta']))
+            for name in ('mean', 'comoment', 'raw_moment', 'fourth_moment', 'last_prices'):
+                state[name] = data[name] if name in data else None
+        return cls.from_dict(state)
+
+if __name__ == "__main__":
+    # Example: 300 assets, two years of daily history, then per-minute refreshes with one new bar each
+    rng = np.random.default_rng(0)
+    n_assets, n_bars = 300, 504
+    factors = rng.normal(0, 0.01, (n_bars + 60, 5)) @ rng.normal(0, 1, (5, n_assets))
+    prices = 100 * np.exp(np.cumsum(factors + rng.normal(0, 0.01, (n_bars + 60, n_assets)), axis=0))
+
+    estimator = CovarianceEstimator(n_assets, halflife=126)
+    start = time.perf_counter()
+    estimator.update_prices_many(prices[:n_bars])
+    logging.info("Initial fit on %d bars: %.1f ms", n_bars, (time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for row in prices[n_bars:]:
+        estimator.update_prices(row)
+        returns, cov = estimator.mean_returns(), estimator.covariance()
+    logging.info("Update plus shrunk covariance per bar: %.2f ms (intensity %.3f)",
+                 (time.perf_counter() - start) / 60 * 1000, estimator.shrinkage_intensity())
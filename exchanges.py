@@ -3,6 +3,8 @@ import os
 import ccxt
 import pandas as pd
 from dotenv import load_dotenv
+from mock_exchange import mock_exchange_from_env
+from notification_service import notify
 
 # Load environment variables from .env file
 load_dotenv(dotenv_path=r'C:\Users\amrita\Desktop\improvised-code-of-the-pdf-GPT-main\API.env')
@@ -36,30 +38,10 @@ def track_performance_metrics(df):
         send_notification("10-period moving average crossed below 50-period moving average.")
 
 def send_email_notification(subject, message):
-    import smtplib
-    from email.mime.text import MIMEText
-
-    sender = os.getenv('EMAIL_USER')
-    receiver = 'receiver_email@example.com'  # Replace with actual receiver email
-    password = os.getenv('EMAIL_PASS')
-
-    if not sender or not password:
-        logging.error("Email credentials not found. Cannot send email notification.")
-        return
-
-    msg = MIMEText(message)
-    msg["Subject"] = subject
-    msg["From"] = sender
-    msg["To"] = receiver
-
-    try:
-        with smtplib.SMTP(os.getenv('SMTP_SERVER'), int(os.getenv('SMTP_PORT'))) as server:
-            server.starttls()
-            server.login(sender, password)
-            server.sendmail(sender, receiver, msg.as_string())
-            logging.info("Email notification sent successfully")
-    except Exception as e:
-        logging.error("Failed to send email notification: %s", e)
+    """
+    Queue an email on the notification service; returns without waiting for SMTP.
+    """
+    notify(message, subject=subject, channels=('email',))
 
 def send_notification(message):
     logging.info(message)
@@ -68,7 +50,12 @@ def send_notification(message):
 def initialize_exchange(api_key, api_secret):
     """
     Initialize a Bybit exchange using API credentials.
+    Returns the in-process mock exchange instead when USE_MOCK_EXCHANGE is set.
     """
+    mock_exchange = mock_exchange_from_env()
+    if mock_exchange is not None:
+        return mock_exchange
+
     if not api_key or not api_secret:
         error_message = "API key or secret is missing."
         logging.error(error_message)
@@ -81,8 +68,7 @@ def initialize_exchange(api_key, api_secret):
             'secret': api_secret,
             'enableRateLimit': True,  # This helps to avoid rate limit errors
         })
-        logging.info("Initialized Bybit exchange")
-        send_notification(f"Initialized Bybit exchange with API key: {api_key[:4]}****")
+        logging.info(f"Initialized Bybit exchange with API key: {api_key[:4]}****")
         return exchange
     except ccxt.AuthenticationError as auth_error:
         error_message = f"Authentication failed with Bybit: {auth_error}"
@@ -137,9 +123,7 @@ def initialize_multiple_exchanges():
 if __name__ == "__main__":
     exchanges = initialize_multiple_exchanges()
     if exchanges:
-        success_message = "Successfully initialized all exchanges."
-        logging.info(success_message)
-        send_notification(success_message)
+        logging.info("Successfully initialized all exchanges.")
     else:
         error_message = "Failed to initialize exchanges."
         logging.error(error_message)
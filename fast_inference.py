@@ -0,0 +1,323 @@
+import json
+import logging
+import os
+import time
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Largest Embedding x Conv1D lookup table (vocabulary * kernel size * filters) that is precomputed
+MAX_FUSED_TABLE = 64 * 1024 * 1024
+
+def _sigmoid(x, out=None):
+    # sigmoid(x) = 0.5 * tanh(0.5 * x) + 0.5, which needs no scipy and is numerically stable
+    out = np.multiply(x, 0.5, out=out)
+    np.tanh(out, out=out)
+    out *= 0.5
+    out += 0.5
+    return out
+
+def _relu(x, out=None):
+    return np.maximum(x, 0, out=out)
+
+def _softmax(x, out=None):
+    out = np.subtract(x, x.max(axis=-1, keepdims=True), out=out)
+    np.exp(out, out=out)
+    out /= out.sum(axis=-1, keepdims=True)
+    return out
+
+ACTIVATIONS = {
+    'linear': None,
+    'relu': _relu,
+    'sigmoid': _sigmoid,
+    'tanh': lambda x, out=None: np.tanh(x, out=out),
+    'softmax': _softmax,
+}
+
+def _activation(name):
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation: {name}")
+    return ACTIVATIONS[name]
+
+class _Dense:
+    def __init__(self, spec, weights):
+        self.kernel = weights[0]
+        self.bias = weights[1] if len(weights) > 1 else None
+        self.activation = _activation(spec['activation'])
+
+    def __call__(self, x):
+        y = x @ self.kernel
+        if self.bias is not None:
+            y += self.bias
+        return y if self.activation is None else self.activation(y, out=y)
+
+class _Embedding:
+    def __init__(self, spec, weights):
+        self.table = weights[0]
+
+    def __call__(self, x):
+        return self.table[np.asarray(x, dtype=np.intp)]
+
+class _Conv1D:
+    """
+    Valid, stride-1 1D convolution computed as a sum of kernel_size shifted matrix products.
+    """
+    def __init__(self, spec, weights):
+        self.kernel = weights[0]  # (kernel_size, input channels, filters)
+        self.bias = weights[1] if len(weights) > 1 else None
+        self.activation = _activation(spec['activation'])
+
+    def linear(self, x):
+        size = self.kernel.shape[0]
+        steps = x.shape[1] - size + 1
+        y = x[:, :steps] @ self.kernel[0]
+        for k in range(1, size):
+            y += x[:, k:k + steps] @ self.kernel[k]
+        if self.bias is not None:
+            y += self.bias
+        return y
+
+    def __call__(self, x):
+        y = self.linear(x)
+        return y if self.activation is None else self.activation(y, out=y)
+
+class _EmbeddingConv1D:
+    """
+    An Embedding followed by a Conv1D, fused into per-offset lookup tables.
+
+    The convolution is linear in the embedded tokens, so embedding @ kernel[k] is precomputed for
+    every token and kernel offset, and the layer becomes kernel_size table lookups and additions.
+    """
+    def __init__(self, embedding, conv):
+        self.tables = np.ascontiguousarray(np.einsum('ve,kef->kvf', embedding.table, conv.kernel), dtype=np.float32)
+        self.bias = conv.bias
+        self.activation = conv.activation
+
+    def __call__(self, x):
+        tokens = np.asarray(x, dtype=np.intp)
+        size = self.tables.shape[0]
+        steps = tokens.shape[1] - size + 1
+        y = self.tables[0][tokens[:, :steps]]
+        for k in range(1, size):
+            y += self.tables[k][tokens[:, k:k + steps]]
+        if self.bias is not None:
+            y += self.bias
+        return y if self.activation is None else self.activation(y, out=y)
+
+class _LSTM:
+    """
+    Keras LSTM forward pass.
+
+    Gate columns are reordered from Keras' (i, f, c, o) to (i, f, o, c) and the sigmoid gates are
+    pre-scaled by 0.5, so each step applies a single tanh to all four gates and turns the first
+    three into sigmoids with one in-place multiply-add.
+    """
+    def __init__(self, spec, weights):
+        if spec['activation'] != 'tanh' or spec['recurrent_activation'] != 'sigmoid':
+            raise ValueError("Only LSTMs with tanh activation and sigmoid recurrent activation are supported")
+        kernel, recurrent, bias = weights if len(weights) == 3 else (weights[0], weights[1], None)
+        units = recurrent.shape[0]
+        order = np.concatenate([np.arange(0, 2 * units), np.arange(3 * units, 4 * units), np.arange(2 * units, 3 * units)])
+        scale = np.ones(4 * units, dtype=np.float32)
+        scale[:3 * units] = 0.5
+        self.units = units
+        self.kernel = np.ascontiguousarray(kernel[:, order] * scale, dtype=np.float32)
+        self.recurrent = np.ascontiguousarray(recurrent[:, order] * scale, dtype=np.float32)
+        self.bias = None if bias is None else np.ascontiguousarray(bias[order] * scale, dtype=np.float32)
+        self.return_sequences = spec['return_sequences']
+
+    def __call__(self, x):
+        batch, steps, _ = x.shape
+        units = self.units
+        # Input contributions for every step in one product
+        inputs = x @ self.kernel
+        if self.bias is not None:
+            inputs += self.bias
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        z = np.empty((batch, 4 * units), dtype=np.float32)
+        tmp = np.empty((batch, units), dtype=np.float32)
+        sequences = np.empty((batch, steps, units), dtype=np.float32) if self.return_sequences else None
+        sigmoid_gates = z[:, :3 * units]
+        i, f, o, g = z[:, :units], z[:, units:2 * units], z[:, 2 * units:3 * units], z[:, 3 * units:]
+        half = np.float32(0.5)
+        recurrent = self.recurrent
+        # Each step is a fixed sequence of in-place ufunc calls on preallocated buffers
+        for t, step_input in enumerate(inputs.transpose(1, 0, 2)):
+            np.dot(h, recurrent, out=z)
+            np.add(z, step_input, out=z)
+            np.tanh(z, out=z)
+            np.multiply(sigmoid_gates, half, out=sigmoid_gates)
+            np.add(sigmoid_gates, half, out=sigmoid_gates)
+            np.multiply(c, f, out=c)
+            np.multiply(i, g, out=tmp)
+            np.add(c, tmp, out=c)
+            np.tanh(c, out=tmp)
+            np.multiply(o, tmp, out=h)
+            if sequences is not None:
+                sequences[:, t] = h
+        return sequences if sequences is not None else h
+
+class _GlobalMaxPooling1D:
+    def __init__(self, spec, weights):
+        pass
+
+    def __call__(self, x):
+        return x.max(axis=1)
+
+class _GlobalAveragePooling1D:
+    def __init__(self, spec, weights):
+        pass
+
+    def __call__(self, x):
+        return x.mean(axis=1)
+
+class _Flatten:
+    def __init__(self, spec, weights):
+        pass
+
+    def __call__(self, x):
+        return x.reshape(len(x), -1)
+
+LAYERS = {
+    'Dense': _Dense,
+    'Embedding': _Embedding,
+    'Conv1D': _Conv1D,
+    'LSTM': _LSTM,
+    'GlobalMaxPooling1D': _GlobalMaxPooling1D,
+    'GlobalAveragePooling1D': _GlobalAveragePooling1D,
+    'Flatten': _Flatten,
+}
+
+# Layers that only matter during training
+SKIPPED_LAYERS = ('InputLayer', 'Dropout', 'SpatialDropout1D')
+
+class NumpyModel:
+    """
+    Forward pass of an exported Sequential model in plain NumPy.
+
+    predict() accepts the same inputs as the Keras model and returns float32 predictions, without
+    Keras' per-call graph and data-adapter overhead, which dominates for single windows and small
+    batches. Accepts the same keyword arguments as Keras' predict so it can be passed wherever a
+    Keras model is used for inference; they are ignored.
+    """
+    def __init__(self, specs, weights, fuse=True):
+        self.specs = specs
+        self.layers = []
+        for spec, layer_weights in zip(specs, weights):
+            layer = LAYERS[spec['type']](spec, [np.asarray(w, dtype=np.float32) for w in layer_weights])
+            previous = self.layers[-1] if self.layers else None
+            if (fuse and isinstance(layer, _Conv1D) and isinstance(previous, _Embedding)
+                    and previous.table.shape[0] * layer.kernel.shape[0] * layer.kernel.shape[2] <= MAX_FUSED_TABLE):
+                self.layers[-1] = _EmbeddingConv1D(previous, layer)
+            else:
+                self.layers.append(layer)
+
+    def predict(self, X, **kwargs):
+        x = np.asarray(X)
+        if x.dtype.kind == 'f' and x.dtype != np.float32:
+            x = x.astype(np.float32)
+        for layer in self.layers:
+            x = layer(x)
+        return x
+
+    __call__ = predict
+
+def export_model(model, path):
+    """
+    Export a Keras Sequential model to a NumPy .npz file readable by load_numpy_model.
+
+    Parameters:
+    - model: Keras model, or the path of a saved one.
+    - path (str): Output .npz path. Written to a temporary file and moved into place.
+    """
+    if isinstance(model, str):
+        # Keras is only needed to export, not to run the exported model
+        from tensorflow.keras.models import load_model
+        model = load_model(model)
+    specs = []
+    arrays = {}
+    for layer in model.layers:
+        layer_type = layer.__class__.__name__
+        if layer_type in SKIPPED_LAYERS:
+            continue
+        if layer_type not in LAYERS:
+            raise ValueError(f"Unsupported layer for NumPy export: {layer_type}")
+        config = layer.get_config()
+        spec = {'type': layer_type}
+        if layer_type in ('Dense', 'Conv1D', 'LSTM'):
+            spec['activation'] = config['activation']
+        if layer_type == 'Conv1D':
+            if config['padding'] != 'valid' or tuple(config['strides']) != (1,) or tuple(config['dilation_rate']) != (1,):
+                raise ValueError("Only valid, stride-1, undilated Conv1D layers are supported")
+        if layer_type == 'LSTM':
+            if config.get('go_backwards') or config.get('return_state'):
+                raise ValueError("Only forward LSTMs without returned states are supported")
+            spec['recurrent_activation'] = config['recurrent_activation']
+            spec['return_sequences'] = config['return_sequences']
+        if layer_type.startswith('Global') and config.get('keepdims'):
+            raise ValueError("Pooling with keepdims is not supported")
+        weights = layer.get_weights()
+        spec['weights'] = len(weights)
+        for j, weight in enumerate(weights):
+            arrays[f'layer{len(specs)}_{j}'] = np.asarray(weight, dtype=np.float32)
+        specs.append(spec)
+
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, architecture=np.array(json.dumps(specs)), **arrays)
+    os.replace(tmp_path, path)
+    logging.info("Exported %d layers to %s", len(specs), path)
+
+def load_numpy_model(path, fuse=True):
+    """
+    Load a model written by export_model.
+
+    Parameters:
+    - path (str): .npz path.
+    - fuse (bool): Fuse an Embedding followed by a Conv1D into lookup tables.
+
+    Returns:
+    - NumpyModel: Model with a Keras-compatible predict().
+    """
+    with np.load(path, allow_pickle=False) as data:
+        specs = json.loads(str(data['architecture']))
+        weights = [[data[f'layer{i}_{j}'] for j in range(spec['weights'])] for i, spec in enumerate(specs)]
+    return NumpyModel(specs, weights, fuse=fuse)
+
+def benchmark(model, X, repeat=1000):
+    """
+    Average latency of model.predict(X) in microseconds.
+    """
+    model.predict(X)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        model.predict(X)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+if __name__ == "__main__":
+    # Example: run randomly initialized copies of the repo's LSTM and sentiment CNN architectures
+    rng = np.random.default_rng(0)
+    lstm = NumpyModel(
+        [{'type': 'LSTM', 'activation': 'tanh', 'recurrent_activation': 'sigmoid', 'return_sequences': True, 'weights': 3},
+         {'type': 'LSTM', 'activation': 'tanh', 'recurrent_activation': 'sigmoid', 'return_sequences': False, 'weights': 3},
+         {'type': 'Dense', 'activation': 'linear', 'weights': 2}],
+        [[rng.normal(0, 0.1, (1, 200)), rng.normal(0, 0.1, (50, 200)), np.zeros(200)],
+         [rng.normal(0, 0.1, (50, 200)), rng.normal(0, 0.1, (50, 200)), np.zeros(200)],
+         [rng.normal(0, 0.1, (50, 1)), np.zeros(1)]])
+    window = rng.random((1, 60, 1), dtype=np.float32)
+    logging.info("LSTM, one 60-step window: %.0f microseconds", benchmark(lstm, window))
+
+    cnn = NumpyModel(
+        [{'type': 'Embedding', 'weights': 1},
+         {'type': 'Conv1D', 'activation': 'relu', 'weights': 2},
+         {'type': 'GlobalMaxPooling1D', 'weights': 0},
+         {'type': 'Dense', 'activation': 'relu', 'weights': 2},
+         {'type': 'Dense', 'activation': 'sigmoid', 'weights': 2}],
+        [[rng.uniform(-0.05, 0.05, (5000, 128))],
+         [rng.normal(0, 0.05, (5, 128, 128)), np.zeros(128)],
+         [],
+         [rng.normal(0, 0.1, (128, 10)), np.zeros(10)],
+         [rng.normal(0, 0.1, (10, 1)), np.zeros(1)]])
+    tokens = rng.integers(0, 5000, (1, 100))
+    logging.info("Sentiment CNN, one 100-token sequence: %.0f microseconds", benchmark(cnn, tokens))
@@ -0,0 +1,411 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where datasets are not locked
+    fcntl = None
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+FEATURE_STORE_DIR = os.getenv('FEATURE_STORE_DIR', 'feature_store')
+FEATURE_STORE_MAX_BYTES = int(os.getenv('FEATURE_STORE_MAX_BYTES', str(1 << 30)))
+
+# Bump when compute_features changes so stale stores are rebuilt
+FEATURE_CODE_VERSION = 1
+
+DEFAULT_SPEC = {
+    'sma': [50, 200],
+    'ema': [12, 26],
+    'macd': [12, 26, 9],
+    'rsi': 14,
+}
+
+def _warmup(spec):
+    # Rows of history needed before a new row's indicators match a full recomputation
+    longest = max(spec['sma'] + spec['ema'] + spec['macd'] + [spec['rsi']])
+    return 3 * longest
+
+def compute_features(df, spec=None):
+    """
+    Compute indicator features from OHLCV data.
+
+    Parameters:
+    - df (pd.DataFrame): Data with a 'close' (or 'Close') column and optionally 'volume'.
+    - spec (dict): Indicator windows, see DEFAULT_SPEC.
+
+    Returns:
+    - pd.DataFrame: One float column per feature, NaN during each indicator's warm-up.
+    """
+    spec = spec or DEFAULT_SPEC
+    close = (df['close'] if 'close' in df.columns else df['Close']).astype(np.float64).reset_index(drop=True)
+    features = {'close': close}
+    volume = df['volume'] if 'volume' in df.columns else df.get('Volume')
+    if volume is not None:
+        features['volume'] = volume.astype(np.float64).reset_index(drop=True)
+    features['return'] = close.pct_change()
+    for window in spec['sma']:
+        features[f'SMA_{window}'] = close.rolling(window).mean()
+    for window in spec['ema']:
+        features[f'EMA_{window}'] = close.ewm(span=window, adjust=False).mean()
+    fast, slow, signal = spec['macd']
+    macd = close.ewm(span=fast, adjust=False).mean() - close.ewm(span=slow, adjust=False).mean()
+    features['MACD'] = macd
+    features['MACD_signal'] = macd.ewm(span=signal, adjust=False).mean()
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / spec['rsi'], adjust=False).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / spec['rsi'], adjust=False).mean()
+    features['RSI'] = 100 - 100 / (1 + gain / loss.replace(0, np.nan))
+    return pd.DataFrame(features)
+
+class IncrementalMinMaxScaler:
+    """
+    Min-max scaler to [0, 1] whose range is updated incrementally with partial_fit.
+
+    Transforms and inverse transforms mirror sklearn's MinMaxScaler, so it can stand in for the
+    scaler returned by prepare_data.
+    """
+    def __init__(self, data_min=None, data_max=None):
+        self.data_min_ = None if data_min is None else np.asarray(data_min, dtype=np.float64)
+        self.data_max_ = None if data_max is None else np.asarray(data_max, dtype=np.float64)
+
+    def partial_fit(self, X):
+        """
+        Widen the range to cover X. Returns True if the range changed.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if not len(X):
+            return False
+        with np.errstate(all='ignore'):
+            low = np.nanmin(X, axis=0)
+            high = np.nanmax(X, axis=0)
+        if self.data_min_ is None:
+            self.data_min_, self.data_max_ = low, high
+            return True
+        new_min = np.fmin(self.data_min_, low)
+        new_max = np.fmax(self.data_max_, high)
+        changed = not (np.array_equal(new_min, self.data_min_, equal_nan=True) and np.array_equal(new_max, self.data_max_, equal_nan=True))
+        self.data_min_, self.data_max_ = new_min, new_max
+        return changed
+
+    def _span(self):
+        span = self.data_max_ - self.data_min_
+        return np.where(np.isfinite(span) & (span > 0), span, 1.0)
+
+    def transform(self, X):
+        scaled = (np.asarray(X, dtype=np.float64) - self.data_min_) / self._span()
+        return np.nan_to_num(scaled, nan=0.0).astype(np.float32)
+
+    def inverse_transform(self, X):
+        return np.asarray(X, dtype=np.float64) * self._span() + self.data_min_
+
+    def column(self, index):
+        """
+        Scaler for a single column, e.g. to inverse-transform model predictions of the close.
+        """
+        return IncrementalMinMaxScaler(self.data_min_[index:index + 1], self.data_max_[index:index + 1])
+
+    def to_dict(self):
+        return {'data_min': [None if np.isnan(v) else float(v) for v in self.data_min_],
+                'data_max': [None if np.isnan(v) else float(v) for v in self.data_max_]}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls([np.nan if v is None else v for v in state['data_min']],
+                   [np.nan if v is None else v for v in state['data_max']])
+
+class FeatureSet:
+    """
+    Features of one dataset, memory-mapped from the store.
+
+    Attributes:
+    - raw (np.memmap): float32 (rows, features) indicator values.
+    - scaled (np.memmap): The same values scaled to [0, 1], NaN warm-up values as 0.
+    - columns (list): Feature names.
+    - scaler (IncrementalMinMaxScaler): Scaler that produced `scaled`.
+    - version (str): Hash of the feature spec and code version.
+    """
+    def __init__(self, path, meta):
+        self.path = path
+        self.columns = meta['columns']
+        self.version = meta['version']
+        self.scaler = IncrementalMinMaxScaler.from_dict(meta['scaler'])
+        shape = (meta['rows'], len(self.columns))
+        self.raw = np.memmap(os.path.join(path, 'raw.f32'), dtype=np.float32, mode='r', shape=shape) if shape[0] else np.empty(shape, np.float32)
+        self.scaled = np.memmap(os.path.join(path, 'scaled.f32'), dtype=np.float32, mode='r', shape=shape) if shape[0] else np.empty(shape, np.float32)
+
+    def __len__(self):
+        return len(self.raw)
+
+    def windows(self, window, column='close', start=0):
+        """
+        Sliding windows of a scaled feature for sequence models, without copying.
+
+        Parameters:
+        - window (int): Window length.
+        - column (str): Feature to window.
+        - start (int): Only return windows whose target row is at or after this index.
+
+        Returns:
+        - tuple: (X of shape (samples, window, 1), y of shape (samples,)) as read-only views.
+        """
+        series = self.scaled[:, self.columns.index(column)]
+        samples = len(series) - window - 1
+        first = max(start - window, 0)
+        if samples <= first:
+            return np.empty((0, window, 1), np.float32), np.empty(0, np.float32)
+        X = sliding_window_view(series, window)[first:samples][..., np.newaxis]
+        y = series[window + first:window + samples]
+        return X, y
+
+    def target_scaler(self, column='close'):
+        return self.scaler.column(self.columns.index(column))
+
+class FeatureStore:
+    """
+    Versioned on-disk store of precomputed, normalized features.
+
+    Each dataset is keyed by its first rows and column names, and each feature spec by a hash of
+    the spec and FEATURE_CODE_VERSION. Indicators and scaler ranges are computed once; when the
+    same dataset arrives with new candles only the tail is computed (with enough history for the
+    indicators to warm up), appended to the float32 files and folded into the scaler. Existing
+    scaled rows are only rewritten when the new candles widen the scaler's range.
+
+    Callers that pass a sliding window of candles create a new dataset each time, so once the
+    store grows past max_bytes the least recently used datasets are deleted.
+
+    Several processes may share a store (e.g. the bot and its background retraining). Building
+    and appending hold a per-dataset file lock, and rebuilt files are replaced rather than
+    rewritten, so FeatureSets other processes have mapped stay valid.
+    """
+
+    def __init__(self, root=FEATURE_STORE_DIR, spec=None, max_bytes=FEATURE_STORE_MAX_BYTES):
+        self.root = root
+        self.spec = spec or DEFAULT_SPEC
+        self.max_bytes = max_bytes
+        self.version = hashlib.sha1(json.dumps([self.spec, FEATURE_CODE_VERSION], sort_keys=True).encode()).hexdigest()[:16]
+
+    def get(self, df, name=None):
+        """
+        Return the FeatureSet for a DataFrame, computing or extending it as needed.
+
+        Parameters:
+        - df (pd.DataFrame): OHLCV data, oldest first.
+        - name (str): Dataset name, e.g. 'BTCUSDT_1h'. Defaults to a key derived from the data.
+
+        Returns:
+        - FeatureSet: Memory-mapped features with one row per row of df.
+        """
+        source = self._source_values(df)
+        path = os.path.join(self.root, name or self._dataset_key(df, source), self.version)
+        with _dataset_lock(path):
+            meta = self._read_meta(path)
+            if meta is not None and (meta['rows'] > len(source) or meta['source_hash'] != self._hash(source[:meta['rows']])):
+                logging.info("Source data for %s changed, rebuilding features", path)
+                meta = None
+            if meta is None:
+                meta = self._build(path, df, source)
+                changed = True
+            elif meta['rows'] < len(source):
+                meta = self._append(path, meta, df, source)
+                changed = True
+            else:
+                # Mark the dataset as recently used
+                os.utime(os.path.join(path, 'meta.json'))
+                changed = False
+            features = FeatureSet(path, meta)
+        if changed:
+            self._evict(keep=path)
+        return features
+
+    def _evict(self, keep):
+        # Datasets (root/<dataset>/<version>) from least to most recently used
+        datasets = []
+        for name in os.listdir(self.root):
+            dataset = os.path.join(self.root, name)
+            for version in os.listdir(dataset) if os.path.isdir(dataset) else ():
+                directory = os.path.join(dataset, version)
+                try:
+                    files = [os.path.join(directory, file_name) for file_name in os.listdir(directory)]
+                    meta_path = os.path.join(directory, 'meta.json')
+                    used = os.path.getmtime(meta_path if meta_path in files else directory)
+                    size = sum(os.path.getsize(file_path) for file_path in files)
+                except OSError:
+                    continue
+                datasets.append((used, directory, size))
+        datasets.sort()
+        total = sum(size for _, _, size in datasets)
+        for _, directory, size in datasets:
+            if total <= self.max_bytes:
+                break
+            if directory == keep:
+                continue
+            try:
+                with _dataset_lock(directory, blocking=False):
+                    shutil.rmtree(directory, ignore_errors=True)
+            except BlockingIOError:
+                # Another process is building or extending it
+                continue
+            try:
+                os.rmdir(os.path.dirname(directory))
+            except OSError:
+                pass
+            total -= size
+            logging.debug("Evicted features in %s", directory)
+
+    def _build(self, path, df, source):
+        features = compute_features(df, self.spec)
+        raw = features.to_numpy(dtype=np.float32)
+        scaler = IncrementalMinMaxScaler()
+        scaler.partial_fit(raw)
+        # Replace rather than truncate files that readers may have memory-mapped
+        for file_name, values in (('raw.f32', raw), ('scaled.f32', scaler.transform(raw))):
+            tmp_path = os.path.join(path, file_name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(values.tobytes())
+            os.replace(tmp_path, os.path.join(path, file_name))
+        meta = {'version': self.version, 'spec': self.spec, 'columns': list(features.columns), 'rows': len(raw),
+                'source_hash': self._hash(source), 'scaler': scaler.to_dict()}
+        self._write_meta(path, meta)
+        logging.info("Computed %d rows of features in %s", len(raw), path)
+        return meta
+
+    def _append(self, path, meta, df, source):
+        old_rows = meta['rows']
+        start = max(old_rows - _warmup(self.spec), 0)
+        features = compute_features(df.iloc[start:], self.spec)
+        new_raw = features.to_numpy(dtype=np.float32)[old_rows - start:]
+        columns = len(meta['columns'])
+        raw_path = os.path.join(path, 'raw.f32')
+        scaled_path = os.path.join(path, 'scaled.f32')
+        # Drop anything written after the last committed meta, e.g. by an interrupted append
+        for file_path in (raw_path, scaled_path):
+            with open(file_path, 'r+b') as f:
+                f.truncate(old_rows * columns * 4)
+
+        scaler = IncrementalMinMaxScaler.from_dict(meta['scaler'])
+        with open(raw_path, 'ab') as f:
+            f.write(new_raw.tobytes())
+        if scaler.partial_fit(new_raw):
+            self._rescale(raw_path, scaled_path, old_rows + len(new_raw), columns, scaler)
+        else:
+            with open(scaled_path, 'ab') as f:
+                f.write(scaler.transform(new_raw).tobytes())
+
+        meta = dict(meta, rows=old_rows + len(new_raw), source_hash=self._hash(source), scaler=scaler.to_dict())
+        self._write_meta(path, meta)
+        logging.info("Appended %d rows of features to %s", len(new_raw), path)
+        return meta
+
+    @staticmethod
+    def _rescale(raw_path, scaled_path, rows, columns, scaler, chunk_rows=1 << 16):
+        raw = np.memmap(raw_path, dtype=np.float32, mode='r', shape=(rows, columns))
+        tmp_path = scaled_path + '.tmp'
+        scaled = np.memmap(tmp_path, dtype=np.float32, mode='w+', shape=(rows, columns))
+        for start in range(0, rows, chunk_rows):
+            scaled[start:start + chunk_rows] = scaler.transform(raw[start:start + chunk_rows])
+        scaled.flush()
+        del scaled
+        os.replace(tmp_path, scaled_path)
+
+    @staticmethod
+    def _source_values(df):
+        columns = [column for column in df.columns if column.lower() in ('timestamp', 'open', 'high', 'low', 'close', 'volume')]
+        return np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64))
+
+    @staticmethod
+    def _hash(values):
+        return hashlib.sha1(np.ascontiguousarray(values).tobytes()).hexdigest()
+
+    @staticmethod
+    def _dataset_key(df, source):
+        head = source[:1].tobytes() + ','.join(map(str, df.columns)).encode()
+        return hashlib.sha1(head).hexdigest()[:16]
+
+    @staticmethod
+    def _read_meta(path):
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_meta(path, meta):
+        tmp_path = os.path.join(path, 'meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(path, 'meta.json'))
+
+@contextlib.contextmanager
+def _dataset_lock(path, blocking=True):
+    """
+    Exclusive lock on one dataset directory, creating the directory if needed. Raises
+    BlockingIOError if blocking is False and another process holds it.
+    """
+    lock_path = os.path.join(path, 'lock')
+    while True:
+        os.makedirs(path, exist_ok=True)
+        f = open(lock_path, 'a')
+        if fcntl is None:
+            break
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            # Start over if the dataset was evicted while we waited
+            if os.stat(lock_path).st_ino == os.fstat(f.fileno()).st_ino:
+                break
+        except FileNotFoundError:
+            pass
+        except BaseException:
+            f.close()
+            raise
+        f.close()
+    try:
+        yield
+    finally:
+        f.close()
+
+_default_store = None
+
+def get_features(df, name=None):
+    """
+    Features for a DataFrame from the default store in FEATURE_STORE_DIR.
+    """
+    global _default_store
+    if _default_store is None:
+        _default_store = FeatureStore()
+    return _default_store.get(df, name)
+
+if __name__ == "__main__":
+    # Example: build features once, then extend them with new candles
+    import tempfile
+    rng = np.random.default_rng(0)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, 200000)))
+    candles = pd.DataFrame({'timestamp': np.arange(close.size) * 3600000, 'open': close, 'high': close * 1.001,
+                            'low': close * 0.999, 'close': close, 'volume': rng.uniform(1, 10, close.size)})
+    store = FeatureStore(tempfile.mkdtemp())
+
+    start = time.perf_counter()
+    features = store.get(candles.iloc[:-100])
+    logging.info("Initial build: %.3f s", time.perf_counter() - start)
+    start = time.perf_counter()
+    features = store.get(candles.iloc[:-100])
+    logging.info("Cached load: %.3f s", time.perf_counter() - start)
+    start = time.perf_counter()
+    features = store.get(candles)
+    logging.info("Append of 100 candles: %.3f s, %d rows", time.perf_counter() - start, len(features))
+
+    full = compute_features(candles).to_numpy(dtype=np.float32)
+    logging.info("Largest difference from a full recomputation: %g", np.nanmax(np.abs(np.asarray(features.raw) - full)))
+    X, y = features.windows(60)
+    logging.info("LSTM windows: X %s, y %s", X.shape, y.shape)
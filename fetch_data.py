@@ -8,6 +8,8 @@ import time
 from datetime import datetime
 from textblob import TextBlob
 from pandas_ta import sma, rsi, macd
+from sentiment_stream import sentiment_aggregator
+from ring_buffer import get_buffer, ohlcv_dtype
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -96,11 +98,14 @@ def get_tweets(query: str, count: int = 100):
     logging.info("Fetched %d tweets about %s", count, query)
     return tweets
 
-def analyze_sentiment(tweets: list):
+def analyze_sentiment(tweets: list, symbol: str = None):
     sentiments = []
     for tweet in tweets:
         analysis = TextBlob(tweet)
         sentiments.append(analysis.sentiment.polarity)
+    if symbol is not None:
+        # Feed the streaming aggregate that signal detection reads
+        sentiment_aggregator.update_many(symbol, sentiments)
     avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0
     logging.info("Average sentiment polarity: %.2f", avg_sentiment)
     return avg_sentiment
@@ -240,18 +245,21 @@ def perform_technical_analysis(df: pd.DataFrame, sma_lengths: tuple = (20, 50),
         logging.error("An error occurred during technical analysis: %s", e)
         raise e
 
-def detect_signals(df: pd.DataFrame, sma_lengths: tuple) -> None:
+def detect_signals(df: pd.DataFrame, sma_lengths: tuple, symbol: str = None) -> None:
     """
     Detect bullish or bearish signals in the OHLCV data.
     
     Args:
     - df: DataFrame containing OHLCV data
     - sma_lengths: Tuple containing lengths for SMAs
+    - symbol: Symbol whose streaming sentiment is reported alongside the signals (optional)
     """
     try:
         sma_short, sma_long = sma_lengths
-        latest = df.iloc[-1]
-        previous = df.iloc[-2]
+        # Structured record arrays (ring buffer windows) are indexed like rows
+        rows = df if isinstance(df, np.ndarray) else df.iloc
+        latest = rows[-1]
+        previous = rows[-2]
         
         # Example signal detection for SMA crossover
         if pd.notna(previous[f'SMA_{sma_short}']) and pd.notna(previous[f'SMA_{sma_long}']) and pd.notna(latest[f'SMA_{sma_short}']) and pd.notna(latest[f'SMA_{sma_long}']):
@@ -273,35 +281,117 @@ def detect_signals(df: pd.DataFrame, sma_lengths: tuple) -> None:
                 logging.info("Bullish MACD crossover detected")
             elif previous['MACD'] > previous['MACD_signal'] and latest['MACD'] < latest['MACD_signal']:
                 logging.info("Bearish MACD crossover detected")
+
+        # Streaming sentiment is a lock-free read and never waits on a sentiment source
+        if symbol is not None:
+            sentiment = sentiment_aggregator.snapshot(symbol)
+            if sentiment is not None and sentiment['count'] >= 1:
+                logging.info("Sentiment for %s: %.2f (std %.2f, %.1f recent scores)", symbol, sentiment['mean'], sentiment['std'], sentiment['count'])
         
     except Exception as e:
         logging.error("An error occurred during signal detection: %s", e)
         raise e
 
-def fetch_real_time_data(exchange: ccxt.Exchange, symbol: str, timeframe: str = '1m', limit: int = 100):
+def live_indicator_dtype(sma_lengths: tuple = (20, 50)) -> np.dtype:
+    """
+    Ring buffer record layout for the live loop: OHLCV, the indicators detect_signals reads and
+    the smoothing state RSI and MACD carry from bar to bar.
+    """
+    return ohlcv_dtype(*[f'SMA_{length}' for length in sma_lengths], 'RSI', 'MACD', 'MACD_signal',
+                       'avg_gain', 'avg_loss', 'ema_fast', 'ema_slow')
+
+def _ema(previous_ema, values, length):
+    # Exponential moving average of the newest value, seeded with the SMA of the first `length` values
+    if np.isfinite(previous_ema):
+        return previous_ema + 2.0 / (length + 1) * (values[-1] - previous_ema)
+    if len(values) >= length and np.isfinite(values[-length:]).all():
+        return values[-length:].mean()
+    return np.nan
+
+def update_live_indicators(buffer, sma_lengths: tuple = (20, 50), rsi_length: int = 14, macd_params: tuple = (12, 26, 9)):
+    """
+    Compute the indicators of the newest bar in a live ring buffer in place.
+
+    SMAs are means over a window view; RSI (Wilder smoothing) and MACD (EMAs) continue from the
+    state stored in the previous bar, so every call is O(1) and can be repeated while the bar is
+    still forming.
+
+    Args:
+    - buffer: RingBuffer with live_indicator_dtype(sma_lengths) records
+    - sma_lengths, rsi_length, macd_params: As for perform_technical_analysis
+    """
+    macd_fast, macd_slow, macd_signal = macd_params
+    window = buffer.window(max(max(sma_lengths), rsi_length + 1, macd_slow, macd_signal))
+    closes = window['close']
+    close = closes[-1]
+    for length in sma_lengths:
+        buffer.set_last(f'SMA_{length}', closes[-length:].mean() if len(closes) >= length else np.nan)
+
+    avg_gain = avg_loss = rsi_value = ema_fast = ema_slow = np.nan
+    if len(window) > 1:
+        previous = window[-2]
+        change = close - previous['close']
+        if np.isfinite(previous['avg_gain']):
+            avg_gain = (previous['avg_gain'] * (rsi_length - 1) + max(change, 0.0)) / rsi_length
+            avg_loss = (previous['avg_loss'] * (rsi_length - 1) + max(-change, 0.0)) / rsi_length
+        elif len(closes) > rsi_length:
+            changes = np.diff(closes[-rsi_length - 1:])
+            avg_gain = changes[changes > 0].sum() / rsi_length
+            avg_loss = -changes[changes < 0].sum() / rsi_length
+        if np.isfinite(avg_gain):
+            rsi_value = 100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        ema_fast = _ema(previous['ema_fast'], closes, macd_fast)
+        ema_slow = _ema(previous['ema_slow'], closes, macd_slow)
+        signal_state = previous['MACD_signal']
+    else:
+        signal_state = np.nan
+    for field, value in (('avg_gain', avg_gain), ('avg_loss', avg_loss), ('RSI', rsi_value),
+                         ('ema_fast', ema_fast), ('ema_slow', ema_slow), ('MACD', ema_fast - ema_slow)):
+        buffer.set_last(field, value)
+    buffer.set_last('MACD_signal', _ema(signal_state, window['MACD'], macd_signal))
+
+def fetch_real_time_data(exchange: ccxt.Exchange, symbol: str, timeframe: str = '1m', limit: int = 100,
+                         sma_lengths: tuple = (20, 50), interval: float = 60, capacity: int = 1000):
     """
     Fetch real-time OHLCV data for a symbol from the exchange.
     Continuously fetches new data points.
+
+    Candles are kept in a preallocated ring buffer per symbol and timeframe: after the initial
+    fetch only candles since the newest stored bar are requested, merged in place, and their
+    indicators are updated incrementally, so the loop builds no DataFrames.
     
     Args:
     - exchange: ccxt.Exchange object
     - symbol: Trading pair symbol (e.g., 'BTC/USDT')
     - timeframe: Timeframe for OHLCV data (default: '1m')
     - limit: Number of data points to initially fetch (default: 100)
+    - sma_lengths: Lengths of the short and long SMAs (default: (20, 50))
+    - interval: Seconds between polls (default: 60)
+    - capacity: Bars kept in the ring buffer (default: 1000)
     """
     try:
+        buffer = get_buffer(symbol, timeframe, max(capacity, limit), live_indicator_dtype(sma_lengths))
+        params = {'recvWindow': 10000}
         while True:
-            # Fetch new data points
-            new_df = fetch_historical_data(exchange, symbol, timeframe, limit)
-            
-            # Perform technical analysis on new data
-            new_df = perform_technical_analysis(new_df)
-            
-            # Print or process new data as needed
-            print(new_df.tail())  # Example: print last few rows of new data
+            # Fetch new data points: the history once, then from the forming bar onwards
+            last = buffer.last()
+            if last is None:
+                ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit, params=params)
+            else:
+                ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=int(last['timestamp']), params=params)
+
+            # Merge into the buffer and update the indicators of changed bars
+            for candle in ohlcv:
+                if buffer.update(candle[:6]) != 'stale':
+                    update_live_indicators(buffer, sma_lengths)
+
+            if len(buffer) > 1:
+                detect_signals(buffer.window(2), sma_lengths, symbol)
+                newest = buffer.last()
+                logging.info("%s close %.2f, RSI %.1f, MACD %.2f", symbol, newest['close'], newest['RSI'], newest['MACD'])
             
             # Sleep for a minute (or desired interval)
-            time.sleep(60)  # Sleep for 60 seconds (1 minute)
+            time.sleep(interval)
             
     except ccxt.NetworkError as net_error:
         logging.error("A network error occurred: %s", net_error)
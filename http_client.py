@@ -0,0 +1,309 @@
+import asyncio
+import atexit
+import json
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import aiohttp
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class HTTPStatusError(Exception):
+    """
+    Raised for a response with an error status that was not retried or ran out of retries.
+    """
+    def __init__(self, status, url, body=b''):
+        super().__init__(f"HTTP {status} from {url}")
+        self.status = status
+        self.url = url
+        self.body = body
+
+class CircuitOpenError(Exception):
+    """
+    Raised without a request being made while a host's circuit breaker is open.
+    """
+
+class HTTPResponse:
+    """
+    Fully read response, so it can be handed across threads after the connection is released.
+    """
+    def __init__(self, status, headers, body, url):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+
+    def text(self, encoding='utf-8'):
+        return self.body.decode(encoding, errors='replace')
+
+    def json(self):
+        return json.loads(self.body)
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After failure_threshold consecutive failures the circuit opens and calls fail immediately for
+    reset_timeout seconds. After that, a single trial call is let through (half-open): success
+    closes the circuit, failure opens it again.
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        state = self.state
+        if state == 'closed':
+            return True
+        if state == 'half_open' and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """
+        End a call without a verdict on the host, e.g. when it was cancelled, so a half-open
+        circuit lets the next trial through.
+        """
+        self._trial_in_flight = False
+
+class AsyncHTTPClient:
+    """
+    Shared aiohttp client with a keep-alive connection pool, timeouts, retries with exponential
+    backoff and full jitter, and a circuit breaker per host.
+
+    Connection errors, timeouts and 429/5xx responses are retried; a Retry-After header is honoured.
+    The session is created lazily on the event loop that first uses the client.
+
+    Parameters:
+    - timeout (float): Total seconds allowed for one attempt.
+    - connect_timeout (float): Seconds allowed to establish a connection.
+    - max_retries (int): Retries after the first attempt.
+    - backoff (float): Base delay in seconds; attempt n waits up to backoff * 2 ** n.
+    - max_backoff (float): Upper bound of a single delay.
+    - limit (int): Maximum open connections in the pool.
+    - limit_per_host (int): Maximum open connections per host.
+    - failure_threshold (int): Consecutive failures that open a host's circuit.
+    - reset_timeout (float): Seconds a circuit stays open before a trial request.
+    """
+
+    def __init__(self, timeout=10.0, connect_timeout=3.0, max_retries=3, backoff=0.5, max_backoff=10.0,
+                 limit=100, limit_per_host=20, failure_threshold=5, reset_timeout=30.0):
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers = {}
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                             ttl_dns_cache=300, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    def breaker(self, url):
+        host = urlsplit(url).netloc
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def _delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def request(self, method, url, max_retries=None, **kwargs):
+        """
+        Send a request and return the fully read HTTPResponse.
+
+        Parameters:
+        - method (str): HTTP method.
+        - url (str): Request URL.
+        - max_retries (int): Override the client's retry count for this call.
+        - kwargs: Passed to aiohttp, e.g. json, data, params, headers.
+
+        Raises:
+        - CircuitOpenError: The host's circuit is open.
+        - HTTPStatusError: Error status that was not retried or kept failing.
+        - aiohttp.ClientError / asyncio.TimeoutError: Network failure on the last attempt.
+        """
+        breaker = self.breaker(url)
+        retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}")
+            retry_after = None
+            try:
+                async with self._get_session().request(method, url, **kwargs) as response:
+                    body = await response.read()
+                    if response.status < 400:
+                        breaker.record_success()
+                        return HTTPResponse(response.status, dict(response.headers), body, url)
+                    error = HTTPStatusError(response.status, url, body)
+                    retry_after = response.headers.get('Retry-After')
+                if error.status not in RETRY_STATUSES:
+                    # The service answered; a client error says nothing about its health
+                    breaker.record_success()
+                    raise error
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+            except BaseException:
+                # Cancelled (e.g. by a deadline) or failed outside the request itself
+                breaker.release()
+                raise
+            breaker.record_failure()
+            if attempt >= retries or breaker.state == 'open':
+                raise error
+            delay = self._delay(attempt, retry_after)
+            logging.warning("%s %s failed (%s), retrying in %.2f s", method, url, str(error) or type(error).__name__, delay)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+_loop = None
+_client = None
+_loop_lock = threading.Lock()
+
+def _background_loop():
+    global _loop, _client
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _client = AsyncHTTPClient()
+            threading.Thread(target=_loop.run_forever, name='http-client', daemon=True).start()
+            atexit.register(_close_client)
+    return _loop
+
+def _close_client():
+    try:
+        asyncio.run_coroutine_threadsafe(_client.close(), _loop).result(2)
+    except Exception as e:
+        logging.warning("Failed to close the HTTP client: %s", e)
+
+def get_http_client():
+    """
+    The shared AsyncHTTPClient, which runs on a background event loop thread.
+    """
+    _background_loop()
+    return _client
+
+def submit_request(method, url, **kwargs):
+    """
+    Schedule a request on the background loop without waiting for it.
+
+    Returns:
+    - concurrent.futures.Future: Resolves to an HTTPResponse or raises the request's error.
+    """
+    return asyncio.run_coroutine_threadsafe(get_http_client().request(method, url, **kwargs), _background_loop())
+
+def request(method, url, deadline=None, **kwargs):
+    """
+    Send a request through the shared client and wait for the response from synchronous code.
+
+    Parameters:
+    - deadline (float): Maximum seconds to wait in total, including retries. The request is
+      cancelled when it expires and concurrent.futures.TimeoutError is raised.
+    """
+    future = submit_request(method, url, **kwargs)
+    try:
+        return future.result(deadline)
+    except Exception:
+        future.cancel()
+        raise
+
+def post_in_background(url, description='request', **kwargs):
+    """
+    Fire-and-forget POST; failures are logged instead of raised.
+    """
+    future = submit_request('POST', url, **kwargs)
+
+    def log_result(done):
+        if done.cancelled():
+            return
+        error = done.exception()
+        if error is not None:
+            logging.error("Failed to send %s: %s", description, error)
+        else:
+            logging.info("%s sent successfully.", description[:1].upper() + description[1:])
+
+    future.add_done_callback(log_result)
+    return future
+
+if __name__ == "__main__":
+    # Example: a local server that fails twice, then answers, then goes down and trips the breaker
+    from aiohttp import web
+
+    calls = {'count': 0}
+
+    async def flaky(request):
+        calls['count'] += 1
+        if calls['count'] <= 2:
+            return web.Response(status=503)
+        return web.json_response({'score': 0.42})
+
+    async def run_example():
+        app = web.Application()
+        app.router.add_get('/sentiment', flaky)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 8765)
+        await site.start()
+        client = AsyncHTTPClient(backoff=0.05, failure_threshold=3, reset_timeout=1.0)
+        response = await client.get('http://127.0.0.1:8765/sentiment')
+        logging.info("Got %s after %d calls", response.json(), calls['count'])
+        await runner.cleanup()
+        for _ in range(2):
+            try:
+                await client.get('http://127.0.0.1:8765/sentiment', max_retries=1)
+            except (aiohttp.ClientError, CircuitOpenError) as e:
+                logging.info("Server down: %s (%s), breaker %s", type(e).__name__, e, client.breaker('http://127.0.0.1:8765').state)
+        await client.close()
+
+    asyncio.run(run_example())
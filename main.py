@@ -8,9 +8,14 @@ from database import create_connection, create_tables, insert_trade, get_all_tra
 from database import init_db, create_db_connection, fetch_historical_data, close_db_connection
 from fetch_data import main as fetch_data_main, get_historical_data, get_tweets, analyze_sentiment
 from risk_management import adjust_stop_loss_take_profit, calculate_stop_loss, calculate_take_profit, calculate_technical_indicators, detect_patterns, place_order_with_risk_management
-from trading_strategy import build_and_train_model, predict_prices, train_rl_model, rl_trading_decision
+from trading_strategy import predict_prices, train_rl_model, rl_trading_decision
 from portfolio_management import calculate_returns, optimize_portfolio
 from tokenizer_utils import load_tokenizer_from_json
+from mock_exchange import mock_exchange_from_env
+from feature_store import get_features
+from model_retraining import LSTM_NUMPY_PATH, ModelHandle, start_background_retraining
+from order_router import bar_intent_id, route_order
+from market_data_bus import shared_ohlcv
 tokenizer_json = """ ... your JSON string ... """
 tokenizer = load_tokenizer_from_json(tokenizer_json)
 # Use tokenizer as needed
@@ -43,6 +48,10 @@ def load_api_credentials():
 
 # Initialize Exchange
 def initialize_exchange(api_key, api_secret):
+    mock_exchange = mock_exchange_from_env()
+    if mock_exchange is not None:
+        return mock_exchange
+
     exchange = ccxt.bybit({
         'apiKey': api_key,
         'secret': api_secret,
@@ -55,6 +64,10 @@ def initialize_exchange(api_key, api_secret):
 @retry(stop_max_attempt_number=3, wait_fixed=2000)
 def fetch_ohlcv_with_retry(exchange, symbol, timeframe='1h', limit=500):
     try:
+        # Candles from a running market data publisher cost no API weight
+        df = shared_ohlcv(symbol, timeframe, limit)
+        if df is not None:
+            return df
         ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
         df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
@@ -108,14 +121,14 @@ def get_data_for_backtesting():
         return data
 
 # Execute Trade
-def execute_trade(exchange, symbol, signal, amount=1):
+def execute_trade(exchange, symbol, signal, amount=1, intent_id=None):
     try:
         if signal == 'buy':
             logging.info("Executing Buy Order")
-            exchange.create_market_buy_order(symbol, amount)
+            route_order(exchange, symbol, 'buy', amount, intent_id=intent_id)
         elif signal == 'sell':
             logging.info("Executing Sell Order")
-            exchange.create_market_sell_order(symbol, amount)
+            route_order(exchange, symbol, 'sell', amount, intent_id=intent_id)
     except ccxt.BaseError as e:
         logging.error(f"Error executing {signal} order: %s", e)
         raise e
@@ -135,14 +148,14 @@ def perform_backtesting(exchange):
             return
 
 # Execute Trading Decision
-def execute_trading_decision(exchange, symbol, decision, amount=1):
+def execute_trading_decision(exchange, symbol, decision, amount=1, intent_id=None):
     try:
         if decision == 'buy':
             logging.info("Executing Buy Decision")
-            execute_trade(exchange, symbol, 'buy', amount)
+            execute_trade(exchange, symbol, 'buy', amount, intent_id=intent_id)
         elif decision == 'sell':
             logging.info("Executing Sell Decision")
-            execute_trade(exchange, symbol, 'sell', amount)
+            execute_trade(exchange, symbol, 'sell', amount, intent_id=intent_id)
         else:
             logging.info("Holding Position")
     except Exception as e:
@@ -204,8 +217,15 @@ def main():
     # Fetch historical data
     df = get_historical_data('historical_data.csv')
 
-    # Build and train predictive model
-    model, scaler = build_and_train_model(df)
+    # Fine-tune the predictive model on new candles in the background; until the new checkpoint
+    # is swapped in, predictions come from the previous one
+    model = ModelHandle(LSTM_NUMPY_PATH)
+    retraining = start_background_retraining(df)
+    if not model.available():
+        # First run: there is no previous model to serve, so wait for the initial training
+        retraining.join()
+        model.refresh()
+    scaler = get_features(df).target_scaler()
 
     # Predict prices
     predicted_prices = predict_prices(model, scaler, df)
@@ -223,7 +243,7 @@ def main():
     print(f"Optimal asset allocation: {optimal_weights}")
 
     # Make trading decisions
-    obs = df.iloc[-1].values  # Current observation
+    obs = get_features(df).scaled[-1]  # Current observation, scaled as in training
     rl_action = rl_trading_decision(rl_model, obs)
 
     if sentiment_score > 0.1:
@@ -233,8 +253,9 @@ def main():
     else:
         decision = 'hold'
 
-    # Execute trading decision
-    execute_trading_decision(exchange, symbol, decision)
+    # Execute trading decision, keyed by the latest candle so a rerun does not trade it twice
+    last_bar = df['timestamp'].iloc[-1] if 'timestamp' in df else df.index[-1]
+    execute_trading_decision(exchange, symbol, decision, intent_id=bar_intent_id(last_bar))
 
 if __name__ == '__main__':
     database_file = 'trading_bot.db'
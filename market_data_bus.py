@@ -0,0 +1,354 @@
+import atexit
+import logging
+import os
+import re
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+import ccxt
+import numpy as np
+import pandas as pd
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+MARKET_DATA_BUS_PREFIX = os.getenv('MARKET_DATA_BUS_PREFIX', 'mdbus')
+_MAGIC = 0x4D44425553000001
+
+HEADER = np.dtype([('magic', '<u8'), ('seq', '<i8'), ('count', '<i8'), ('capacity', '<i8'), ('heartbeat', '<i8'),
+                   ('kind', '<i8'), ('reserved', '<i8', (2,))])
+CANDLE = np.dtype([('timestamp', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+                   ('volume', '<f8')])
+TICKER = np.dtype([('timestamp', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'), ('volume', '<f8')])
+KINDS = {'candles': (1, CANDLE), 'tickers': (2, TICKER)}
+
+def channel_name(kind, symbol, timeframe=None, prefix=MARKET_DATA_BUS_PREFIX):
+    """
+    Shared memory name of a channel; 'BTC/USDT', 'BTC/USDT:USDT' and 'BTCUSDT' share one.
+    """
+    key = re.sub(r'[^A-Za-z0-9]', '', symbol.split(':')[0]).upper()
+    return f"{prefix}_{kind}_{key}" + (f"_{timeframe}" if timeframe else '')
+
+class RingChannel:
+    """
+    Fixed-capacity ring of candle or ticker records in shared memory, with one writer process
+    and any number of reader processes.
+
+    The segment starts with a HEADER (sequence counter, record count, capacity, heartbeat) and
+    holds every record twice, at slot i and i + capacity, so the newest n records are always
+    one contiguous slice that readers can use as a NumPy view without copying.
+
+    Consistency uses a seqlock: the writer makes the sequence counter odd before changing any
+    record and even again afterwards. Readers never block the writer; they note the (even)
+    counter, read, and check that it has not moved. This relies on aligned 8-byte stores being
+    atomic and stores becoming visible in program order, as on x86-64.
+
+    Parameters:
+    - name (str): Shared memory name, see channel_name().
+    - kind (str): 'candles' or 'tickers' (used when creating).
+    - capacity (int): Records kept (used when creating).
+    - create (bool): Create the segment as the writer instead of attaching as a reader.
+    """
+
+    def __init__(self, name, kind='candles', capacity=2000, create=False):
+        self.name = name
+        self.writer = create
+        if create:
+            code, dtype = KINDS[kind]
+            size = HEADER.itemsize + 2 * capacity * dtype.itemsize
+            try:
+                self._shm = shared_memory.SharedMemory(name, create=True, size=size)
+            except FileExistsError:
+                # Left over by a publisher that did not shut down cleanly
+                stale = shared_memory.SharedMemory(name)
+                # Clear its magic so readers still mapped to it reattach
+                stale.buf[:8] = bytes(8)
+                stale.close()
+                stale.unlink()
+                self._shm = shared_memory.SharedMemory(name, create=True, size=size)
+            self.header = np.ndarray((), HEADER, buffer=self._shm.buf)
+            self.header[()] = (_MAGIC, 0, 0, capacity, 0, code, (0, 0))
+        else:
+            self._shm = _attach(name)
+            self.header = np.ndarray((), HEADER, buffer=self._shm.buf)
+            if int(self.header['magic']) != _MAGIC:
+                self._shm.close()
+                raise ValueError(f"{name} is not a market data channel")
+        self.capacity = int(self.header['capacity'])
+        self.kind, self.dtype = next((kind, dtype) for kind, (code, dtype) in KINDS.items() if code == int(self.header['kind']))
+        self.records = np.ndarray((2 * self.capacity,), self.dtype, buffer=self._shm.buf, offset=HEADER.itemsize)
+        if not create:
+            self.records.flags.writeable = False
+            self.header.flags.writeable = False
+
+    # Writer side
+
+    def extend(self, records):
+        """
+        Append records (a structured array of the channel's dtype or a list of tuples).
+        """
+        records = np.asarray(records, dtype=self.dtype)
+        if not len(records):
+            return
+        # Only the last capacity records are kept, but all of them are counted
+        tail = records[-self.capacity:]
+        count = int(self.header['count'])
+        slots = (count + len(records) - len(tail) + np.arange(len(tail))) % self.capacity
+        self.header['seq'] += 1
+        self.records[slots] = tail
+        self.records[slots + self.capacity] = tail
+        self.header['count'] = count + len(records)
+        self.header['heartbeat'] = int(time.time() * 1000)
+        self.header['seq'] += 1
+
+    def append(self, record):
+        self.extend([tuple(record)])
+
+    def update_last(self, record):
+        """
+        Overwrite the newest record, e.g. with the latest state of the forming candle.
+        """
+        count = int(self.header['count'])
+        if count == 0:
+            return self.append(record)
+        slot = (count - 1) % self.capacity
+        self.header['seq'] += 1
+        self.records[slot] = self.records[slot + self.capacity] = tuple(record)
+        self.header['heartbeat'] = int(time.time() * 1000)
+        self.header['seq'] += 1
+
+    def touch(self):
+        self.header['heartbeat'] = int(time.time() * 1000)
+
+    # Reader side
+
+    def __len__(self):
+        return min(int(self.header['count']), self.capacity)
+
+    def age(self):
+        """
+        Seconds since the writer last published or touched the channel.
+        """
+        return time.time() - int(self.header['heartbeat']) / 1000.0
+
+    def _begin_read(self):
+        while True:
+            seq = int(self.header['seq'])
+            if seq % 2 == 0:
+                return seq
+            time.sleep(0)
+
+    def window(self, n=None):
+        """
+        Zero-copy view of the newest n records (all of them by default), oldest first.
+
+        Returns:
+        - tuple: (seq, view). The view may change under the reader; use it, then call
+          consistent(seq) and retry if it returns False, or use snapshot() for a copy.
+        """
+        seq = self._begin_read()
+        count = int(self.header['count'])
+        n = min(count, self.capacity) if n is None else min(n, count, self.capacity)
+        end = (count - 1) % self.capacity + self.capacity + 1 if count else 0
+        return seq, self.records[end - n:end]
+
+    def consistent(self, seq):
+        """
+        True if nothing was written since window() returned seq.
+        """
+        return int(self.header['seq']) == seq
+
+    def snapshot(self, n=None):
+        """
+        Consistent copy of the newest n records.
+        """
+        while True:
+            seq, view = self.window(n)
+            copy = view.copy()
+            if self.consistent(seq):
+                return copy
+
+    def latest(self):
+        records = self.snapshot(1)
+        return records[0] if len(records) else None
+
+    def close(self):
+        self.header = self.records = None
+        self._shm.close()
+
+    def unlink(self):
+        self._shm.unlink()
+
+def _attach(name):
+    # Readers must not register the writer's segment with the resource tracker, which would
+    # unlink it when they exit (Python < 3.13 has no track=False)
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name)
+        finally:
+            resource_tracker.register = register
+
+class MarketDataPublisher:
+    """
+    The one process that talks to the exchange for market data.
+
+    Candles for every symbol/timeframe and tickers for every symbol are published into
+    RingChannels. Tickers come from one bulk fetch_tickers call per poll; candles are fetched
+    from the last published bar onwards, which updates the forming bar in place and appends
+    closed ones.
+
+    Parameters:
+    - exchange (ccxt.Exchange): Exchange to poll.
+    - symbols (list): Symbols to publish.
+    - timeframes (tuple): Candle timeframes to publish.
+    - capacity (int): Records kept per channel.
+    - prefix (str): Channel name prefix, to run several buses side by side.
+    """
+
+    def __init__(self, exchange, symbols, timeframes=('1m',), capacity=2000, prefix=MARKET_DATA_BUS_PREFIX):
+        self.exchange = exchange
+        self.symbols = list(symbols)
+        self.timeframes = tuple(timeframes)
+        self.candles = {(symbol, timeframe): RingChannel(channel_name('candles', symbol, timeframe, prefix), 'candles', capacity, create=True)
+                        for symbol in self.symbols for timeframe in self.timeframes}
+        self.tickers = {symbol: RingChannel(channel_name('tickers', symbol, prefix=prefix), 'tickers', capacity, create=True)
+                        for symbol in self.symbols}
+        self._last_timestamp = {}
+        self._closed = False
+        atexit.register(self.close)
+
+    def poll(self):
+        """
+        Fetch and publish one round of tickers and candles.
+        """
+        tickers = self.exchange.fetch_tickers(self.symbols)
+        for symbol, channel in self.tickers.items():
+            ticker = tickers.get(symbol)
+            if ticker:
+                channel.append((ticker.get('timestamp') or self.exchange.milliseconds(), ticker.get('bid') or np.nan,
+                                ticker.get('ask') or np.nan, ticker.get('last') or np.nan, ticker.get('baseVolume') or np.nan))
+            else:
+                channel.touch()
+
+        for (symbol, timeframe), channel in self.candles.items():
+            since = self._last_timestamp.get((symbol, timeframe))
+            limit = None if since is not None else min(channel.capacity, 1000)
+            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+            if not ohlcv:
+                channel.touch()
+                continue
+            records = np.array([tuple(candle[:6]) for candle in ohlcv], dtype=CANDLE)
+            if since is not None:
+                if records['timestamp'][0] == since:
+                    channel.update_last(records[0])
+                records = records[records['timestamp'] > since]
+            channel.extend(records)
+            self._last_timestamp[(symbol, timeframe)] = int(records['timestamp'][-1]) if len(records) else since
+
+    def run(self, interval=5.0, stop_event=None):
+        """
+        Poll every interval seconds until stop_event is set. Exchange errors are logged and
+        retried on the next round.
+        """
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            try:
+                self.poll()
+            except (ccxt.NetworkError, ccxt.ExchangeError) as e:
+                logging.error("Market data poll failed: %s", e)
+            stop_event.wait(interval)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for channel in list(self.candles.values()) + list(self.tickers.values()):
+            # Readers still mapped to the segment see it retired and reattach
+            channel.header['magic'] = 0
+            channel.close()
+            try:
+                channel.unlink()
+            except FileNotFoundError:
+                pass
+
+# Channels attached by this process, by name
+_channels = {}
+
+def _valid(channel, max_age):
+    return (int(channel.header['magic']) == _MAGIC and int(channel.header['capacity']) == channel.capacity
+            and (max_age is None or channel.age() <= max_age))
+
+def open_channel(kind, symbol, timeframe=None, prefix=MARKET_DATA_BUS_PREFIX, max_age=None):
+    """
+    Attach to a published channel, or return None if no publisher has created it.
+
+    A restarted publisher recreates its segments under the same names while this process
+    stays mapped to the old ones, so a cached channel that was retired (its magic cleared),
+    changed capacity or is older than max_age seconds is dropped and attached again.
+    """
+    name = channel_name(kind, symbol, timeframe, prefix)
+    channel = _channels.get(name)
+    if channel is not None and _valid(channel, max_age):
+        return channel
+    if channel is not None:
+        del _channels[name]
+        try:
+            channel.close()
+        except BufferError:
+            # A caller still holds a view; the mapping goes away with it
+            pass
+    try:
+        channel = _channels[name] = RingChannel(name)
+    except (FileNotFoundError, ValueError):
+        return None
+    return channel
+
+def shared_ohlcv(symbol, timeframe='1h', limit=None, max_age=60.0, prefix=MARKET_DATA_BUS_PREFIX):
+    """
+    OHLCV DataFrame (timestamp, open, high, low, close, volume) from the market data bus.
+
+    Returns None when there is no live publisher for the symbol and timeframe, or it holds
+    fewer than limit candles, so callers can fall back to the exchange.
+    """
+    channel = open_channel('candles', symbol, timeframe, prefix, max_age)
+    if channel is None or channel.age() > max_age or len(channel) < (limit or 1):
+        return None
+    records = channel.snapshot(limit or None)
+    df = pd.DataFrame({name: records[name] for name in CANDLE.names})
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
+
+def _example_reader(symbol):
+    channel = open_channel('candles', symbol, '1h')
+    for _ in range(5):
+        seq, view = channel.window(200)
+        sma = view['close'].mean()
+        if channel.consistent(seq):
+            logging.info("Reader %d: %s SMA(200) %.2f over %d bars", os.getpid(), symbol, sma, len(view))
+        time.sleep(0.2)
+
+if __name__ == "__main__":
+    # Example: publish mock market data and read it from two strategy processes
+    import multiprocessing
+    from mock_exchange import MockExchange
+
+    exchange = MockExchange(seed=1)
+    exchange.add_symbol('BTC/USDT')
+    exchange.rewind(500)
+    publisher = MarketDataPublisher(exchange, ['BTC/USDT'], timeframes=('1h',))
+    publisher.poll()
+    readers = [multiprocessing.Process(target=_example_reader, args=('BTC/USDT',)) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    for _ in range(10):
+        exchange.advance()
+        publisher.poll()
+        time.sleep(0.1)
+    for reader in readers:
+        reader.join()
+    logging.info("Shared frame tail:\n%s", shared_ohlcv('BTC/USDT', '1h', limit=3))
+    publisher.close()
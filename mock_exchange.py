@@ -0,0 +1,442 @@
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+import ccxt
+import numpy as np
+import pandas as pd
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+def generate_synthetic_candles(n=1000, start_price=30000.0, timeframe='1h', volatility=0.01, since=None, seed=None):
+    """
+    Generate a geometric random walk of OHLCV candles.
+
+    Parameters:
+    - n (int): Number of candles to generate.
+    - start_price (float): Open price of the first candle.
+    - timeframe (str): ccxt timeframe string used to space the timestamps.
+    - volatility (float): Standard deviation of the per-candle log return.
+    - since (int, optional): Timestamp in milliseconds of the first candle.
+    - seed (int, optional): Seed for reproducible candles.
+
+    Returns:
+    - np.ndarray: Array of shape (n, 6) laid out like ccxt's fetch_ohlcv output.
+    """
+    rng = np.random.default_rng(seed)
+    step_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+    if since is None:
+        since = (int(time.time() * 1000) // step_ms - n) * step_ms
+
+    log_returns = rng.normal(0.0, volatility, n)
+    close = start_price * np.exp(np.cumsum(log_returns))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    wick = np.abs(rng.normal(0.0, volatility / 2, (2, n)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    volume = rng.lognormal(mean=3.0, sigma=0.5, size=n)
+    timestamp = since + step_ms * np.arange(n)
+
+    return np.column_stack([timestamp, open_, high, low, close, volume])
+
+def load_candles(source):
+    """
+    Load recorded candles from a CSV path, DataFrame or list of ccxt OHLCV rows.
+    """
+    if isinstance(source, str):
+        source = pd.read_csv(source)
+    if isinstance(source, pd.DataFrame):
+        df = source.copy()
+        df.columns = [str(column).lower() for column in df.columns]
+        if not np.issubdtype(df['timestamp'].dtype, np.number):
+            df['timestamp'] = pd.to_datetime(df['timestamp']).astype('int64') // 10**6
+        return df[OHLCV_COLUMNS].to_numpy(dtype=float)
+    return np.asarray(source, dtype=float)
+
+class MockExchange:
+    """
+    In-process stand-in for a ccxt exchange.
+
+    Speaks the subset of the ccxt unified API the bot uses (fetch_ohlcv, fetch_ticker,
+    fetch_balance, create_order, fetch_positions, set_leverage and friends), replays
+    recorded or synthetic candles and injects configurable latency, rate limits and errors.
+    ack_loss_rate makes create_order time out after the order was accepted, the case that
+    double-fills a naive retry.
+    Candles are replayed through a cursor that only moves when advance() is called, so
+    tests and benchmarks see a deterministic market.
+    """
+
+    def __init__(self, candles=None, timeframe='1h', balance=None, latency=0.0, latency_jitter=0.0,
+                 rate_limit=None, error_rate=0.0, ack_loss_rate=0.0, fee=0.0006, max_leverage=100, history=1000, seed=None):
+        self.id = 'mock'
+        self.timeframe = timeframe
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.ack_loss_rate = ack_loss_rate
+        self.fee = fee
+        self.max_leverage = max_leverage
+        self.history = history
+        self.seed = seed
+        self.markets = {}
+        self.leverage = {}
+        self.positions = {}
+        self.orders = {}
+        self.calls = {}
+        self.balance = {'USDT': 10000.0} if balance is None else dict(balance)
+        self._candles = {}
+        self._cursor = {}
+        self._order_seq = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_calls = 0
+
+        if candles is not None:
+            if isinstance(candles, dict):
+                for symbol, source in candles.items():
+                    self.add_symbol(symbol, source)
+            else:
+                self.add_symbol('BTCUSDT', candles)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build a mock exchange from MOCK_EXCHANGE_* environment variables.
+        """
+        candles = os.getenv('MOCK_EXCHANGE_CANDLES')
+        rate_limit = os.getenv('MOCK_EXCHANGE_RATE_LIMIT')
+        seed = os.getenv('MOCK_EXCHANGE_SEED')
+        return cls(
+            candles=load_candles(candles) if candles else None,
+            timeframe=os.getenv('MOCK_EXCHANGE_TIMEFRAME', '1h'),
+            latency=float(os.getenv('MOCK_EXCHANGE_LATENCY_MS', 0)) / 1000,
+            latency_jitter=float(os.getenv('MOCK_EXCHANGE_JITTER_MS', 0)) / 1000,
+            rate_limit=float(rate_limit) if rate_limit else None,
+            error_rate=float(os.getenv('MOCK_EXCHANGE_ERROR_RATE', 0)),
+            seed=int(seed) if seed else None,
+        )
+
+    def add_symbol(self, symbol, candles=None):
+        """
+        Register a symbol, replaying the given candles or a seeded synthetic series.
+        """
+        if candles is None:
+            symbol_seed = zlib.crc32(symbol.encode()) if self.seed is None else self.seed + zlib.crc32(symbol.encode())
+            data = generate_synthetic_candles(self.history, timeframe=self.timeframe, seed=symbol_seed)
+        else:
+            data = load_candles(candles)
+        self._candles[symbol] = data
+        self._cursor[symbol] = len(data) - 1
+        base = symbol.split('/')[0].replace('USDT', '') or symbol
+        self.markets[symbol] = {
+            'id': symbol.replace('/', '').split(':')[0],
+            'symbol': symbol,
+            'base': base,
+            'quote': 'USDT',
+            'limits': {'leverage': {'min': 1, 'max': self.max_leverage}},
+        }
+        return data
+
+    def advance(self, symbol=None, steps=1):
+        """
+        Move the replay cursor forward and fill any resting limit orders that were crossed.
+        Returns False once the recorded candles are exhausted.
+        """
+        symbols = [symbol] if symbol else list(self._candles)
+        progressed = False
+        for sym in symbols:
+            last_index = len(self._candles[sym]) - 1
+            new_cursor = min(self._cursor[sym] + steps, last_index)
+            progressed = progressed or new_cursor != self._cursor[sym]
+            self._cursor[sym] = new_cursor
+            self._match_resting_orders(sym)
+        return progressed
+
+    def rewind(self, index=0):
+        """
+        Reset every symbol's replay cursor to the given candle index.
+        """
+        for symbol in self._cursor:
+            self._cursor[symbol] = index
+
+    def milliseconds(self):
+        return int(time.time() * 1000)
+
+    def load_markets(self, reload=False, params={}):
+        self._simulate('load_markets')
+        return self.markets
+
+    def market(self, symbol):
+        self._series(symbol)
+        return self.markets[symbol]
+
+    def fetch_ohlcv(self, symbol, timeframe='1h', since=None, limit=None, params={}):
+        self._simulate('fetch_ohlcv')
+        data = self._series(symbol)[:self._cursor[symbol] + 1]
+        if since is not None:
+            data = data[data[:, 0] >= since]
+            if limit:
+                data = data[:limit]
+        elif limit:
+            data = data[-limit:]
+        return data.tolist()
+
+    def fetch_ticker(self, symbol, params={}):
+        self._simulate('fetch_ticker')
+        return self._ticker(symbol)
+
+    def fetch_tickers(self, symbols=None, params={}):
+        self._simulate('fetch_tickers')
+        symbols = symbols or list(self._candles)
+        return {symbol: self._ticker(symbol) for symbol in symbols}
+
+    def fetch_balance(self, params={}):
+        self._simulate('fetch_balance')
+        with self._lock:
+            used = sum(self._position_margin(position) for position in self.positions.values())
+            total = dict(self.balance)
+            free = dict(total)
+            free['USDT'] = total.get('USDT', 0.0) - used
+            return {
+                'total': total,
+                'free': free,
+                'used': {currency: (used if currency == 'USDT' else 0.0) for currency in total},
+            }
+
+    def fetch_positions(self, symbols=None, params={}):
+        self._simulate('fetch_positions')
+        with self._lock:
+            positions = []
+            for symbol, position in self.positions.items():
+                if symbols and symbol not in symbols:
+                    continue
+                last = self._last_price(symbol)
+                direction = 1 if position['side'] == 'long' else -1
+                positions.append({
+                    'info': {'side': 'Buy' if position['side'] == 'long' else 'Sell'},
+                    'symbol': symbol,
+                    'side': position['side'],
+                    'contracts': position['contracts'],
+                    'entryPrice': position['entryPrice'],
+                    'markPrice': last,
+                    'notional': position['contracts'] * last,
+                    'leverage': self.leverage.get(symbol, 1),
+                    'unrealizedPnl': direction * (last - position['entryPrice']) * position['contracts'],
+                })
+            return positions
+
+    def set_leverage(self, leverage, symbol=None, params={}):
+        self._simulate('set_leverage')
+        if not 1 <= leverage <= self.max_leverage:
+            raise ccxt.BadRequest(f"mock leverage {leverage} outside [1, {self.max_leverage}]")
+        self.leverage[symbol] = leverage
+        return {'symbol': symbol, 'leverage': leverage}
+
+    def create_order(self, symbol, type, side, amount, price=None, params={}):
+        self._simulate('create_order')
+        if side not in ('buy', 'sell'):
+            raise ccxt.InvalidOrder(f"mock order side must be 'buy' or 'sell', got {side!r}")
+        if amount is None or amount <= 0:
+            raise ccxt.InvalidOrder(f"mock order amount must be positive, got {amount!r}")
+        if type != 'market' and price is None:
+            raise ccxt.InvalidOrder(f"mock {type} order requires a price")
+
+        with self._lock:
+            client_order_id = params.get('clientOrderId')
+            if client_order_id:
+                for existing in self.orders.values():
+                    if existing['clientOrderId'] == client_order_id:
+                        raise ccxt.DuplicateOrderId(f"mock duplicate clientOrderId {client_order_id}")
+            self._order_seq += 1
+            order = {
+                'id': str(self._order_seq),
+                'clientOrderId': client_order_id,
+                'timestamp': self.milliseconds(),
+                'symbol': symbol,
+                'type': type,
+                'side': side,
+                'price': price,
+                'amount': amount,
+                'filled': 0.0,
+                'remaining': amount,
+                'average': None,
+                'status': 'open',
+                'fee': None,
+            }
+            self.orders[order['id']] = order
+            if type == 'market':
+                self._fill(order, self._last_price(symbol))
+            else:
+                self._match_order(order)
+            if self.ack_loss_rate and self._rng.random() < self.ack_loss_rate:
+                raise ccxt.RequestTimeout(f"mock lost the acknowledgement of order {order['id']}")
+            return dict(order)
+
+    def create_market_order(self, symbol, side, amount, price=None, params={}):
+        return self.create_order(symbol, 'market', side, amount, None, params)
+
+    def create_limit_order(self, symbol, side, amount, price, params={}):
+        return self.create_order(symbol, 'limit', side, amount, price, params)
+
+    def create_market_buy_order(self, symbol, amount, params={}):
+        return self.create_order(symbol, 'market', 'buy', amount, None, params)
+
+    def create_market_sell_order(self, symbol, amount, params={}):
+        return self.create_order(symbol, 'market', 'sell', amount, None, params)
+
+    def create_limit_buy_order(self, symbol, amount, price, params={}):
+        return self.create_order(symbol, 'limit', 'buy', amount, price, params)
+
+    def create_limit_sell_order(self, symbol, amount, price, params={}):
+        return self.create_order(symbol, 'limit', 'sell', amount, price, params)
+
+    def fetch_order(self, id, symbol=None, params={}):
+        self._simulate('fetch_order')
+        order = self.orders.get(id)
+        if order is None:
+            raise ccxt.OrderNotFound(f"mock order {id} not found")
+        return dict(order)
+
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params={}):
+        self._simulate('fetch_open_orders')
+        return [dict(order) for order in self.orders.values()
+                if order['status'] == 'open' and (symbol is None or order['symbol'] == symbol)]
+
+    def fetch_orders(self, symbol=None, since=None, limit=None, params={}):
+        self._simulate('fetch_orders')
+        return [dict(order) for order in self.orders.values() if symbol is None or order['symbol'] == symbol]
+
+    def cancel_order(self, id, symbol=None, params={}):
+        self._simulate('cancel_order')
+        with self._lock:
+            order = self.orders.get(id)
+            if order is None or order['status'] != 'open':
+                raise ccxt.OrderNotFound(f"mock order {id} is not open")
+            order['status'] = 'canceled'
+            return dict(order)
+
+    def _simulate(self, endpoint):
+        """
+        Apply the configured rate limit, error rate and latency to an API call.
+        """
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            if self.rate_limit:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start = now
+                    self._window_calls = 0
+                self._window_calls += 1
+                if self._window_calls > self.rate_limit:
+                    raise ccxt.RateLimitExceeded(f"mock rate limit of {self.rate_limit} requests/s exceeded on {endpoint}")
+            fail = self.error_rate and self._rng.random() < self.error_rate
+            delay = self.latency.get(endpoint, 0.0) if isinstance(self.latency, dict) else self.latency
+            if self.latency_jitter:
+                delay += self._rng.uniform(0, self.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise ccxt.RequestTimeout(f"mock injected failure on {endpoint}")
+
+    def _series(self, symbol):
+        if symbol not in self._candles:
+            self.add_symbol(symbol)
+        return self._candles[symbol]
+
+    def _last_price(self, symbol):
+        return float(self._series(symbol)[self._cursor[symbol], 4])
+
+    def _ticker(self, symbol):
+        candle = self._series(symbol)[self._cursor[symbol]]
+        spread = candle[4] * 0.0001
+        return {
+            'symbol': symbol,
+            'timestamp': int(candle[0]),
+            'open': float(candle[1]),
+            'high': float(candle[2]),
+            'low': float(candle[3]),
+            'close': float(candle[4]),
+            'last': float(candle[4]),
+            'bid': float(candle[4] - spread),
+            'ask': float(candle[4] + spread),
+            'baseVolume': float(candle[5]),
+        }
+
+    def _position_margin(self, position):
+        return position['contracts'] * position['entryPrice'] / self.leverage.get(position['symbol'], 1)
+
+    def _match_order(self, order):
+        candle = self._series(order['symbol'])[self._cursor[order['symbol']]]
+        if order['side'] == 'buy' and candle[3] <= order['price']:
+            self._fill(order, order['price'])
+        elif order['side'] == 'sell' and candle[2] >= order['price']:
+            self._fill(order, order['price'])
+
+    def _match_resting_orders(self, symbol):
+        with self._lock:
+            for order in self.orders.values():
+                if order['status'] == 'open' and order['symbol'] == symbol:
+                    self._match_order(order)
+
+    def _fill(self, order, price):
+        amount = order['remaining']
+        cost = amount * price
+        fee = cost * self.fee
+        order.update(filled=order['amount'], remaining=0.0, average=price, cost=cost,
+                     status='closed', fee={'currency': 'USDT', 'cost': fee})
+        self.balance['USDT'] = self.balance.get('USDT', 0.0) - fee
+
+        symbol = order['symbol']
+        signed = amount if order['side'] == 'buy' else -amount
+        position = self.positions.get(symbol)
+        current = 0.0
+        if position:
+            current = position['contracts'] if position['side'] == 'long' else -position['contracts']
+        new = current + signed
+
+        if position and current * signed < 0:
+            closed = min(abs(signed), abs(current))
+            direction = 1 if current > 0 else -1
+            self.balance['USDT'] += direction * (price - position['entryPrice']) * closed
+
+        if abs(new) < 1e-12:
+            self.positions.pop(symbol, None)
+        elif current * new <= 0:
+            self.positions[symbol] = {'symbol': symbol, 'side': 'long' if new > 0 else 'short',
+                                      'contracts': abs(new), 'entryPrice': price}
+        elif abs(new) > abs(current):
+            entry = (abs(current) * position['entryPrice'] + abs(signed) * price) / abs(new)
+            position.update(contracts=abs(new), entryPrice=entry)
+        else:
+            position['contracts'] = abs(new)
+
+def mock_exchange_from_env():
+    """
+    Return a MockExchange when USE_MOCK_EXCHANGE is set, otherwise None.
+    """
+    if os.getenv('USE_MOCK_EXCHANGE', '').lower() in ('1', 'true', 'yes'):
+        logging.info("USE_MOCK_EXCHANGE is set, using the in-process mock exchange")
+        return MockExchange.from_env()
+    return None
+
+if __name__ == "__main__":
+    # Example: measure the round trip of the order and data paths against the mock
+    exchange = MockExchange(latency=0.002, latency_jitter=0.001, seed=42)
+    exchange.add_symbol('BTCUSDT')
+    exchange.rewind(200)
+    start = time.perf_counter()
+    for _ in range(100):
+        exchange.fetch_ohlcv('BTCUSDT', limit=100)
+        exchange.create_order('BTCUSDT', 'market', 'buy', 0.001)
+        exchange.advance()
+    elapsed = time.perf_counter() - start
+    logging.info("200 mock calls in %.3f s (%.2f ms per call)", elapsed, elapsed / 200 * 1000)
+    logging.info("Balance: %s", exchange.fetch_balance()['total'])
+    logging.info("Positions: %s", exchange.fetch_positions())
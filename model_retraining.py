@@ -0,0 +1,199 @@
+import json
+import logging
+import multiprocessing
+import os
+import time
+from keras.models import Sequential, load_model
+from keras.layers import LSTM, Dense
+from keras.callbacks import EarlyStopping
+from feature_store import get_features
+from fast_inference import export_model, load_numpy_model
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+LSTM_MODEL_PATH = os.getenv('LSTM_MODEL_PATH', os.path.join('models', 'lstm_model.h5'))
+# NumPy export of the same model, used for low-latency predictions
+LSTM_NUMPY_PATH = os.path.splitext(LSTM_MODEL_PATH)[0] + '.npz'
+WINDOW = 60
+
+def build_lstm_model(window=WINDOW):
+    """
+    Build the price LSTM used by build_and_train_model.
+    """
+    model = Sequential()
+    model.add(LSTM(50, return_sequences=True, input_shape=(window, 1)))
+    model.add(LSTM(50))
+    model.add(Dense(1))
+    model.compile(optimizer='adam', loss='mean_squared_error')
+    return model
+
+def _state_path(model_path):
+    return model_path + '.json'
+
+def read_training_state(model_path=LSTM_MODEL_PATH):
+    """
+    Return the metadata saved with a model, or None if there is no trained model.
+    """
+    try:
+        with open(_state_path(model_path)) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if os.path.exists(model_path) else None
+
+def _write_atomic_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def retrain_model(df, model_path=LSTM_MODEL_PATH, window=WINDOW, epochs=20, fine_tune_epochs=5, patience=2, batch_size=32):
+    """
+    Train the LSTM, warm-starting from the last checkpoint when there is one.
+
+    With a checkpoint, only the windows whose targets arrived since it was trained are used, for at
+    most fine_tune_epochs; otherwise a new model is trained on all windows. Early stopping watches the
+    validation loss on the most recent 10% of windows and restores the best weights. The model is
+    written to a temporary file and moved over model_path with os.replace, so readers see either the
+    old model or the new one, never a partial file.
+
+    Parameters:
+    - df (pd.DataFrame): OHLCV data, oldest first.
+    - model_path (str): Checkpoint to warm-start from and to replace.
+    - window (int): Input sequence length.
+    - epochs (int): Epochs for a training from scratch.
+    - fine_tune_epochs (int): Maximum epochs when fine-tuning.
+    - patience (int): Early-stopping patience in epochs.
+    - batch_size (int): Training batch size.
+
+    Returns:
+    - bool: True if a new model was saved.
+    """
+    features = get_features(df)
+    state = read_training_state(model_path)
+    if state is not None and state.get('feature_version') == features.version and state.get('window') == window:
+        X, y = features.windows(window, start=state['trained_rows'])
+        if not len(X):
+            logging.info("No new windows since the last training, keeping %s", model_path)
+            return False
+        model = load_model(model_path)
+        epochs = fine_tune_epochs
+        logging.info("Fine-tuning %s on %d new windows", model_path, len(X))
+    else:
+        X, y = features.windows(window)
+        model = build_lstm_model(window)
+        logging.info("Training a new model on %d windows", len(X))
+
+    validate = len(X) >= 20
+    early_stopping = EarlyStopping(monitor='val_loss' if validate else 'loss', patience=patience, restore_best_weights=True)
+    start = time.time()
+    history = model.fit(X, y, epochs=epochs, batch_size=batch_size, validation_split=0.1 if validate else 0.0,
+                        callbacks=[early_stopping], shuffle=False, verbose=0)
+
+    os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+    tmp_path = model_path + '.tmp.h5'
+    model.save(tmp_path)
+    os.replace(tmp_path, model_path)
+    export_model(model, os.path.splitext(model_path)[0] + '.npz')
+    _write_atomic_json(_state_path(model_path), {
+        'trained_rows': len(features),
+        'window': window,
+        'feature_version': features.version,
+        'epochs': len(history.history['loss']),
+        'loss': float(min(history.history['loss'])),
+        'trained_at': time.time(),
+    })
+    logging.info("Saved %s after %d epochs in %.1f s", model_path, len(history.history['loss']), time.time() - start)
+    return True
+
+def _retrain_worker(df, model_path, kwargs):
+    try:
+        retrain_model(df, model_path, **kwargs)
+    except Exception as e:
+        logging.error("Background retraining failed: %s", e)
+        raise
+
+_retraining_process = None
+
+def start_background_retraining(df, model_path=LSTM_MODEL_PATH, **kwargs):
+    """
+    Run retrain_model in a separate process so the caller keeps serving predictions meanwhile.
+
+    Only one retraining runs at a time; if one is still running it is returned instead of
+    starting another.
+
+    Returns:
+    - multiprocessing.Process: The retraining process.
+    """
+    global _retraining_process
+    if _retraining_process is not None and _retraining_process.is_alive():
+        logging.info("Retraining already in progress")
+        return _retraining_process
+    # A fresh interpreter avoids inheriting the parent's TensorFlow state through fork
+    context = multiprocessing.get_context('spawn')
+    _retraining_process = context.Process(target=_retrain_worker, args=(df, model_path, kwargs), daemon=True)
+    _retraining_process.start()
+    logging.info("Started background retraining (pid %s)", _retraining_process.pid)
+    return _retraining_process
+
+class ModelHandle:
+    """
+    Serves predictions from the latest saved model.
+
+    The checkpoint's modification time is checked at most every check_interval seconds and a
+    newer file is loaded and swapped in with a single reference assignment, so predictions keep
+    coming from the previous model until the new one is fully loaded. A .npz path is loaded as a
+    NumPy export, anything else with Keras.
+    """
+    def __init__(self, model_path=LSTM_MODEL_PATH, check_interval=30):
+        self.model_path = model_path
+        self.check_interval = check_interval
+        self.model = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self.refresh()
+
+    def available(self):
+        return self.model is not None
+
+    def refresh(self):
+        """
+        Load the checkpoint if it changed since it was last loaded. Returns True if a new model was loaded.
+        """
+        self._checked_at = time.monotonic()
+        try:
+            mtime = os.stat(self.model_path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        model = load_numpy_model(self.model_path) if self.model_path.endswith('.npz') else load_model(self.model_path)
+        self.model, self._mtime = model, mtime
+        logging.info("Loaded model from %s", self.model_path)
+        return True
+
+    def predict(self, X, **kwargs):
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.refresh()
+        if self.model is None:
+            raise RuntimeError(f"No trained model at {self.model_path}")
+        return self.model.predict(X, **kwargs)
+
+if __name__ == "__main__":
+    # Example: warm-start retraining in the background while the old model keeps serving
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(0)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, 3000)))
+    candles = pd.DataFrame({'timestamp': np.arange(close.size) * 3600000, 'close': close, 'volume': rng.uniform(1, 10, close.size)})
+
+    retrain_model(candles.iloc[:-200])
+    handle = ModelHandle(LSTM_NUMPY_PATH, check_interval=0)
+    process = start_background_retraining(candles)
+    X, _ = get_features(candles).windows(WINDOW, start=len(candles) - 5)
+    while process.is_alive():
+        handle.predict(X, verbose=0)
+        time.sleep(1)
+    handle.refresh()
+    logging.info("Latest predictions: %s", handle.predict(X, verbose=0).ravel())
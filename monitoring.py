@@ -1,19 +1,9 @@
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 import logging
-import smtplib
 import pandas as pd
-import requests
-import os
+from notification_service import notify
 
-# Email and Slack configurations (retrieve from environment variables)
-sender_email = os.getenv('SENDER_EMAIL')
-receiver_email = os.getenv('RECEIVER_EMAIL')
-smtp_server = os.getenv('SMTP_SERVER')
-smtp_port = int(os.getenv('SMTP_PORT', 587))
-smtp_user = os.getenv('SMTP_USER')
-smtp_password = os.getenv('SMTP_PASSWORD')
-slack_webhook_url = os.getenv('SLACK_WEBHOOK_URL')
+# Email and Slack are configured from the environment by notification_service
+# (SENDER_EMAIL, RECEIVER_EMAIL, SMTP_SERVER, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SLACK_WEBHOOK_URL)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -52,41 +42,14 @@ def track_performance_metrics(df):
 def send_notification(message):
     """
     Send a notification with the provided message via email and Slack.
+
+    The message is queued on the notification service and delivered by its worker thread, with
+    repeated alerts coalesced and bursts batched into a digest.
     
     Parameters:
     - message (str): The notification message to be sent.
     """
-    # Create the email
-    msg = MIMEMultipart()
-    msg['From'] = sender_email
-    msg['To'] = receiver_email
-    msg['Subject'] = "Trading Bot Notification"
-    msg.attach(MIMEText(message, 'plain'))
-
-    try:
-        # Connect to the server and send the email
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(smtp_user, smtp_password)
-        server.sendmail(sender_email, receiver_email, msg.as_string())
-        server.close()
-        
-        logging.info("Email sent successfully.")
-    except Exception as e:
-        logging.error("Failed to send email: %s", str(e))
-
-    # Send notification to Slack
-    slack_message = {
-        "text": message
-    }
-
-    try:
-        response = requests.post(slack_webhook_url, json=slack_message)
-        response.raise_for_status()
-        
-        logging.info("Slack notification sent successfully.")
-    except requests.exceptions.RequestException as e:
-        logging.error("Failed to send Slack notification: %s", str(e))
+    notify(message)
     
     # Log the message as well
     logging.info(message)
@@ -0,0 +1,316 @@
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+from email.mime.text import MIMEText
+from http_client import request
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Queue marker asking the worker to send the pending digest
+_FLUSH = object()
+
+class SMTPChannel:
+    """
+    Email channel that keeps one SMTP connection open between messages.
+
+    The connection is opened on the first message, reused while messages keep coming, closed after
+    idle_timeout seconds without one, and reopened once if the server dropped it.
+    """
+    name = 'email'
+
+    def __init__(self, server, port, user, password, sender=None, receivers=None, starttls=True, idle_timeout=60.0):
+        self.server = server
+        self.port = int(port)
+        self.user = user
+        self.password = password
+        self.sender = sender or user
+        self.receivers = receivers or [self.sender]
+        self.starttls = starttls
+        self.idle_timeout = idle_timeout
+        self._connection = None
+        self._last_used = 0.0
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build the channel from SMTP_SERVER, SMTP_PORT, SMTP_USER (or EMAIL_USER), SMTP_PASSWORD
+        (or EMAIL_PASS), SENDER_EMAIL and RECEIVER_EMAIL. Returns None if email is not configured.
+        """
+        server = os.getenv('SMTP_SERVER')
+        user = os.getenv('SMTP_USER') or os.getenv('EMAIL_USER')
+        password = os.getenv('SMTP_PASSWORD') or os.getenv('EMAIL_PASS')
+        if not server or not user or not password:
+            return None
+        receiver = os.getenv('RECEIVER_EMAIL')
+        return cls(server, os.getenv('SMTP_PORT', 587), user, password, sender=os.getenv('SENDER_EMAIL'),
+                   receivers=[receiver] if receiver else None)
+
+    def _connect(self):
+        connection = smtplib.SMTP(self.server, self.port, timeout=30)
+        if self.starttls:
+            connection.starttls()
+        connection.login(self.user, self.password)
+        return connection
+
+    def send(self, subject, body, to=None):
+        msg = MIMEText(body)
+        msg['Subject'] = subject
+        msg['From'] = self.sender
+        receivers = [to] if isinstance(to, str) else (to or self.receivers)
+        msg['To'] = ', '.join(receivers)
+        for attempt in range(2):
+            if self._connection is None:
+                self._connection = self._connect()
+            try:
+                self._connection.sendmail(self.sender, receivers, msg.as_string())
+                self._last_used = time.monotonic()
+                return
+            except smtplib.SMTPServerDisconnected:
+                self._connection = None
+                if attempt:
+                    raise
+
+    def idle(self):
+        if self._connection is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.quit()
+            except smtplib.SMTPException:
+                pass
+            self._connection = None
+
+class SlackChannel:
+    """
+    Slack webhook channel. Posts go through the shared pooled HTTP client, which keeps the
+    connection alive and retries with backoff.
+    """
+    name = 'slack'
+
+    def __init__(self, webhook_url, deadline=30.0):
+        self.webhook_url = webhook_url
+        self.deadline = deadline
+
+    @classmethod
+    def from_env(cls):
+        webhook_url = os.getenv('SLACK_WEBHOOK_URL')
+        return cls(webhook_url) if webhook_url else None
+
+    def send(self, subject, body, to=None):
+        request('POST', self.webhook_url, deadline=self.deadline, json={'text': f"*{subject}*\n{body}"})
+
+    def idle(self):
+        pass
+
+    def close(self):
+        pass
+
+class NotificationService:
+    """
+    Queue-backed notification dispatcher.
+
+    notify() only enqueues, so callers such as order execution never wait on SMTP or Slack. A
+    worker thread delivers the messages:
+    - Repeats of the same alert within coalesce_window seconds are counted instead of sent, and
+      reported once in the next digest.
+    - At most rate_limit messages are sent per rate_period seconds (token bucket); messages over
+      the limit, and messages sent with digest=True, are batched into a digest sent every
+      digest_interval seconds.
+
+    Parameters:
+    - channels (list): Objects with name, send(subject, body, to), idle() and close().
+    - coalesce_window (float): Seconds during which identical alerts are merged.
+    - rate_limit (int): Messages allowed per rate_period.
+    - rate_period (float): Length of the rate-limit period in seconds.
+    - digest_interval (float): Seconds between digests.
+    - max_queue (int): Messages held before new ones are dropped with a log entry.
+    """
+
+    def __init__(self, channels, coalesce_window=300.0, rate_limit=10, rate_period=60.0, digest_interval=300.0, max_queue=10000):
+        self.channels = list(channels)
+        self.coalesce_window = coalesce_window
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+        self.digest_interval = digest_interval
+        self.sent = 0
+        self.dropped = 0
+        self._queue = queue.Queue(max_queue)
+        self._tokens = float(rate_limit)
+        self._refilled_at = time.monotonic()
+        self._recent = {}  # key -> [first seen, suppressed repeats, subject, message, channels, to]
+        self._digest = []
+        self._next_digest = time.monotonic() + digest_interval
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='notifications', daemon=True)
+        self._thread.start()
+
+    def notify(self, message, subject='Trading Bot Notification', key=None, digest=False, to=None, channels=None):
+        """
+        Queue a notification without blocking.
+
+        Parameters:
+        - message (str): Notification text.
+        - subject (str): Email subject / Slack heading.
+        - key (str): Coalescing key; defaults to the subject and message.
+        - digest (bool): Send only as part of the next digest (for informational messages).
+        - to (str or list): Email receivers instead of the channel's defaults.
+        - channels (tuple): Channel names to use, e.g. ('email',). Defaults to all channels.
+
+        Returns:
+        - bool: False if the queue was full and the message was dropped.
+        """
+        if key is None:
+            key = (subject, message)
+        try:
+            self._queue.put_nowait((time.monotonic(), key, subject, message, digest, to, channels))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logging.error("Notification queue full, dropped: %s", message)
+            return False
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued message has been handled and send the pending digest.
+        """
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout=10.0):
+        self.flush(timeout)
+        self._closed.set()
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _take_token(self, now):
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled_at) * self.rate_limit / self.rate_period)
+        self._refilled_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def _deliver(self, subject, body, to=None, channels=None):
+        for channel in self.channels:
+            if channels is not None and channel.name not in channels:
+                continue
+            try:
+                channel.send(subject, body, to)
+            except Exception as e:
+                logging.error("Failed to send %s notification: %s", channel.name, e)
+        self.sent += 1
+
+    def _handle(self, item):
+        now, key, subject, message, digest, to, channels = item
+        recent = self._recent.get(key)
+        if recent is not None and now - recent[0] < self.coalesce_window:
+            recent[1] += 1
+            return
+        if recent is not None and recent[1]:
+            # The window expired before the digest ran; keep its repeat count
+            self._digest.append((recent[2], f"{recent[3]} (repeated {recent[1]} more times)", recent[4], recent[5]))
+        self._recent[key] = [now, 0, subject, message, channels, to]
+        if digest or not self._take_token(now):
+            self._digest.append((subject, message, channels, to))
+        else:
+            self._deliver(subject, message, to, channels)
+
+    def _send_digest(self, now):
+        self._next_digest = now + self.digest_interval
+        entries = list(self._digest)
+        self._digest.clear()
+        for key, recent in list(self._recent.items()):
+            first_seen, repeats, subject, message, channels, to = recent
+            if repeats:
+                entries.append((subject, f"{message} (repeated {repeats} more times)", channels, to))
+                recent[1] = 0
+            if now - first_seen >= self.coalesce_window:
+                del self._recent[key]
+        # One digest per destination
+        groups = {}
+        for subject, message, channels, to in entries:
+            destination = (tuple(channels) if channels else None, tuple(to) if isinstance(to, list) else to)
+            groups.setdefault(destination, []).append(f"[{subject}] {message}")
+        for (channels, to), lines in groups.items():
+            to = list(to) if isinstance(to, tuple) else to
+            if len(lines) == 1:
+                self._deliver('Trading Bot Notification', lines[0], to, channels)
+            else:
+                self._deliver(f"Trading Bot Digest ({len(lines)} notifications)", '\n'.join(lines), to, channels)
+            # The digest itself counts against the rate limit, but is never held back
+            self._take_token(now)
+
+    def _run(self):
+        while not self._closed.is_set():
+            timeout = max(self._next_digest - time.monotonic(), 0.0)
+            try:
+                item = self._queue.get(timeout=min(timeout, 5.0))
+            except queue.Empty:
+                item = ()
+            now = time.monotonic()
+            if item is None:
+                break
+            if item and item[0] is _FLUSH:
+                self._send_digest(now)
+                item[1].set()
+            elif item:
+                self._handle(item)
+            if now >= self._next_digest:
+                self._send_digest(now)
+            for channel in self.channels:
+                channel.idle()
+        for channel in self.channels:
+            channel.close()
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_notification_service():
+    """
+    Shared NotificationService with the email and Slack channels configured in the environment.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            channels = [channel for channel in (SMTPChannel.from_env(), SlackChannel.from_env()) if channel is not None]
+            if not channels:
+                logging.warning("No email or Slack configuration found; notifications will only be logged.")
+            _service = NotificationService(channels)
+    return _service
+
+def notify(message, subject='Trading Bot Notification', **kwargs):
+    """
+    Queue a notification on the shared service. See NotificationService.notify.
+    """
+    return get_notification_service().notify(message, subject, **kwargs)
+
+if __name__ == "__main__":
+    # Example: an alert storm with a slow channel; notify() returns immediately
+    class PrintChannel:
+        name = 'print'
+
+        def send(self, subject, body, to=None):
+            time.sleep(0.2)
+            print(f"--- {subject}\n{body}")
+
+        def idle(self):
+            pass
+
+        def close(self):
+            pass
+
+    service = NotificationService([PrintChannel()], coalesce_window=60, rate_limit=3, rate_period=60, digest_interval=2)
+    start = time.perf_counter()
+    for i in range(1000):
+        service.notify("Price moved more than 5% in one minute")
+        service.notify(f"Order {i % 20} rejected: insufficient margin")
+    logging.info("Queued 2000 alerts in %.1f ms", (time.perf_counter() - start) * 1000)
+    service.close()
+    logging.info("Sent %d messages", service.sent)
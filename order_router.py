@@ -0,0 +1,398 @@
+import asyncio
+import functools
+import hashlib
+import logging
+import threading
+import time
+import uuid
+import ccxt
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Order lifecycle: which states each state may move to
+ORDER_TRANSITIONS = {
+    'new': ('sending',),
+    'sending': ('open', 'partially_filled', 'filled', 'canceled', 'rejected', 'unknown'),
+    'unknown': ('sending', 'open', 'partially_filled', 'filled', 'canceled', 'rejected'),
+    'open': ('partially_filled', 'filled', 'canceled'),
+    'partially_filled': ('partially_filled', 'filled', 'canceled'),
+    'filled': (),
+    'canceled': (),
+    'rejected': ('sending',),
+}
+TERMINAL_STATES = ('filled', 'canceled', 'rejected')
+CCXT_STATUS_TO_STATE = {'open': 'open', 'closed': 'filled', 'canceled': 'canceled', 'expired': 'canceled', 'rejected': 'rejected'}
+
+def make_client_order_id(strategy, symbol, side, amount, price=None, intent_id=None, prefix='tb'):
+    """
+    Build a deterministic client order ID from the trading intent.
+
+    The same strategy, symbol, side, amount, price and intent (for example the timestamp of the
+    candle that produced the signal) always hash to the same ID, so a retried or replayed
+    submission is recognised by the exchange instead of opening a second position. The result
+    stays within Bybit's 36 character orderLinkId limit.
+    """
+    payload = f"{strategy}|{symbol}|{side}|{float(amount):.12g}|{price}|{intent_id}"
+    return prefix + hashlib.sha1(payload.encode()).hexdigest()[:32]
+
+def bar_intent_id(timestamp):
+    """
+    Intent ID of an order triggered by the candle at `timestamp`: its open time in epoch
+    milliseconds. Accepts milliseconds, datetime, pandas Timestamp or numpy datetime64, so a
+    caller that retries the same signal always routes the same client order ID.
+    """
+    if isinstance(timestamp, np.datetime64):
+        return int(timestamp.astype('datetime64[ms]').astype(np.int64))
+    if hasattr(timestamp, 'timestamp'):
+        return int(round(timestamp.timestamp() * 1000))
+    return int(timestamp)
+
+class RateBudget:
+    """
+    Token bucket limiting the request rate of one exchange endpoint.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self, weight=1):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= weight:
+                self.tokens -= weight
+                return
+            await asyncio.sleep((weight - self.tokens) / self.rate)
+
+class TrackedOrder:
+    """
+    In-memory record of one routed order and its state transitions.
+    """
+    def __init__(self, client_order_id, symbol, side, amount, type='market', price=None, params=None):
+        self.client_order_id = client_order_id
+        self.symbol = symbol
+        self.side = side
+        self.amount = amount
+        self.type = type
+        self.price = price
+        self.params = params or {}
+        self.state = 'new'
+        self.exchange_order_id = None
+        self.filled = 0.0
+        self.average = None
+        self.attempts = 0
+        self.latency = None
+        self.info = None
+        self.error = None
+        self.history = [('new', time.time())]
+
+    def transition(self, state):
+        if state == self.state and state != 'partially_filled':
+            return
+        if state not in ORDER_TRANSITIONS[self.state]:
+            raise ValueError(f"Invalid order transition {self.state} -> {state} for {self.client_order_id}")
+        self.state = state
+        self.history.append((state, time.time()))
+
+    def update_from_exchange(self, order):
+        """
+        Apply a ccxt order structure (from create_order, fetch_order or a fill event).
+        """
+        self.info = order
+        self.exchange_order_id = order.get('id') or self.exchange_order_id
+        self.filled = order.get('filled') or self.filled
+        self.average = order.get('average') or self.average
+        state = CCXT_STATUS_TO_STATE.get(order.get('status'), 'open')
+        if state == 'open' and self.filled:
+            state = 'partially_filled'
+        if self.state in TERMINAL_STATES and state not in ORDER_TRANSITIONS[self.state]:
+            return
+        self.transition(state)
+
+    @property
+    def done(self):
+        return self.state in TERMINAL_STATES
+
+class OrderRouter:
+    """
+    Asynchronous order router with idempotent client order IDs.
+
+    Orders for different symbols are sent concurrently, orders for the same symbol keep their
+    submission order, and every endpoint call waits on its own RateBudget. An order whose send
+    times out is marked 'unknown' and looked up by its client order ID before anything is
+    resent, so a retry never produces a second fill. Works with both the blocking ccxt clients
+    (calls run in the default executor) and ccxt.async_support clients.
+
+    Once more than max_orders are tracked the oldest filled, canceled or rejected ones are
+    forgotten; resubmitting one of those is then caught by the exchange's duplicate client
+    order ID check instead.
+    """
+
+    def __init__(self, exchange, strategy='default', rate_limits=None, default_rate=10.0,
+                 max_retries=3, retry_delay=0.5, timeout=10.0, max_orders=10000):
+        self.exchange = exchange
+        self.strategy = strategy
+        self.rate_limits = rate_limits or {}
+        self.default_rate = default_rate
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.max_orders = max_orders
+        self.orders = {}
+        self.latencies = []
+        self._budgets = {}
+        self._symbol_locks = {}
+        self._inflight = {}
+
+    def budget(self, endpoint):
+        budget = self._budgets.get(endpoint)
+        if budget is None:
+            budget = self._budgets[endpoint] = RateBudget(self.rate_limits.get(endpoint, self.default_rate))
+        return budget
+
+    async def submit(self, symbol, side, amount, type='market', price=None, intent_id=None, params=None):
+        """
+        Route one order and return its TrackedOrder once the exchange has acknowledged it.
+
+        Parameters:
+        - symbol, side, amount, type, price: As for ccxt create_order.
+        - intent_id (optional): What makes this order unique, e.g. the signal candle's timestamp.
+          Submitting the same intent twice returns the first order instead of sending another;
+          if that order is still unconfirmed it is looked up again, but never resent.
+          Without it a random nonce is used, which still keeps retries of this call idempotent.
+        - params (dict, optional): Extra ccxt params passed to create_order.
+        """
+        if intent_id is None:
+            intent_id = uuid.uuid4().hex
+        client_order_id = make_client_order_id(self.strategy, symbol, side, amount, price, intent_id)
+
+        inflight = self._inflight.get(client_order_id)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        tracked = self.orders.get(client_order_id)
+        if tracked is not None and tracked.state not in ('rejected', 'unknown'):
+            logging.info("Order %s already routed (%s), not resending", client_order_id, tracked.state)
+            return tracked
+        if tracked is None:
+            tracked = self.orders[client_order_id] = TrackedOrder(client_order_id, symbol, side, amount, type, price, params)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[client_order_id] = future
+        try:
+            lock = self._symbol_locks.get(symbol)
+            if lock is None:
+                lock = self._symbol_locks[symbol] = asyncio.Lock()
+            async with lock:
+                if tracked.state == 'unknown':
+                    await self._refresh(tracked)
+                else:
+                    tracked.attempts = 0
+                    await self._send(tracked)
+            future.set_result(tracked)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved; concurrent duplicates re-raise it themselves
+            raise
+        finally:
+            del self._inflight[client_order_id]
+            self._prune()
+        return tracked
+
+    async def submit_many(self, orders):
+        """
+        Route a batch of orders concurrently. Each entry is a dict of submit() keyword arguments.
+        Returns TrackedOrders (or the exception raised for that order) in input order.
+        """
+        return await asyncio.gather(*(self.submit(**order) for order in orders), return_exceptions=True)
+
+    async def reconcile(self):
+        """
+        Refresh every non-terminal order from the exchange and return the ones that changed.
+        """
+        changed = []
+        pending = [tracked for tracked in self.orders.values() if not tracked.done]
+        results = await asyncio.gather(*(self._lookup(tracked) for tracked in pending), return_exceptions=True)
+        for tracked, order in zip(pending, results):
+            if isinstance(order, Exception) or order is None:
+                continue
+            before = (tracked.state, tracked.filled)
+            tracked.update_from_exchange(order)
+            if (tracked.state, tracked.filled) != before:
+                changed.append(tracked)
+        return changed
+
+    def on_order_update(self, order):
+        """
+        Apply an order update pushed by the exchange (e.g. a websocket fill).
+        """
+        tracked = self.orders.get(order.get('clientOrderId'))
+        if tracked is not None:
+            tracked.update_from_exchange(order)
+        return tracked
+
+    def stats(self):
+        """
+        Return order counts by state and acknowledgement latency percentiles in milliseconds.
+        """
+        counts = {}
+        for tracked in self.orders.values():
+            counts[tracked.state] = counts.get(tracked.state, 0) + 1
+        latencies = np.array(self.latencies) * 1000
+        percentiles = {}
+        if len(latencies):
+            percentiles = dict(zip(('p50', 'p90', 'p99', 'max'), np.percentile(latencies, [50, 90, 99, 100])))
+        return {'states': counts, 'latency_ms': percentiles}
+
+    async def _send(self, tracked):
+        params = dict(tracked.params, clientOrderId=tracked.client_order_id)
+        while True:
+            if tracked.attempts > self.max_retries:
+                # Leave an unconfirmed order 'unknown' so reconcile() can settle it later
+                raise ccxt.RequestTimeout(f"Order {tracked.client_order_id} not confirmed after {tracked.attempts} attempts")
+            if tracked.state == 'unknown':
+                try:
+                    existing = await self._lookup(tracked)
+                except (ccxt.NetworkError, asyncio.TimeoutError) as e:
+                    tracked.attempts += 1
+                    logging.warning("Lookup of order %s failed: %s", tracked.client_order_id, e)
+                    await asyncio.sleep(self.retry_delay * 2 ** (tracked.attempts - 1))
+                    continue
+                if existing is not None:
+                    tracked.update_from_exchange(existing)
+                    return
+
+            tracked.attempts += 1
+            tracked.transition('sending')
+            started = time.monotonic()
+            try:
+                order = await self._call('create_order', tracked.symbol, tracked.type, tracked.side,
+                                         tracked.amount, tracked.price, params)
+            except ccxt.DuplicateOrderId:
+                # An earlier attempt reached the exchange after all
+                tracked.transition('unknown')
+                continue
+            except (ccxt.NetworkError, asyncio.TimeoutError) as e:
+                tracked.transition('unknown')
+                tracked.error = e
+                logging.warning("Order %s attempt %d failed: %s", tracked.client_order_id, tracked.attempts, e)
+                await asyncio.sleep(self.retry_delay * 2 ** (tracked.attempts - 1))
+                continue
+            except ccxt.BaseError as e:
+                tracked.transition('rejected')
+                tracked.error = e
+                logging.error("Order %s rejected: %s", tracked.client_order_id, e)
+                raise
+            tracked.latency = time.monotonic() - started
+            self.latencies.append(tracked.latency)
+            tracked.update_from_exchange(order)
+            logging.info("Order %s for %s %s %s is %s", tracked.client_order_id, tracked.side, tracked.amount, tracked.symbol, tracked.state)
+            return
+
+    async def _refresh(self, tracked):
+        # An earlier submit left the order unconfirmed: look it up again instead of resending
+        existing = await self._lookup(tracked)
+        if existing is not None:
+            tracked.update_from_exchange(existing)
+        logging.info("Order %s already routed (%s), not resending", tracked.client_order_id, tracked.state)
+
+    def _prune(self):
+        excess = len(self.orders) - self.max_orders
+        if excess <= 0:
+            return
+        # Dicts keep insertion order, so the oldest finished orders come first
+        finished = []
+        for client_order_id, tracked in self.orders.items():
+            if tracked.done:
+                finished.append(client_order_id)
+                if len(finished) == excess:
+                    break
+        for client_order_id in finished:
+            del self.orders[client_order_id]
+
+    async def _lookup(self, tracked):
+        """
+        Find an order on the exchange by client order ID, or return None if it does not exist.
+        Lookup failures propagate so an unconfirmed order is never resent; endpoints the
+        exchange does not support are skipped.
+        """
+        if tracked.exchange_order_id is not None:
+            try:
+                return await self._call('fetch_order', tracked.exchange_order_id, tracked.symbol)
+            except ccxt.NotSupported:
+                pass
+        for method in ('fetch_open_orders', 'fetch_closed_orders', 'fetch_orders'):
+            if getattr(self.exchange, method, None) is None:
+                continue
+            try:
+                orders = await self._call(method, tracked.symbol)
+            except ccxt.NotSupported:
+                continue
+            for order in orders:
+                if order.get('clientOrderId') == tracked.client_order_id:
+                    return order
+        return None
+
+    async def _call(self, method, *args):
+        await self.budget(method).acquire()
+        function = getattr(self.exchange, method)
+        if asyncio.iscoroutinefunction(function):
+            call = function(*args)
+        else:
+            call = asyncio.get_running_loop().run_in_executor(None, functools.partial(function, *args))
+        return await asyncio.wait_for(call, self.timeout)
+
+_loop = None
+_loop_lock = threading.Lock()
+_routers = {}
+
+def _background_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='order-router', daemon=True).start()
+    return _loop
+
+def get_router(exchange, **kwargs):
+    """
+    Return the shared OrderRouter for an exchange, creating it on first use.
+    """
+    router = _routers.get(id(exchange))
+    if router is None or router.exchange is not exchange:
+        router = _routers[id(exchange)] = OrderRouter(exchange, **kwargs)
+    return router
+
+def route_order(exchange, symbol, side, amount, type='market', price=None, intent_id=None, params=None):
+    """
+    Blocking helper for synchronous callers: route one order through the exchange's shared
+    router on a background event loop and return the exchange's order structure.
+
+    Pass intent_id (e.g. bar_intent_id of the signal candle) so that calling again for the
+    same signal returns the first order instead of placing another one.
+    """
+    router = get_router(exchange)
+    coroutine = router.submit(symbol, side, amount, type=type, price=price, intent_id=intent_id, params=params)
+    tracked = asyncio.run_coroutine_threadsafe(coroutine, _background_loop()).result()
+    return tracked.info
+
+if __name__ == "__main__":
+    from mock_exchange import MockExchange
+
+    # Example: 200 orders across 20 symbols against a mock exchange with 20 ms latency,
+    # 5% injected timeouts and 5% of acknowledgements lost after the order was placed
+    exchange = MockExchange(latency=0.02, latency_jitter=0.01, error_rate=0.05, ack_loss_rate=0.05, seed=3)
+    router = OrderRouter(exchange, strategy='demo', default_rate=200, retry_delay=0.01)
+    batch = [{'symbol': f'SYM{i % 20}USDT', 'side': 'buy', 'amount': 1, 'intent_id': i} for i in range(200)]
+
+    start = time.perf_counter()
+    results = asyncio.run(router.submit_many(batch))
+    elapsed = time.perf_counter() - start
+    failures = [result for result in results if isinstance(result, Exception)]
+    logging.info("Routed %d orders in %.2f s (%d failed)", len(batch), elapsed, len(failures))
+    logging.info("Router stats: %s", router.stats())
+    logging.info("Exchange saw %d create_order calls and holds %d orders", exchange.calls['create_order'], len(exchange.orders))
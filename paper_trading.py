@@ -0,0 +1,506 @@
+import logging
+import time
+from bisect import bisect_left, insort
+from collections import deque
+import ccxt
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+STOP_ORDER_TYPES = ('stop', 'stop_loss', 'stop_market')
+TAKE_PROFIT_ORDER_TYPES = ('take_profit', 'take_profit_market')
+EPSILON = 1e-12
+
+class FeeModel:
+    """
+    Maker/taker fee schedule expressed as a fraction of the fill notional.
+    """
+    def __init__(self, maker=0.0002, taker=0.00055):
+        self.maker = maker
+        self.taker = taker
+
+    def __call__(self, notional, is_maker):
+        return notional * (self.maker if is_maker else self.taker)
+
+class FixedSlippage:
+    """
+    Constant adverse slippage in basis points for taker fills.
+    """
+    def __init__(self, bps=0.0):
+        self.bps = bps
+
+    def __call__(self, side, price, amount, volume=None):
+        direction = 1 if side == 'buy' else -1
+        return price * (1 + direction * self.bps / 10000)
+
+class VolumeSlippage:
+    """
+    Square-root market impact: slippage grows with the order's share of bar volume.
+    """
+    def __init__(self, impact=0.1, min_bps=0.0):
+        self.impact = impact
+        self.min_bps = min_bps
+
+    def __call__(self, side, price, amount, volume=None):
+        direction = 1 if side == 'buy' else -1
+        participation = amount / volume if volume else 0.0
+        slippage = self.min_bps / 10000 + self.impact * np.sqrt(participation) / 100
+        return price * (1 + direction * slippage)
+
+class OrderBook:
+    """
+    In-memory limit order book for one symbol.
+
+    Resting orders live in FIFO queues keyed by price, with a sorted list of prices per side
+    so the best level is found in O(1) and new levels are inserted in O(log n).
+    """
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self._levels = {'buy': {}, 'sell': {}}
+        self._prices = {'buy': [], 'sell': []}
+
+    def __len__(self):
+        return sum(len(queue) for levels in self._levels.values() for queue in levels.values())
+
+    def add(self, order):
+        side = order['side']
+        price = order['price']
+        queue = self._levels[side].get(price)
+        if queue is None:
+            queue = self._levels[side][price] = deque()
+            insort(self._prices[side], price)
+        queue.append(order)
+
+    def remove(self, order):
+        side = order['side']
+        price = order['price']
+        queue = self._levels[side].get(price)
+        if queue is None or order not in queue:
+            return False
+        queue.remove(order)
+        if not queue:
+            self._drop_level(side, price)
+        return True
+
+    def best_bid(self):
+        prices = self._prices['buy']
+        return prices[-1] if prices else None
+
+    def best_ask(self):
+        prices = self._prices['sell']
+        return prices[0] if prices else None
+
+    def depth(self, side):
+        """
+        Return [(price, total remaining), ...] from the best level outwards.
+        """
+        prices = self._prices[side]
+        ordered = reversed(prices) if side == 'buy' else prices
+        return [(price, sum(order['remaining'] for order in self._levels[side][price])) for price in ordered]
+
+    def match(self, price, liquidity=float('inf')):
+        """
+        Fill resting orders crossed by a trade at the given price.
+
+        Buys priced at or above the trade and sells priced at or below it are filled in
+        price-time priority until the available liquidity on each side is used up.
+
+        Returns:
+        - list: (order, quantity) pairs in fill order. Orders are popped from the book once
+          their remaining quantity reaches zero; the caller applies the fill accounting.
+        """
+        fills = []
+        for side in ('buy', 'sell'):
+            available = liquidity
+            prices = self._prices[side]
+            while prices and available > EPSILON:
+                level_price = prices[-1] if side == 'buy' else prices[0]
+                if (side == 'buy' and level_price < price) or (side == 'sell' and level_price > price):
+                    break
+                queue = self._levels[side][level_price]
+                while queue and available > EPSILON:
+                    order = queue[0]
+                    quantity = min(order['remaining'], available)
+                    available -= quantity
+                    fills.append((order, quantity))
+                    if order['remaining'] - quantity <= EPSILON:
+                        queue.popleft()
+                    else:
+                        break
+                if not queue:
+                    self._drop_level(side, level_price)
+                elif available <= EPSILON:
+                    break
+        return fills
+
+    def _drop_level(self, side, price):
+        del self._levels[side][price]
+        prices = self._prices[side]
+        del prices[bisect_left(prices, price)]
+
+class PaperTradingEngine:
+    """
+    Paper-trading matching engine exposing the ccxt order calls the bot uses.
+
+    Market orders fill immediately at the last price plus slippage, limit orders rest in a
+    per-symbol OrderBook and fill (partially, if liquidity is capped) when replayed trades or
+    candles cross them, and stop-loss/take-profit orders wait on sorted trigger levels and
+    turn into market orders once touched. Because it speaks the ccxt create_order interface,
+    an engine can be passed wherever Placing_Orders or risk_management expect an exchange.
+    """
+
+    def __init__(self, balance=10000.0, fee_model=None, slippage_model=None, participation=1.0, quote='USDT'):
+        self.quote = quote
+        self.balance = {quote: float(balance)}
+        self.fee_model = fee_model or FeeModel()
+        self.slippage_model = slippage_model or FixedSlippage()
+        self.participation = participation
+        self.books = {}
+        self.positions = {}
+        self.orders = {}
+        self.trades = []
+        self.last_price = {}
+        self.leverage = {}
+        self.timestamp = None
+        self._bar_volume = None
+        self._triggers = {}
+        self._order_seq = 0
+        self._trigger_seq = 0
+
+    def milliseconds(self):
+        return self.timestamp if self.timestamp is not None else int(time.time() * 1000)
+
+    def book(self, symbol):
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol)
+            self._triggers[symbol] = {'down': [], 'up': []}
+        return book
+
+    def create_order(self, symbol, type, side, amount, price=None, params={}):
+        """
+        Place a paper order.
+
+        Parameters:
+        - symbol (str): The trading symbol.
+        - type (str): 'market', 'limit', 'stop'/'stop_loss' or 'take_profit'.
+        - side (str): 'buy' or 'sell'.
+        - amount (float): Quantity to trade.
+        - price (float, optional): Limit price, or the trigger level for stop and take-profit
+          orders when params carries no 'stopPrice'/'triggerPrice'.
+        - params (dict, optional): ccxt-style extras ('clientOrderId', 'stopPrice', 'triggerPrice',
+          'reduceOnly'). Reduce-only orders are capped to the open position when they fill and
+          canceled if it is already flat, which lets a stop and a take-profit act as a bracket.
+
+        Returns:
+        - dict: ccxt-style order structure.
+        """
+        if side not in ('buy', 'sell'):
+            raise ccxt.InvalidOrder(f"Order side must be 'buy' or 'sell', got {side!r}")
+        if amount is None or amount <= 0:
+            raise ccxt.InvalidOrder(f"Order amount must be positive, got {amount!r}")
+
+        trigger_price = params.get('stopPrice', params.get('triggerPrice'))
+        if type in STOP_ORDER_TYPES + TAKE_PROFIT_ORDER_TYPES:
+            trigger_price = trigger_price if trigger_price is not None else price
+            if trigger_price is None:
+                raise ccxt.InvalidOrder(f"{type} order requires a trigger price")
+        elif type == 'limit' and price is None:
+            raise ccxt.InvalidOrder("limit order requires a price")
+        elif type not in ('market', 'limit'):
+            raise ccxt.InvalidOrder(f"Unsupported order type {type!r}")
+
+        self.book(symbol)
+        self._order_seq += 1
+        order = {
+            'id': str(self._order_seq),
+            'clientOrderId': params.get('clientOrderId'),
+            'timestamp': self.milliseconds(),
+            'symbol': symbol,
+            'type': type,
+            'side': side,
+            'price': price if type == 'limit' else None,
+            'stopPrice': trigger_price,
+            'amount': float(amount),
+            'filled': 0.0,
+            'remaining': float(amount),
+            'cost': 0.0,
+            'average': None,
+            'status': 'open',
+            'fee': {'currency': self.quote, 'cost': 0.0},
+            'reduceOnly': bool(params.get('reduceOnly', False)),
+        }
+        self.orders[order['id']] = order
+
+        if type == 'market':
+            self._fill_market(order, self._reference_price(symbol))
+        elif type == 'limit':
+            last = self.last_price.get(symbol)
+            marketable = last is not None and ((side == 'buy' and price >= last) or (side == 'sell' and price <= last))
+            if marketable:
+                self._apply_fill(order, order['remaining'], min(price, last) if side == 'buy' else max(price, last), is_maker=False)
+            else:
+                self.books[symbol].add(order)
+        else:
+            self._add_trigger(order)
+        logging.debug("Paper %s %s order %s for %s %s", type, side, order['id'], amount, symbol)
+        return dict(order)
+
+    def create_market_order(self, symbol, side, amount, price=None, params={}):
+        return self.create_order(symbol, 'market', side, amount, None, params)
+
+    def create_limit_order(self, symbol, side, amount, price, params={}):
+        return self.create_order(symbol, 'limit', side, amount, price, params)
+
+    def create_market_buy_order(self, symbol, amount, params={}):
+        return self.create_order(symbol, 'market', 'buy', amount, None, params)
+
+    def create_market_sell_order(self, symbol, amount, params={}):
+        return self.create_order(symbol, 'market', 'sell', amount, None, params)
+
+    def cancel_order(self, id, symbol=None, params={}):
+        order = self.orders.get(id)
+        if order is None or order['status'] != 'open':
+            raise ccxt.OrderNotFound(f"Paper order {id} is not open")
+        if order['type'] == 'limit':
+            self.books[order['symbol']].remove(order)
+        else:
+            for levels in self._triggers[order['symbol']].values():
+                for index, entry in enumerate(levels):
+                    if entry[2] is order:
+                        del levels[index]
+                        break
+        order['status'] = 'canceled'
+        return dict(order)
+
+    def fetch_order(self, id, symbol=None, params={}):
+        order = self.orders.get(id)
+        if order is None:
+            raise ccxt.OrderNotFound(f"Paper order {id} not found")
+        return dict(order)
+
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params={}):
+        return [dict(order) for order in self.orders.values()
+                if order['status'] == 'open' and (symbol is None or order['symbol'] == symbol)]
+
+    def fetch_orders(self, symbol=None, since=None, limit=None, params={}):
+        return [dict(order) for order in self.orders.values() if symbol is None or order['symbol'] == symbol]
+
+    def fetch_ticker(self, symbol, params={}):
+        last = self._reference_price(symbol)
+        book = self.book(symbol)
+        return {'symbol': symbol, 'timestamp': self.milliseconds(), 'last': last, 'close': last,
+                'bid': book.best_bid(), 'ask': book.best_ask()}
+
+    def fetch_balance(self, params={}):
+        wallet = self.balance[self.quote]
+        return {'total': {self.quote: wallet}, 'free': {self.quote: wallet}, 'used': {self.quote: 0.0}}
+
+    def equity(self):
+        return self.balance[self.quote] + sum(self._unrealized_pnl(symbol) for symbol in self.positions)
+
+    def fetch_positions(self, symbols=None, params={}):
+        positions = []
+        for symbol, position in self.positions.items():
+            if symbols and symbol not in symbols:
+                continue
+            contracts = position['contracts']
+            positions.append({
+                'info': {'side': 'Buy' if contracts > 0 else 'Sell'},
+                'symbol': symbol,
+                'side': 'long' if contracts > 0 else 'short',
+                'contracts': abs(contracts),
+                'entryPrice': position['entryPrice'],
+                'markPrice': self.last_price.get(symbol),
+                'unrealizedPnl': self._unrealized_pnl(symbol),
+            })
+        return positions
+
+    def set_leverage(self, leverage, symbol=None, params={}):
+        self.leverage[symbol] = leverage
+        return {'symbol': symbol, 'leverage': leverage}
+
+    def trigger_bounds(self, symbol):
+        """
+        Price band within which a trade of symbol cannot fill or trigger anything.
+
+        Returns:
+        - tuple: (low, high). A trade at or below low or at or above high may fill a resting
+          order or fire a trigger; a trade strictly between them only moves the last price.
+        """
+        book = self.book(symbol)
+        triggers = self._triggers[symbol]
+        bid, ask = book.best_bid(), book.best_ask()
+        low = max(bid if bid is not None else -np.inf, triggers['down'][-1][0] if triggers['down'] else -np.inf)
+        high = min(ask if ask is not None else np.inf, triggers['up'][0][0] if triggers['up'] else np.inf)
+        return low, high
+
+    def on_trade(self, symbol, price, amount=float('inf'), timestamp=None):
+        """
+        Feed one trade print: fire triggered stops, then match resting limit orders.
+        """
+        if timestamp is not None:
+            self.timestamp = int(timestamp)
+        self._process_price(symbol, price, amount, continuous=False)
+
+    def on_candle(self, symbol, candle):
+        """
+        Feed one OHLCV candle ([timestamp, open, high, low, close, volume]).
+
+        The bar is walked open -> low -> high -> close on up bars and open -> high -> low -> close
+        on down bars, so stops and take-profits inside the bar fire in a plausible order. Triggers
+        touched after the open fill at their own level; a gap through a trigger at the open fills
+        at the open. The bar volume times the participation rate is shared across the four points.
+        """
+        timestamp, open_, high, low, close, volume = candle[:6]
+        self.timestamp = int(timestamp)
+        path = (open_, low, high, close) if close >= open_ else (open_, high, low, close)
+        liquidity = volume / len(path) if volume else float('inf')
+        self._bar_volume = volume
+        for index, price in enumerate(path):
+            self._process_price(symbol, float(price), liquidity, continuous=index > 0)
+        self._bar_volume = None
+
+    def replay_candles(self, symbol, ohlcv, strategy=None):
+        """
+        Replay candles through the engine, calling strategy(engine, symbol, index, candle) after
+        each bar so it can place orders for the next one. Returns the equity curve.
+        """
+        ohlcv = np.asarray(ohlcv, dtype=float)
+        equity = np.empty(len(ohlcv))
+        for index, candle in enumerate(ohlcv):
+            self.on_candle(symbol, candle)
+            if strategy is not None:
+                strategy(self, symbol, index, candle)
+            equity[index] = self.equity()
+        return equity
+
+    def _process_price(self, symbol, price, liquidity, continuous):
+        book = self.book(symbol)
+        self.last_price[symbol] = price
+        self._fire_triggers(symbol, price, continuous)
+        for order, quantity in book.match(price, liquidity * self.participation):
+            self._apply_fill(order, quantity, order['price'], is_maker=True)
+
+    def _reference_price(self, symbol):
+        price = self.last_price.get(symbol)
+        if price is None:
+            raise ccxt.ExchangeError(f"No price for {symbol} yet; replay a trade or candle first")
+        return price
+
+    def _fill_market(self, order, price):
+        quantity = order['remaining']
+        if order['reduceOnly']:
+            contracts = self.positions.get(order['symbol'], {}).get('contracts', 0.0)
+            opposing = -contracts if order['side'] == 'buy' else contracts
+            quantity = min(quantity, max(opposing, 0.0))
+        if quantity > EPSILON:
+            fill_price = self.slippage_model(order['side'], price, quantity, self._bar_volume)
+            self._apply_fill(order, quantity, fill_price, is_maker=False)
+        if order['status'] == 'open':
+            order['status'] = 'canceled'
+
+    def _add_trigger(self, order):
+        is_stop = order['type'] in STOP_ORDER_TYPES
+        # Sell stops and buy take-profits fire as price falls, the other two as it rises
+        direction = 'down' if (order['side'] == 'sell') == is_stop else 'up'
+        self._trigger_seq += 1
+        insort(self._triggers[order['symbol']][direction], (order['stopPrice'], self._trigger_seq, order))
+
+    def _fire_triggers(self, symbol, price, continuous):
+        triggers = self._triggers[symbol]
+        fired = []
+        down = triggers['down']
+        while down and down[-1][0] >= price:
+            fired.append(down.pop()[2])
+        up = triggers['up']
+        index = bisect_left(up, (price, float('inf')))
+        fired.extend(entry[2] for entry in up[:index])
+        del up[:index]
+        for order in fired:
+            self._fill_market(order, order['stopPrice'] if continuous else price)
+
+    def _apply_fill(self, order, quantity, price, is_maker):
+        notional = quantity * price
+        fee = self.fee_model(notional, is_maker)
+        order['filled'] += quantity
+        order['remaining'] = max(order['amount'] - order['filled'], 0.0)
+        order['cost'] += notional
+        order['average'] = order['cost'] / order['filled']
+        order['fee']['cost'] += fee
+        if order['remaining'] <= EPSILON:
+            order['remaining'] = 0.0
+            order['status'] = 'closed'
+
+        realized = self._update_position(order['symbol'], quantity if order['side'] == 'buy' else -quantity, price)
+        self.balance[self.quote] += realized - fee
+        self.trades.append({
+            'timestamp': self.milliseconds(),
+            'order_id': order['id'],
+            'symbol': order['symbol'],
+            'side': order['side'],
+            'price': price,
+            'amount': quantity,
+            'fee': fee,
+            'realized_pnl': realized,
+            'maker': is_maker,
+        })
+
+    def _update_position(self, symbol, signed_quantity, price):
+        position = self.positions.get(symbol)
+        if position is None:
+            self.positions[symbol] = {'contracts': signed_quantity, 'entryPrice': price}
+            return 0.0
+
+        current = position['contracts']
+        new = current + signed_quantity
+        realized = 0.0
+        if current * signed_quantity < 0:
+            closed = min(abs(signed_quantity), abs(current))
+            realized = np.sign(current) * (price - position['entryPrice']) * closed
+
+        if abs(new) <= EPSILON:
+            del self.positions[symbol]
+        elif current * new < 0:
+            position.update(contracts=new, entryPrice=price)
+        elif abs(new) > abs(current):
+            position['entryPrice'] = (abs(current) * position['entryPrice'] + abs(signed_quantity) * price) / abs(new)
+            position['contracts'] = new
+        else:
+            position['contracts'] = new
+        return float(realized)
+
+    def _unrealized_pnl(self, symbol):
+        position = self.positions.get(symbol)
+        if position is None:
+            return 0.0
+        return position['contracts'] * (self.last_price[symbol] - position['entryPrice'])
+
+if __name__ == "__main__":
+    from mock_exchange import generate_synthetic_candles
+
+    # Example: SMA crossover with a protective stop, replayed at full speed
+    candles = generate_synthetic_candles(5000, seed=7)
+    closes = candles[:, 4]
+    engine = PaperTradingEngine(balance=10000, slippage_model=VolumeSlippage(impact=0.1))
+
+    def sma_strategy(engine, symbol, index, candle):
+        if index < 50:
+            return
+        fast = closes[index - 10:index + 1].mean()
+        slow = closes[index - 50:index + 1].mean()
+        in_position = symbol in engine.positions
+        if fast > slow and not in_position:
+            engine.create_order(symbol, 'market', 'buy', 0.1)
+            engine.create_order(symbol, 'stop', 'sell', 0.1, candle[4] * 0.98)
+        elif fast < slow and in_position:
+            for order in engine.fetch_open_orders(symbol):
+                engine.cancel_order(order['id'])
+            engine.create_order(symbol, 'market', 'sell', engine.positions[symbol]['contracts'])
+
+    start = time.perf_counter()
+    equity = engine.replay_candles('BTCUSDT', candles, sma_strategy)
+    elapsed = time.perf_counter() - start
+    logging.info("Replayed %d candles and %d fills in %.3f s", len(candles), len(engine.trades), elapsed)
+    logging.info("Final equity: %.2f", equity[-1])
@@ -0,0 +1,152 @@
+import logging
+import time
+import numpy as np
+import pandas as pd
+from performance_metrics import compute_metrics
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def signals_to_positions(signals, allow_short=False):
+    """
+    Turn a panel of 'buy'/'sell'/'hold' signals into target directions (1 long, -1 short, 0 flat).
+
+    A 'buy' opens a long position and a 'sell' closes it (or opens a short with allow_short);
+    'hold' keeps the previous direction.
+
+    Parameters:
+    - signals (pd.DataFrame): Signal per bar (rows) and symbol (columns).
+    - allow_short (bool): Map 'sell' to a short position instead of flat.
+
+    Returns:
+    - pd.DataFrame: Directions as floats.
+    """
+    mapping = {'buy': 1.0, 'sell': -1.0 if allow_short else 0.0}
+    directions = signals.apply(lambda column: column.map(mapping))
+    return directions.ffill().fillna(0.0)
+
+def position_sizes(balance, risk_percentage, entry_price, stop_loss):
+    """
+    risk_management.calculate_position_size for arrays of prices (one per symbol).
+
+    Symbols whose stop equals the entry price have no defined risk and get a size of 0.
+
+    Returns:
+    - np.ndarray: Quantities, capped at balance / entry_price.
+    """
+    entry_price = np.asarray(entry_price, dtype=float)
+    distance = np.abs(entry_price - stop_loss)
+    risk_amount = balance * (risk_percentage / 100)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        position_size = np.where(distance > 0, risk_amount / distance, 0.0)
+    return np.minimum(position_size, balance / entry_price)
+
+def backtest_portfolio(close, directions, initial_capital=10000, risk_percentage=1.0, stop_loss_pct=0.02,
+                       max_leverage=1.0, rebalance_every=24, transaction_cost=0.001):
+    """
+    Backtest signals for many symbols on a time-aligned price panel with one shared cash account.
+
+    Each bar is processed for all symbols at once with NumPy:
+    1. Positions are marked to the bar's close and equity is updated.
+    2. Symbols whose direction changed, and every held symbol on rebalance bars, get a new target
+       quantity from position_sizes: risk_percentage of equity per trade with the stop
+       stop_loss_pct away from the close, capped at equity / price per symbol.
+    3. If the gross exposure then exceeds max_leverage times equity, the resized positions are
+       scaled down proportionally to fit (all positions, if the others alone exceed the cap).
+    4. The difference is traded at the close, paying transaction_cost on the traded notional.
+
+    Symbols without a price on a bar (NaN, e.g. before listing) are valued at their last price and
+    not traded on that bar.
+
+    Parameters:
+    - close (pd.DataFrame): Close prices, one column per symbol, rows aligned in time.
+    - directions (pd.DataFrame): Target direction per bar and symbol (1, -1 or 0), e.g. from
+      signals_to_positions, with the same shape as close.
+    - initial_capital (float): Starting cash.
+    - risk_percentage (float): Percentage of equity risked per position.
+    - stop_loss_pct (float): Stop distance used for sizing, as a fraction of the price.
+    - max_leverage (float): Maximum gross exposure as a multiple of equity.
+    - rebalance_every (int): Bars between resizing all open positions (0 to size only on signal changes).
+    - transaction_cost (float): Cost per unit of traded notional.
+
+    Returns:
+    - tuple: (history DataFrame with equity, cash, gross_exposure, leverage, turnover and costs per bar,
+      positions DataFrame with the quantity held per bar and symbol, final equity)
+    """
+    if close.shape != directions.shape:
+        raise ValueError(f"Price panel {close.shape} and directions {directions.shape} are not aligned")
+    prices = close.to_numpy(dtype=float)
+    tradable = np.isfinite(prices) & (prices > 0)
+    marks = close.ffill().fillna(0.0).to_numpy(dtype=float)
+    targets = np.nan_to_num(directions.to_numpy(dtype=float))
+    n_bars, n_symbols = prices.shape
+
+    quantity = np.zeros(n_symbols)
+    direction = np.zeros(n_symbols)
+    cash = float(initial_capital)
+    history = np.zeros((n_bars, 6))
+    positions = np.zeros((n_bars, n_symbols))
+
+    for t in range(n_bars):
+        price, mark, can_trade = prices[t], marks[t], tradable[t]
+        equity = cash + quantity @ mark
+
+        changed = (targets[t] != direction) & can_trade
+        resize = changed
+        if rebalance_every and t % rebalance_every == 0:
+            resize = (changed | (direction != 0)) & can_trade
+        new_quantity = quantity.copy()
+        if resize.any() and equity > 0:
+            wanted = np.where(changed, targets[t], direction)[resize]
+            entry = price[resize]
+            size = position_sizes(equity, risk_percentage, entry, entry * (1 - stop_loss_pct * wanted))
+            new_quantity[resize] = np.where(wanted != 0, wanted * size, 0.0)
+            direction[changed] = targets[t][changed]
+        elif equity <= 0:
+            new_quantity[can_trade] = 0.0
+            direction[can_trade] = 0.0
+
+        gross = np.abs(new_quantity) @ mark
+        if equity > 0 and gross > max_leverage * equity:
+            # Fit the resized positions into the remaining room; only if the untouched positions
+            # alone are over the cap is everything that can trade scaled down
+            movable = resize if np.abs(new_quantity[~resize]) @ mark[~resize] <= max_leverage * equity else can_trade
+            fixed = gross - np.abs(new_quantity[movable]) @ mark[movable]
+            if gross > fixed:
+                new_quantity[movable] *= max(max_leverage * equity - fixed, 0.0) / (gross - fixed)
+
+        trades = new_quantity - quantity
+        traded = np.abs(trades) @ mark
+        costs = traded * transaction_cost
+        cash -= trades @ mark + costs
+        quantity = new_quantity
+        equity = cash + quantity @ mark
+        gross = np.abs(quantity) @ mark
+        history[t] = (equity, cash, gross, gross / equity if equity > 0 else np.inf, traded, costs)
+        positions[t] = quantity
+
+    history = pd.DataFrame(history, index=close.index, columns=['equity', 'cash', 'gross_exposure', 'leverage', 'turnover', 'costs'])
+    positions = pd.DataFrame(positions, index=close.index, columns=close.columns)
+    final_balance = float(history['equity'].iloc[-1]) if n_bars else float(initial_capital)
+    logging.info("Portfolio backtest completed. Final balance: %.2f", final_balance)
+    return history, positions, final_balance
+
+if __name__ == "__main__":
+    # Example: 300 symbols, one year of hourly bars, SMA crossover directions
+    rng = np.random.default_rng(0)
+    n_bars, n_symbols = 24 * 365, 300
+    index = pd.date_range('2023-01-01', periods=n_bars, freq='h')
+    log_returns = rng.normal(0, 0.004, (n_bars, n_symbols)) + rng.normal(0, 0.002, (n_bars, 1))
+    close = pd.DataFrame(100 * np.exp(np.cumsum(log_returns, axis=0)), index=index,
+                         columns=[f"SYM{i}/USDT" for i in range(n_symbols)])
+    close.iloc[:500, :20] = np.nan  # Symbols listed later
+    fast, slow = close.rolling(48).mean(), close.rolling(480).mean()
+    directions = pd.DataFrame(np.where(fast > slow, 1.0, 0.0), index=index, columns=close.columns)
+
+    start = time.perf_counter()
+    history, positions, final_balance = backtest_portfolio(close, directions, max_leverage=2.0, rebalance_every=24 * 7)
+    logging.info("Backtested %d symbols x %d bars in %.2f s", n_symbols, n_bars, time.perf_counter() - start)
+    logging.info("Max leverage %.2f, total costs %.2f", history['leverage'].max(), history['costs'].sum())
+    metrics = compute_metrics(history['equity'], positions=history['leverage'], initial_capital=10000)
+    logging.info("Sharpe %.2f, max drawdown %.2f%%, exposure %.1f%%", metrics['sharpe'], 100 * metrics['max_drawdown'],
+                 100 * metrics['exposure'])
@@ -1,10 +1,9 @@
 import logging
+import time
 import pandas as pd
 import ccxt
 import numpy as np
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense
-from scipy.optimize import minimize
+from portfolio_optimizer import PortfolioOptimizer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -16,80 +15,166 @@ exchange = ccxt.bybit({
     'enableRateLimit': True,
 })
 
-def calculate_returns(df):
-    returns = df.pct_change().mean() * 252
-    cov_matrix = df.pct_change().cov() * 252
+def calculate_returns(df, estimator=None):
+    """
+    Annualized mean returns and covariance matrix of a price DataFrame (one column per asset).
+
+    Parameters:
+    - df (pd.DataFrame): Prices, oldest first, with a monotonically increasing index.
+    - estimator (CovarianceEstimator): Optional streaming estimator. Only the rows after the last
+      index it has seen are fed to it, so repeated calls on a growing DataFrame never rescan the
+      history. Its halflife and shrinkage settings apply.
+
+    Returns:
+    - tuple: (pd.Series of mean returns, pd.DataFrame covariance matrix)
+    """
+    if estimator is None:
+        returns = df.pct_change().mean() * 252
+        cov_matrix = df.pct_change().cov() * 252
+        return returns, cov_matrix
+
+    if estimator.assets is None:
+        estimator.assets = list(df.columns)
+    new_rows = df if estimator.last_index is None else df.loc[df.index > estimator.last_index]
+    new_rows = new_rows[estimator.assets]
+    estimator.update_prices_many(new_rows.to_numpy(dtype=float), new_rows.index)
+    returns = pd.Series(estimator.mean_returns(), index=estimator.assets)
+    cov_matrix = pd.DataFrame(estimator.covariance(), index=estimator.assets, columns=estimator.assets)
     return returns, cov_matrix
 
-def optimize_portfolio(returns, cov_matrix, risk_free_rate=0.01):
-    num_assets = len(returns)
-    args = (returns, cov_matrix, risk_free_rate)
-
-    def portfolio_performance(weights, returns, cov_matrix, risk_free_rate):
-        returns = np.dot(weights, returns)
-        volatility = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-        sharpe_ratio = (returns - risk_free_rate) / volatility
-        return -sharpe_ratio
-
-    constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
-    bounds = tuple((0, 1) for asset in range(num_assets))
-    result = minimize(portfolio_performance, num_assets*[1./num_assets,], args=args, method='SLSQP', bounds=bounds, constraints=constraints)
-    return result.x
-
-def build_portfolio_model(input_dim):
-    model = Sequential()
-    model.add(Dense(64, input_dim=input_dim, activation='relu'))
-    model.add(Dense(32, activation='relu'))
-    model.add(Dense(1, activation='linear'))
-    model.compile(optimizer='adam', loss='mean_squared_error')
-    return model
-
-def optimize_portfolio(returns, cov_matrix):
-    num_assets = len(returns)
-    model = build_portfolio_model(num_assets)
-
-    # Generate synthetic data for training
-    X_train = np.random.rand(1000, num_assets)
-    y_train = np.dot(X_train, returns)
-
-    model.fit(X_train, y_train, epochs=100, batch_size=32)
-
-    weights = model.predict(np.array([returns]))[0]
-    return weights / np.sum(weights)
-
-def fetch_derivative_positions():
-    """Fetch current derivative positions from Bybit."""
+# Optimizers keep their last solution, so repeated rebalancing is warm-started
+_optimizers = {}
+
+def optimize_portfolio(returns, cov_matrix, risk_free_rate=0.01, objective='max_sharpe', long_only=True):
+    """
+    Optimal portfolio weights for expected returns and a covariance matrix.
+
+    Parameters:
+    - returns (array-like): Expected (annualized) return per asset.
+    - cov_matrix (array-like): Covariance matrix of asset returns.
+    - risk_free_rate (float): Risk-free rate for the Sharpe ratio.
+    - objective (str): 'max_sharpe' or 'min_variance'.
+    - long_only (bool): Restrict weights to [0, 1]; otherwise the closed-form solution is used.
+
+    Returns:
+    - np.ndarray: Weights summing to 1.
+    """
+    key = (risk_free_rate, objective, long_only)
+    optimizer = _optimizers.get(key)
+    if optimizer is None:
+        optimizer = _optimizers[key] = PortfolioOptimizer(risk_free_rate, objective, long_only)
+    return optimizer.optimize(returns, cov_matrix)
+
+# Short-lived cache of bulk exchange responses: key -> (expiry, value), oldest first
+_market_cache = {}
+MARKET_CACHE_SIZE = 256
+
+def _cached(key, ttl, fetch):
+    now = time.monotonic()
+    entry = _market_cache.get(key)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+    value = fetch()
+    _market_cache.pop(key, None)
+    if len(_market_cache) >= MARKET_CACHE_SIZE:
+        # Ticker keys include the asset list, so drop expired entries and then the oldest ones
+        for stale in [stale for stale, (expiry, _) in _market_cache.items() if expiry <= now]:
+            del _market_cache[stale]
+        while len(_market_cache) >= MARKET_CACHE_SIZE:
+            del _market_cache[next(iter(_market_cache))]
+    _market_cache[key] = (now + ttl, value)
+    return value
+
+def _open_positions(ttl=2.0):
+    positions = _cached(('positions', id(exchange)), ttl, exchange.fetch_positions)
+    return [position for position in positions if position['info'].get('side') != 'None' and position.get('contracts')]
+
+def fetch_derivative_positions(ttl=2.0):
+    """Fetch current derivative positions from Bybit with one bulk request, cached for ttl seconds."""
     try:
-        positions = exchange.fetch_positions()
-        derivative_positions = []
-        for position in positions:
-            if position['info']['side'] != 'None':  # Only consider positions that are open
-                derivative_positions.append({
-                    'symbol': position['symbol'],
-                    'side': position['side'],
-                    'quantity': position['contracts'],
-                    'entry_price': position['entryPrice']
-                })
-        logging.info(f"Fetched derivative positions: {derivative_positions}")
+        derivative_positions = [{
+            'symbol': position['symbol'],
+            'side': position['side'],
+            'quantity': position['contracts'],
+            'entry_price': position['entryPrice']
+        } for position in _open_positions(ttl)]
+        logging.info(f"Fetched {len(derivative_positions)} derivative positions")
         return derivative_positions
     except Exception as e:
         logging.error(f"Error fetching derivative positions: {e}")
         return []
 
-def fetch_current_prices(assets):
-    """Fetch current prices for given assets from the exchange."""
-    prices = {}
+def fetch_current_prices(assets, ttl=2.0):
+    """Fetch current prices for given assets with one fetch_tickers request, cached for ttl seconds."""
+    assets = sorted(set(assets))
+    if not assets:
+        return {}
     try:
-        for asset in assets:
-            ticker = exchange.fetch_ticker(asset)
-            prices[asset] = ticker['last']
-            logging.info(f"Fetched price for {asset}: {ticker['last']}")
+        tickers = _cached(('tickers', id(exchange), tuple(assets)), ttl, lambda: exchange.fetch_tickers(assets))
     except ccxt.NetworkError as e:
-        logging.error(f"Network error fetching price: {e}")
+        logging.error(f"Network error fetching prices: {e}")
+        return {}
     except ccxt.BaseError as e:
-        logging.error(f"Error fetching price: {e}")
+        logging.error(f"Error fetching prices: {e}")
+        return {}
+    prices = {asset: tickers[asset]['last'] for asset in assets if asset in tickers}
+    logging.info(f"Fetched prices for {len(prices)} of {len(assets)} assets")
     return prices
 
+def portfolio_snapshot(target_weights=None, ttl=2.0):
+    """
+    Build the portfolio table from one bulk fetch_positions request.
+
+    Prices come from each position's mark price; fetch_tickers is only called for positions that do
+    not report one. Values, weights and rebalancing targets are computed as column operations.
+
+    Parameters:
+    - target_weights (dict): Optional target weight per asset, adding target_weight, target_value,
+      target_quantity and quantity_change columns (NaN for assets without a target).
+    - ttl (float): Seconds an exchange response is reused.
+
+    Returns:
+    - pd.DataFrame: One row per open position with asset, side, quantity, entry_price, price,
+      notional, value (unrealized PnL) and weight.
+    """
+    positions = _open_positions(ttl)
+    columns = ['asset', 'side', 'quantity', 'entry_price', 'price', 'notional', 'value', 'weight']
+    if not positions:
+        return pd.DataFrame(columns=columns)
+
+    asset = np.array([position['symbol'] for position in positions], dtype=object)
+    side = np.array([position['side'] for position in positions], dtype=object)
+    quantity = np.array([position['contracts'] for position in positions], dtype=float)
+    entry_price = np.array([position['entryPrice'] for position in positions], dtype=float)
+    price = np.array([position.get('markPrice') for position in positions], dtype=float)
+
+    missing = np.isnan(price)
+    if missing.any():
+        prices = fetch_current_prices(asset[missing].tolist(), ttl)
+        price[missing] = [prices.get(symbol, np.nan) for symbol in asset[missing]]
+    price = np.nan_to_num(price)
+
+    direction = np.where(side == 'short', -1.0, 1.0)
+    value = direction * quantity * (price - entry_price)
+    total_value = value.sum()
+    weight = value / total_value if total_value != 0 else np.zeros_like(value)
+    portfolio = pd.DataFrame({'asset': asset, 'side': side, 'quantity': quantity, 'entry_price': entry_price,
+                              'price': price, 'notional': quantity * price, 'value': value, 'weight': weight})
+    if target_weights is not None:
+        _add_targets(portfolio, target_weights, total_value)
+    return portfolio
+
+def _add_targets(portfolio, target_weights, total_value):
+    target_weight = portfolio['asset'].map(target_weights).to_numpy(dtype=float)
+    price = portfolio['price'].to_numpy()
+    target_value = total_value * target_weight
+    with np.errstate(divide='ignore', invalid='ignore'):
+        target_quantity = np.where(price > 0, target_value / price, 0.0)
+    portfolio['target_weight'] = target_weight
+    portfolio['target_value'] = target_value
+    portfolio['target_quantity'] = target_quantity
+    portfolio['quantity_change'] = target_quantity - portfolio['quantity'].to_numpy()
+
 def track_portfolio_performance(portfolio):
     """Track and log the performance of the portfolio."""
     if portfolio.empty:
@@ -102,9 +187,6 @@ def track_portfolio_performance(portfolio):
 
     logging.info(f"Total Portfolio Value: {total_value:.2f}")
     logging.info(f"Total Weighted Performance: {total_weighted_performance:.2f}")
-    logging.info("Individual Asset Performance:")
-    for index, row in portfolio.iterrows():
-        logging.info(f"Asset: {row['asset']}, Quantity: {row['quantity']:.6f}, Value: {row['value']:.2f}, Weight: {row['weight']:.2f}, Weighted Performance: {row['weighted_performance']:.2f}")
 
     # Format the portfolio DataFrame as a table
     formatted_portfolio = portfolio[['asset', 'quantity', 'value', 'weight', 'weighted_performance']].to_string(index=False)
@@ -116,64 +198,34 @@ def rebalance_portfolio(portfolio, target_weights):
         logging.warning("Portfolio is empty. Cannot rebalance.")
         return
     
-    assets = portfolio['asset'].tolist()
-    current_prices = fetch_current_prices(assets)
-    total_value = portfolio['value'].sum()
-
-    for index, row in portfolio.iterrows():
-        asset = row['asset']
-        if asset in target_weights:
-            target_weight = target_weights[asset]
-            target_value = total_value * target_weight
-            current_price = current_prices.get(asset, 0)
-            target_quantity = target_value / current_price if current_price else 0
-            logging.info(f"Rebalancing {asset}: current value = {row['value']:.2f}, target value = {target_value:.2f}, current quantity = {row['quantity']:.6f}, target quantity = {target_quantity:.6f}")
-            portfolio.at[index, 'weight'] = target_weight
-            portfolio.at[index, 'value'] = target_value
-            portfolio.at[index, 'quantity'] = target_quantity
-        else:
-            logging.warning(f"Target weight for {asset} not found. Skipping.")
+    if 'price' not in portfolio:
+        portfolio['price'] = portfolio['asset'].map(fetch_current_prices(portfolio['asset'].tolist())).fillna(0.0)
+    _add_targets(portfolio, target_weights, portfolio['value'].sum())
+
+    has_target = portfolio['target_weight'].notna()
+    for asset in portfolio.loc[~has_target, 'asset']:
+        logging.warning(f"Target weight for {asset} not found. Skipping.")
+    portfolio.loc[has_target, 'weight'] = portfolio.loc[has_target, 'target_weight']
+    portfolio.loc[has_target, 'value'] = portfolio.loc[has_target, 'target_value']
+    portfolio.loc[has_target, 'quantity'] = portfolio.loc[has_target, 'target_quantity']
+    portfolio.drop(columns=['target_weight', 'target_value', 'target_quantity', 'quantity_change'], inplace=True)
     
     logging.info("Portfolio rebalanced.")
     logging.info(portfolio)
 
 def main():
     """Main function to manage and rebalance the portfolio."""
-    # Fetch real-time derivative positions
-    derivative_positions = fetch_derivative_positions()
+    # Fetch real-time derivative positions and prices with one bulk request
+    try:
+        portfolio = portfolio_snapshot()
+    except ccxt.BaseError as e:
+        logging.error(f"Error fetching derivative positions: {e}")
+        return
     
-    if not derivative_positions:
+    if portfolio.empty:
         logging.error("No derivative positions found. Ensure your account has open positions and API credentials are correct.")
         return
 
-    # Create a portfolio DataFrame based on derivative positions
-    portfolio_data = {
-        'asset': [pos['symbol'] for pos in derivative_positions],
-        'quantity': [pos['quantity'] for pos in derivative_positions],
-        'entry_price': [pos['entry_price'] for pos in derivative_positions],
-        'side': [pos['side'] for pos in derivative_positions]
-    }
-    portfolio = pd.DataFrame(portfolio_data)
-
-    # Fetch current prices and update portfolio values
-    current_prices = fetch_current_prices(portfolio['asset'].tolist())
-    
-    def calculate_position_value(row):
-        current_price = current_prices.get(row['asset'], 0)
-        if row['side'] == 'long':
-            return row['quantity'] * (current_price - row['entry_price'])
-        else:  # 'short'
-            return row['quantity'] * (row['entry_price'] - current_price)
-    
-    portfolio['value'] = portfolio.apply(calculate_position_value, axis=1)
-    
-    # Set initial weights (assuming equal weighting initially, adjust as needed)
-    total_value = portfolio['value'].sum()
-    if total_value != 0:
-        portfolio['weight'] = portfolio['value'] / total_value
-    else:
-        portfolio['weight'] = 0
-
     # Track portfolio performance
     track_portfolio_performance(portfolio)
     
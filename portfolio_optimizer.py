@@ -0,0 +1,311 @@
+import logging
+import time
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def _inputs(returns, cov_matrix):
+    returns = np.asarray(returns, dtype=float).ravel()
+    cov = np.asarray(cov_matrix, dtype=float)
+    if cov.shape != (returns.size, returns.size):
+        raise ValueError(f"Covariance matrix of shape {cov.shape} does not match {returns.size} assets")
+    return returns, cov
+
+def min_variance_weights(cov_matrix):
+    """
+    Closed-form global minimum-variance portfolio (short positions allowed).
+
+    Parameters:
+    - cov_matrix (array-like): Covariance matrix of asset returns.
+
+    Returns:
+    - np.ndarray: Weights summing to 1.
+    """
+    cov = np.asarray(cov_matrix, dtype=float)
+    x = np.linalg.solve(cov, np.ones(len(cov)))
+    return x / x.sum()
+
+def max_sharpe_weights(returns, cov_matrix, risk_free_rate=0.01):
+    """
+    Closed-form tangency (maximum Sharpe ratio) portfolio (short positions allowed).
+
+    Parameters:
+    - returns (array-like): Expected returns per asset.
+    - cov_matrix (array-like): Covariance matrix of asset returns.
+    - risk_free_rate (float): Risk-free rate in the same units as returns.
+
+    Returns:
+    - np.ndarray: Weights summing to 1.
+    """
+    returns, cov = _inputs(returns, cov_matrix)
+    x = np.linalg.solve(cov, returns - risk_free_rate)
+    return x / x.sum()
+
+class OptimizationError(RuntimeError):
+    """
+    Raised when the long-only solver finds no feasible portfolio or does not converge.
+    """
+
+def _equality_solution(cov, A, b, free):
+    # Minimize w' cov w subject to A w = b with the assets outside `free` fixed at zero.
+    # Returns the weights and the bound multipliers cov w - A' nu of the fixed assets, or None
+    # if the free assets cannot satisfy the equality constraints.
+    index = np.flatnonzero(free)
+    k, m = index.size, len(b)
+    if k < m or np.linalg.matrix_rank(A[:, index]) < m:
+        return None
+    kkt = np.zeros((k + m, k + m))
+    kkt[:k, :k] = cov[np.ix_(index, index)]
+    kkt[:k, k:] = -A[:, index].T
+    kkt[k:, :k] = A[:, index]
+    solution = np.linalg.solve(kkt, np.concatenate([np.zeros(k), b]))
+    weights = np.zeros(len(cov))
+    weights[index] = solution[:k]
+    multipliers = cov @ weights - A.T @ solution[k:]
+    multipliers[free] = 0.0
+    return weights, multipliers
+
+def solve_long_only(cov_matrix, A, b, free=None, tol=1e-10, max_iter=None):
+    """
+    Minimize w' cov w subject to A w = b and w >= 0 with the Goldfarb-Idnani dual active-set method.
+
+    The solver starts from the equality-constrained minimum with the assets outside `free` fixed at
+    zero (dropping any whose multiplier is negative) and then adds violated bounds one at a time.
+    Each step moves towards the solution with the new bound active and stops early if an active
+    bound's multiplier reaches zero, which is then dropped, so every iterate stays optimal for its
+    active set and the method terminates. Passing the free set of a nearby solution as a warm start
+    usually leaves only a few bounds to add.
+
+    Parameters:
+    - cov_matrix (np.ndarray): Covariance matrix (n x n).
+    - A (np.ndarray): Equality constraint rows (m x n), linearly independent.
+    - b (np.ndarray): Equality constraint values (m).
+    - free (np.ndarray): Boolean mask of assets allowed to be non-zero at the start. Defaults to all.
+    - tol (float): Tolerance for negative weights.
+    - max_iter (int): Iteration limit; defaults to 10 * (n + m).
+
+    Returns:
+    - tuple: (weights, free mask) where the mask can warm-start the next solve.
+
+    Raises:
+    - OptimizationError: The constraints cannot be met with non-negative weights, or the
+      iteration limit was reached.
+    """
+    cov = np.asarray(cov_matrix, dtype=float)
+    A = np.atleast_2d(np.asarray(A, dtype=float))
+    b = np.atleast_1d(np.asarray(b, dtype=float))
+    n, m = len(cov), len(b)
+    # A tiny ridge keeps the problem strictly convex when the covariance matrix is singular
+    scale = max(np.trace(cov) / n, np.finfo(float).tiny)
+    cov = cov + 1e-12 * scale * np.eye(n)
+    max_iter = 10 * (n + m) if max_iter is None else max_iter
+
+    # Start from the warm start's active set, dropping bounds with negative multipliers
+    free = np.ones(n, dtype=bool) if free is None else np.array(free, dtype=bool)
+    state = _equality_solution(cov, A, b, free)
+    while state is not None and state[1].min() < 0:
+        free[np.argmin(state[1])] = True
+        state = _equality_solution(cov, A, b, free)
+    if state is None:
+        free[:] = True
+        state = _equality_solution(cov, A, b, free)
+        if state is None:
+            raise OptimizationError("Equality constraints are linearly dependent")
+    weights, multipliers = state
+
+    for _ in range(max_iter):
+        candidates = np.where(free, weights, np.inf)
+        added = np.argmin(candidates)
+        if candidates[added] >= -tol:
+            weights[~free] = 0.0
+            return np.maximum(weights, 0.0), free
+        multipliers[added] = 0.0
+        while True:
+            # Primal direction z and change r of the active multipliers for adding the bound
+            index = np.flatnonzero(free)
+            k = index.size
+            kkt = np.zeros((k + m, k + m))
+            kkt[:k, :k] = cov[np.ix_(index, index)]
+            kkt[:k, k:] = A[:, index].T
+            kkt[k:, :k] = A[:, index]
+            rhs = np.zeros(k + m)
+            rhs[np.searchsorted(index, added)] = 1.0
+            solution = np.linalg.lstsq(kkt, rhs, rcond=None)[0]
+            z = np.zeros(n)
+            z[index] = solution[:k]
+            r = np.where(free, 0.0, -cov @ z - A.T @ solution[k:])
+
+            # The step stops where an active bound's multiplier reaches zero ...
+            shrinking = ~free & (r > 0)
+            ratios = np.where(shrinking, multipliers / np.where(shrinking, r, 1.0), np.inf)
+            blocking = np.argmin(ratios)
+            dual_step = ratios[blocking]
+            if z[added] <= 1e-12 / scale:
+                # The new bound depends on the active ones: only the multipliers can move
+                if not np.isfinite(dual_step):
+                    raise OptimizationError("No portfolio with non-negative weights meets the constraints")
+                multipliers -= dual_step * r
+                multipliers[added] += dual_step
+                free[blocking] = True
+                multipliers[blocking] = 0.0
+                continue
+
+            # ... or where the new bound is met
+            primal_step = -weights[added] / z[added]
+            step = min(primal_step, dual_step)
+            weights += step * z
+            multipliers -= step * r
+            multipliers[added] += step
+            if primal_step <= dual_step:
+                weights[added] = 0.0
+                free[added] = False
+                break
+            free[blocking] = True
+            multipliers[blocking] = 0.0
+    raise OptimizationError(f"Long-only solver did not converge in {max_iter} iterations")
+
+def long_only_min_variance(cov_matrix, free=None):
+    """
+    Minimum-variance portfolio with weights between 0 and 1.
+
+    Returns:
+    - tuple: (weights, free mask for warm starts).
+    """
+    cov = np.asarray(cov_matrix, dtype=float)
+    n = len(cov)
+    return solve_long_only(cov, np.ones((1, n)), [1.0], free)
+
+def long_only_max_sharpe(returns, cov_matrix, risk_free_rate=0.01, free=None):
+    """
+    Maximum Sharpe ratio portfolio with weights between 0 and 1.
+
+    Solved as min y' cov y subject to (returns - risk_free_rate)' y = 1, y >= 0, then w = y / sum(y).
+    Falls back to the minimum-variance portfolio if no asset beats the risk-free rate.
+
+    Returns:
+    - tuple: (weights, free mask for warm starts).
+    """
+    returns, cov = _inputs(returns, cov_matrix)
+    excess = returns - risk_free_rate
+    if excess.max() <= 0:
+        logging.warning("No asset has a return above the risk-free rate; using the minimum-variance portfolio")
+        return long_only_min_variance(cov, free)
+    if free is None:
+        free = excess > 0
+    y, free = solve_long_only(cov, excess[None, :], [1.0], free)
+    return y / y.sum(), free
+
+def efficient_frontier(returns, cov_matrix, target_returns=None, n_points=50, long_only=True):
+    """
+    Minimum-variance weights for many target returns in one call.
+
+    Without bounds the frontier is a straight line in weight space (two-fund theorem), so all
+    targets are solved with one matrix product. Long-only targets are solved in increasing order,
+    each warm-started from the previous solution's free set.
+
+    Parameters:
+    - returns (array-like): Expected returns per asset.
+    - cov_matrix (array-like): Covariance matrix of asset returns.
+    - target_returns (array-like): Target portfolio returns. Defaults to n_points evenly spaced
+      between the minimum-variance return and the highest asset return.
+    - n_points (int): Number of default targets.
+    - long_only (bool): Restrict weights to [0, 1].
+
+    Returns:
+    - tuple: (target_returns, weights of shape (targets, assets), volatilities).
+    """
+    returns, cov = _inputs(returns, cov_matrix)
+    n = returns.size
+    if target_returns is None:
+        if long_only:
+            start = long_only_min_variance(cov)[0] @ returns
+        else:
+            start = min_variance_weights(cov) @ returns
+        target_returns = np.linspace(start, returns.max(), n_points)
+    target_returns = np.asarray(target_returns, dtype=float)
+    if long_only:
+        # Targets outside the asset returns' range cannot be reached without shorting
+        target_returns = np.clip(target_returns, returns.min(), returns.max())
+
+    if not long_only:
+        inv_ones = np.linalg.solve(cov, np.ones(n))
+        inv_returns = np.linalg.solve(cov, returns)
+        a, b, c = inv_ones.sum(), inv_returns.sum(), returns @ inv_returns
+        det = a * c - b * b
+        weights = (np.outer(c - b * target_returns, inv_ones) + np.outer(a * target_returns - b, inv_returns)) / det
+    else:
+        A = np.vstack([np.ones(n), returns])
+        order = np.argsort(target_returns)
+        weights = np.empty((target_returns.size, n))
+        free = None
+        for i in order:
+            weights[i], free = solve_long_only(cov, A, [1.0, target_returns[i]], free)
+    volatilities = np.sqrt(np.maximum(np.einsum('ij,jk,ik->i', weights, cov, weights), 0.0))
+    return target_returns, weights, volatilities
+
+def portfolio_performance(weights, returns, cov_matrix, risk_free_rate=0.01):
+    """
+    Expected return, volatility and Sharpe ratio of one portfolio or a batch of portfolios (rows).
+    """
+    weights = np.asarray(weights, dtype=float)
+    returns, cov = _inputs(returns, cov_matrix)
+    expected = weights @ returns
+    volatility = np.sqrt(np.einsum('...j,jk,...k->...', weights, cov, weights))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = (expected - risk_free_rate) / volatility
+    return expected, volatility, sharpe
+
+class PortfolioOptimizer:
+    """
+    Keeps the last long-only solution so rebalancing with slowly changing estimates is warm-started.
+
+    Parameters:
+    - risk_free_rate (float): Risk-free rate in the same units as the expected returns.
+    - objective (str): 'max_sharpe' or 'min_variance'.
+    - long_only (bool): Restrict weights to [0, 1].
+    """
+    def __init__(self, risk_free_rate=0.01, objective='max_sharpe', long_only=True):
+        if objective not in ('max_sharpe', 'min_variance'):
+            raise ValueError(f"Unknown objective: {objective}")
+        self.risk_free_rate = risk_free_rate
+        self.objective = objective
+        self.long_only = long_only
+        self._free = None
+
+    def optimize(self, returns, cov_matrix):
+        returns, cov = _inputs(returns, cov_matrix)
+        if self._free is not None and self._free.size != returns.size:
+            self._free = None
+        if not self.long_only:
+            if self.objective == 'max_sharpe':
+                return max_sharpe_weights(returns, cov, self.risk_free_rate)
+            return min_variance_weights(cov)
+        if self.objective == 'max_sharpe':
+            weights, self._free = long_only_max_sharpe(returns, cov, self.risk_free_rate, self._free)
+        else:
+            weights, self._free = long_only_min_variance(cov, self._free)
+        return weights
+
+if __name__ == "__main__":
+    # Example: 50 assets, frontier and repeated warm-started rebalancing
+    rng = np.random.default_rng(0)
+    n_assets = 50
+    factors = rng.normal(0, 0.02, (500, 3))
+    daily = factors @ rng.normal(0, 1, (3, n_assets)) + rng.normal(0, 0.01, (500, n_assets)) + rng.normal(0.0005, 0.0005, n_assets)
+    returns, cov = daily.mean(axis=0) * 252, np.cov(daily, rowvar=False) * 252
+
+    optimizer = PortfolioOptimizer()
+    start = time.perf_counter()
+    weights = optimizer.optimize(returns, cov)
+    logging.info("Max-Sharpe weights in %.2f ms: %d assets held, Sharpe %.2f", (time.perf_counter() - start) * 1000,
+                 (weights > 1e-9).sum(), portfolio_performance(weights, returns, cov)[2])
+
+    start = time.perf_counter()
+    for _ in range(100):
+        optimizer.optimize(returns * rng.normal(1, 0.01, n_assets), cov)
+    logging.info("Warm-started rebalance: %.2f ms", (time.perf_counter() - start) * 10)
+
+    start = time.perf_counter()
+    targets, frontier, volatilities = efficient_frontier(returns, cov, n_points=100)
+    logging.info("Long-only frontier with %d points in %.1f ms", len(targets), (time.perf_counter() - start) * 1000)
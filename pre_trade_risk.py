@@ -0,0 +1,200 @@
+import logging
+import time
+import ccxt
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SECONDS_PER_DAY = 86400
+
+class RiskLimits:
+    """
+    Pre-trade limits. Any limit left as None is not enforced.
+
+    Parameters:
+    - max_order_notional (float): Largest notional value of a single order.
+    - max_leverage (float): Largest gross exposure divided by account equity, and the largest
+      leverage that may be set on a symbol.
+    - max_symbol_exposure (float): Largest absolute notional position per symbol.
+    - max_daily_loss (float): Loss since the start of the UTC day after which only orders
+      that reduce exposure are accepted.
+    """
+    def __init__(self, max_order_notional=None, max_leverage=None, max_symbol_exposure=None, max_daily_loss=None):
+        self.max_order_notional = max_order_notional
+        self.max_leverage = max_leverage
+        self.max_symbol_exposure = max_symbol_exposure
+        self.max_daily_loss = max_daily_loss
+
+class PreTradeRiskGate:
+    """
+    In-memory pre-trade risk check.
+
+    Positions, balance, marks and exposure are kept as plain floats and updated incrementally
+    from fills and price ticks, so check() is a handful of arithmetic operations with no
+    DataFrame or exchange access and runs in a few microseconds.
+    """
+
+    def __init__(self, limits, balance=0.0, positions=None):
+        self.limits = limits
+        self.balance = float(balance)
+        self.positions = {}  # symbol -> [signed quantity, average entry price]
+        self.marks = {}
+        self.leverage = {}
+        self.gross_exposure = 0.0
+        self.unrealized_pnl = 0.0
+        self.realized_pnl_today = 0.0
+        self._day = int(time.time() // SECONDS_PER_DAY)
+        self._equity_at_day_start = self.balance
+        for symbol, (quantity, entry_price) in (positions or {}).items():
+            self.positions[symbol] = [float(quantity), float(entry_price)]
+            self.update_mark(symbol, entry_price)
+
+    @property
+    def equity(self):
+        return self.balance + self.unrealized_pnl
+
+    def daily_pnl(self):
+        self._roll_day()
+        return self.equity - self._equity_at_day_start
+
+    def check(self, symbol, side, amount, price=None):
+        """
+        Check an order against every configured limit.
+
+        Returns:
+        - tuple: (True, None) if the order may be sent, otherwise (False, reason).
+        """
+        limits = self.limits
+        price = price if price is not None else self.marks.get(symbol)
+        if price is None:
+            return False, f"no mark price for {symbol}"
+        if amount <= 0:
+            return False, "order amount must be positive"
+
+        notional = amount * price
+        if limits.max_order_notional is not None and notional > limits.max_order_notional:
+            return False, f"order notional {notional:.2f} exceeds {limits.max_order_notional:.2f}"
+
+        position = self.positions.get(symbol)
+        quantity = position[0] if position else 0.0
+        new_quantity = quantity + (amount if side == 'buy' else -amount)
+        if quantity * new_quantity >= 0 and abs(new_quantity) <= abs(quantity):
+            # Orders that only shrink the position are always allowed through
+            return True, None
+        # Exposure is valued at the mark on both sides, as in gross_exposure
+        mark = self.marks.get(symbol, price)
+        current_exposure = abs(quantity) * mark
+        new_exposure = abs(new_quantity) * mark
+
+        if limits.max_symbol_exposure is not None and new_exposure > limits.max_symbol_exposure:
+            return False, f"{symbol} exposure {new_exposure:.2f} would exceed {limits.max_symbol_exposure:.2f}"
+
+        if limits.max_leverage is not None:
+            equity = self.equity
+            new_gross = self.gross_exposure - current_exposure + new_exposure
+            if equity <= 0 or new_gross > equity * limits.max_leverage:
+                return False, f"gross exposure {new_gross:.2f} would exceed {limits.max_leverage}x equity {equity:.2f}"
+
+        if limits.max_daily_loss is not None and -self.daily_pnl() >= limits.max_daily_loss:
+            return False, f"daily loss limit {limits.max_daily_loss:.2f} reached"
+        return True, None
+
+    def on_fill(self, symbol, side, amount, price, fee=0.0):
+        """
+        Apply an execution to the in-memory position, balance and exposure.
+        """
+        self._roll_day()
+        self.update_mark(symbol, price)
+        position = self.positions.get(symbol)
+        if position is None:
+            position = self.positions[symbol] = [0.0, price]
+        quantity, entry_price = position
+        signed = amount if side == 'buy' else -amount
+        new_quantity = quantity + signed
+
+        realized = 0.0
+        if quantity * signed < 0:
+            closed = min(abs(signed), abs(quantity))
+            realized = closed * (price - entry_price) * (1 if quantity > 0 else -1)
+        if quantity * new_quantity <= 0:
+            entry_price = price
+        elif abs(new_quantity) > abs(quantity):
+            entry_price = (abs(quantity) * entry_price + abs(signed) * price) / abs(new_quantity)
+
+        self.gross_exposure += (abs(new_quantity) - abs(quantity)) * price
+        self.unrealized_pnl += new_quantity * (price - entry_price) - quantity * (price - position[1])
+        self.balance += realized - fee
+        self.realized_pnl_today += realized - fee
+        if abs(new_quantity) < 1e-12:
+            del self.positions[symbol]
+        else:
+            position[0] = new_quantity
+            position[1] = entry_price
+
+    def update_mark(self, symbol, price):
+        """
+        Move a symbol's mark price, adjusting exposure and unrealized PnL in O(1).
+        """
+        old = self.marks.get(symbol)
+        self.marks[symbol] = price
+        position = self.positions.get(symbol)
+        if position is None:
+            return
+        if old is None:
+            self.gross_exposure += abs(position[0]) * price
+            self.unrealized_pnl += position[0] * (price - position[1])
+        else:
+            self.gross_exposure += abs(position[0]) * (price - old)
+            self.unrealized_pnl += position[0] * (price - old)
+
+    def set_leverage(self, symbol, leverage):
+        max_leverage = self.limits.max_leverage
+        if max_leverage is not None and leverage > max_leverage:
+            raise ccxt.InvalidOrder(f"Leverage {leverage} for {symbol} exceeds the {max_leverage}x limit")
+        self.leverage[symbol] = leverage
+
+    def sync(self, exchange, currency='USDT'):
+        """
+        Rebuild the in-memory state from the exchange. Call this at startup or on a timer,
+        never on the order path. The balance total is taken as the wallet balance, excluding
+        unrealized PnL.
+        """
+        balance = exchange.fetch_balance()
+        positions = exchange.fetch_positions()
+        self.balance = float(balance['total'][currency])
+        self.positions = {}
+        self.gross_exposure = 0.0
+        self.unrealized_pnl = 0.0
+        for position in positions:
+            if not position.get('contracts'):
+                continue
+            quantity = position['contracts'] if position['side'] == 'long' else -position['contracts']
+            self.positions[position['symbol']] = [float(quantity), float(position['entryPrice'])]
+            mark = position.get('markPrice') or position['entryPrice']
+            self.marks.pop(position['symbol'], None)
+            self.update_mark(position['symbol'], float(mark))
+        self._equity_at_day_start = self.equity - self.realized_pnl_today
+        logging.info("Risk gate synced: equity %.2f, gross exposure %.2f across %d positions", self.equity, self.gross_exposure, len(self.positions))
+
+    def _roll_day(self):
+        day = int(time.time() // SECONDS_PER_DAY)
+        if day != self._day:
+            self._day = day
+            self._equity_at_day_start = self.equity
+            self.realized_pnl_today = 0.0
+
+if __name__ == "__main__":
+    # Example: time the check against a book of 200 open positions
+    limits = RiskLimits(max_order_notional=50000, max_leverage=5, max_symbol_exposure=100000, max_daily_loss=2000)
+    gate = PreTradeRiskGate(limits, balance=100000)
+    for i in range(200):
+        gate.on_fill(f'SYM{i}USDT', 'buy', 1, 1000.0)
+    gate.update_mark('BTCUSDT', 30000.0)
+
+    n = 100000
+    start = time.perf_counter()
+    for _ in range(n):
+        gate.check('BTCUSDT', 'buy', 0.5)
+    elapsed = time.perf_counter() - start
+    logging.info("check() took %.2f microseconds on average", elapsed / n * 1e6)
+    logging.info("Order for 3 BTC: %s", gate.check('BTCUSDT', 'buy', 3))
@@ -0,0 +1,177 @@
+import logging
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+OHLCV_DTYPE = np.dtype([('timestamp', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+                        ('volume', '<f8')])
+TICKER_DTYPE = np.dtype([('timestamp', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'), ('volume', '<f8')])
+
+def ohlcv_dtype(*fields):
+    """
+    OHLCV_DTYPE extended with extra float64 fields, e.g. indicator values kept per bar.
+    """
+    return np.dtype(OHLCV_DTYPE.descr + [(name, '<f8') for name in fields])
+
+class RingBuffer:
+    """
+    Fixed-capacity, preallocated ring of structured records for one symbol and timeframe.
+
+    Every record is stored twice, at slot i and i + capacity, so the newest n records are always
+    one contiguous slice: window() returns it as a view without copying, and indicator code can
+    run on it directly. Appending or updating a bar writes two records in place; nothing is
+    allocated once the buffer exists.
+
+    Parameters:
+    - capacity (int): Records kept; older ones are overwritten.
+    - dtype (np.dtype): Record layout, OHLCV_DTYPE by default.
+    """
+
+    def __init__(self, capacity, dtype=OHLCV_DTYPE):
+        if capacity < 1:
+            raise ValueError("Capacity must be positive")
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        # Empty record: NaN floats, zero integers
+        self._blank = np.zeros(1, self.dtype)
+        for name in self.dtype.names:
+            if self.dtype[name].kind == 'f':
+                self._blank[name] = np.nan
+        self._data = np.repeat(self._blank, 2 * self.capacity)
+        self._names = self.dtype.names
+        self._count = 0
+        self._end = 0
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def count(self):
+        """
+        Records appended since the buffer was created, including overwritten ones.
+        """
+        return self._count
+
+    def _write(self, slot, record):
+        if isinstance(record, np.void) or len(record) == len(self._names):
+            self._data[slot] = self._data[slot + self.capacity] = tuple(record)
+        else:
+            # Leading fields only, e.g. a plain OHLCV candle into records with indicator fields
+            for name, value in zip(self._names, record):
+                column = self._data[name]
+                column[slot] = column[slot + self.capacity] = value
+
+    def append(self, record):
+        """
+        Add a record as the newest bar in O(1). The record is a tuple or structured scalar;
+        a shorter tuple fills the leading fields and leaves the rest empty.
+        """
+        slot = self._count % self.capacity
+        if not isinstance(record, np.void) and len(record) < len(self._names):
+            self._data[slot] = self._data[slot + self.capacity] = self._blank[0]
+        self._write(slot, record)
+        self._count += 1
+        self._end = slot + self.capacity + 1
+
+    def update_last(self, record):
+        """
+        Overwrite the newest record, e.g. with the latest state of the forming candle. A shorter
+        tuple only overwrites the leading fields.
+        """
+        if not self._count:
+            raise IndexError("update_last on an empty buffer")
+        self._write((self._count - 1) % self.capacity, record)
+
+    def set_last(self, field, value):
+        """
+        Set one field of the newest record, e.g. an indicator computed for it.
+        """
+        slot = (self._count - 1) % self.capacity
+        column = self._data[field]
+        column[slot] = column[slot + self.capacity] = value
+
+    def update(self, record):
+        """
+        Merge one candle as returned by ccxt fetch_ohlcv ([timestamp, open, high, low, close, volume]).
+
+        A candle with the newest timestamp replaces the forming bar, a later one is appended and
+        an older one is ignored.
+
+        Returns:
+        - str: 'appended', 'updated' or 'stale'.
+        """
+        timestamp = record[0]
+        if self._count:
+            last = self._data['timestamp'][self._end - 1]
+            if timestamp == last:
+                self.update_last(record)
+                return 'updated'
+            if timestamp < last:
+                return 'stale'
+        self.append(record)
+        return 'appended'
+
+    def extend(self, records):
+        """
+        Append many records at once (structured array or list of tuples).
+        """
+        records = np.asarray(records, dtype=self.dtype)
+        if not len(records):
+            return
+        # Only the last capacity records are kept, but all of them are counted
+        tail = records[-self.capacity:]
+        slots = (self._count + len(records) - len(tail) + np.arange(len(tail))) % self.capacity
+        self._data[slots] = tail
+        self._data[slots + self.capacity] = tail
+        self._count += len(records)
+        self._end = (self._count - 1) % self.capacity + self.capacity + 1
+
+    def window(self, n=None):
+        """
+        The newest n records (all by default), oldest first, as a view into the buffer.
+
+        The view stays valid until n more records are appended; copy it to keep it longer.
+        """
+        available = len(self)
+        n = available if n is None else min(n, available)
+        return self._data[self._end - n:self._end]
+
+    def column(self, field, n=None):
+        """
+        One field of the newest n records as a (strided) view.
+        """
+        return self.window(n)[field]
+
+    def last(self):
+        """
+        The newest record, or None if the buffer is empty.
+        """
+        return self._data[self._end - 1] if self._count else None
+
+    def clear(self):
+        self._count = 0
+        self._end = 0
+
+# Buffers shared by the live loops of this process, by (symbol, timeframe)
+_buffers = {}
+
+def get_buffer(symbol, timeframe, capacity=1000, dtype=OHLCV_DTYPE):
+    """
+    The process-wide RingBuffer of a symbol and timeframe, created on first use.
+    """
+    key = (symbol, timeframe)
+    buffer = _buffers.get(key)
+    if buffer is None or buffer.dtype != np.dtype(dtype):
+        buffer = _buffers[key] = RingBuffer(capacity, dtype)
+    return buffer
+
+if __name__ == "__main__":
+    # Example: a minute of trades updating the forming bar, then a new bar
+    buffer = RingBuffer(5)
+    for minute in range(8):
+        buffer.update([minute * 60000, 100 + minute, 101 + minute, 99 + minute, 100.5 + minute, 10.0])
+    buffer.update([7 * 60000, 107, 109, 106, 108.5, 14.0])
+    window = buffer.window(3)
+    logging.info("Last 3 closes %s, contiguous %s, shares memory %s", window['close'].tolist(),
+                 window.flags['C_CONTIGUOUS'], np.shares_memory(window, buffer.window()))
@@ -7,6 +7,7 @@ import os
 import ntplib
 
 from fetch_data import detect_signals
+from mock_exchange import mock_exchange_from_env
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -27,7 +28,12 @@ def synchronize_system_time():
 def initialize_exchange(api_key, api_secret):
     """
     Initialize the exchange with the provided API key and secret.
+    Returns the in-process mock exchange instead when USE_MOCK_EXCHANGE is set.
     """
+    mock_exchange = mock_exchange_from_env()
+    if mock_exchange is not None:
+        return mock_exchange
+
     try:
         exchange = ccxt.bybit({
             'apiKey': api_key,
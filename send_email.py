@@ -1,24 +1,17 @@
-import smtplib
-from email.mime.text import MIMEText
-from config import SMTP_SERVER, SMTP_PORT, EMAIL_USER, EMAIL_PASS
+from notification_service import get_notification_service, notify
 
-def send_email(subject, body, to):
-    try:
-        msg = MIMEText(body)
-        msg['Subject'] = subject
-        msg['From'] = EMAIL_USER
-        msg['To'] = to
+def send_email(subject, body, to=None):
+    """
+    Queue an email on the notification service, which reuses one SMTP connection (configured from
+    SMTP_SERVER, SMTP_PORT, EMAIL_USER and EMAIL_PASS) and returns without waiting for it.
 
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()  # Add this line if your SMTP server uses TLS
-            server.login(EMAIL_USER, EMAIL_PASS)
-            server.sendmail(EMAIL_USER, to, msg.as_string())
-
-        print(f"Email successfully sent to {to}")
-    except smtplib.SMTPException as e:
-        print(f"Failed to send email: {e}")
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+    Parameters:
+    - subject (str): Email subject.
+    - body (str): Email body.
+    - to (str): Receiver; defaults to RECEIVER_EMAIL.
+    """
+    if notify(body, subject=subject, to=to, channels=('email',)):
+        print(f"Email to {to or 'default receiver'} queued")
 
 # Example usage:
 if __name__ == "__main__":
@@ -27,3 +20,5 @@ if __name__ == "__main__":
     to = "recipient@example.com"
 
     send_email(subject, body, to)
+    # Deliver the queued email before the interpreter exits
+    get_notification_service().close()
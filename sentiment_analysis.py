@@ -1,6 +1,5 @@
 from tensorflow.keras.preprocessing.text import Tokenizer, tokenizer_from_json
 import numpy as np
-import requests
 import logging
 import os
 import json
@@ -12,6 +11,9 @@ from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import precision_score, recall_score, f1_score
 from langdetect import detect
+from fast_inference import load_numpy_model
+from text_preprocessing import TextPreprocessor, detect_languages, load_preprocessor
+from http_client import request, submit_request
 import unittest
 
 # Configure logging
@@ -19,28 +21,63 @@ logging.basicConfig(level=logging.INFO)
 
 SUPPORTED_LANGUAGES = ['en', 'es', 'ru']  # Add other languages as needed
 
-def fetch_real_time_sentiment():
-    url = 'https://api.bybit.com/sentiment'  # Ensure this is the correct endpoint
-    headers = {'Authorization': 'LzvSGu2mYFi2L6VtBL'}  # Replace with your actual API key
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            sentiment_data = save_model.json()
-            if 'score' in sentiment_data:
-                sentiment_score = sentiment_data['score']
-                logging.info(f"Real-time sentiment score: {sentiment_score}")
-                return sentiment_score
-            else:
-                logging.error(f"Unexpected response format: {sentiment_data}")
-        except requests.exceptions.HTTPError as http_err:
-            logging.error(f"HTTP error occurred: {http_err}")
-        except Exception as err:
-            logging.error(f"Other error occurred: {err}")
+SENTIMENT_URL = 'https://api.bybit.com/sentiment'  # Ensure this is the correct endpoint
+SENTIMENT_HEADERS = {'Authorization': 'LzvSGu2mYFi2L6VtBL'}  # Replace with your actual API key
+
+def _parse_sentiment(response):
+    sentiment_data = response.json()
+    if 'score' in sentiment_data:
+        return float(sentiment_data['score'])
+    logging.error(f"Unexpected response format: {sentiment_data}")
     return None
 
+def fetch_real_time_sentiment(deadline=10.0):
+    """
+    Fetch the real-time sentiment score through the shared HTTP client, which retries with
+    backoff and stops calling a failing API for a while.
+
+    Parameters:
+    - deadline (float): Maximum seconds to wait, including retries.
+
+    Returns:
+    - float: Sentiment score, or None if it could not be fetched in time.
+    """
+    try:
+        sentiment_score = _parse_sentiment(request('GET', SENTIMENT_URL, deadline=deadline, headers=SENTIMENT_HEADERS))
+    except Exception as err:
+        logging.error(f"Failed to fetch real-time sentiment: {err!r}")
+        return None
+    if sentiment_score is not None:
+        logging.info(f"Real-time sentiment score: {sentiment_score}")
+    return sentiment_score
+
+_latest_sentiment = {'score': None, 'future': None}
+
+def latest_real_time_sentiment():
+    """
+    Non-blocking variant for the trading loop: return the last fetched score (None until the first
+    fetch completes) and start a background refresh if none is in flight.
+    """
+    future = _latest_sentiment['future']
+    if future is None or future.done():
+        future = _latest_sentiment['future'] = submit_request('GET', SENTIMENT_URL, headers=SENTIMENT_HEADERS)
+
+        def store(done):
+            try:
+                score = _parse_sentiment(done.result())
+            except Exception as err:
+                logging.error(f"Failed to refresh real-time sentiment: {err!r}")
+                return
+            if score is not None:
+                _latest_sentiment['score'] = score
+
+        future.add_done_callback(store)
+    return _latest_sentiment['score']
+
 def preprocess_text(tweets, tokenizer=None):
+    # A frozen TextPreprocessor (see load_preprocessor) tokenizes the whole batch without Keras
+    if isinstance(tokenizer, TextPreprocessor):
+        return tokenizer.transform(tweets), tokenizer
     if tokenizer is None:
         tokenizer = Tokenizer(num_words=5000)
         tokenizer.fit_on_texts(tweets)
@@ -73,6 +110,9 @@ def save_model(model, path='sentiment_model.h5'):
     model.save(path)
 
 def load_sentiment_model(path='sentiment_model.h5'):
+    # NumPy exports from fast_inference.export_model skip Keras' per-call overhead
+    if path.endswith('.npz'):
+        return load_numpy_model(path)
     return load_model(path)
 
 def evaluate_model(model, X_val, y_val):
@@ -152,34 +192,39 @@ def main():
         if args.real_time_score:
             real_time_score = fetch_real_time_sentiment()
 
-        for tweet in new_tweets:
-            language = detect_language(tweet)
+        # Detect languages for the whole batch, then load each language's model once and score its tweets together
+        tweets_by_language = {}
+        for tweet, language in zip(new_tweets, detect_languages(new_tweets)):
             logging.info(f"Detected language: {language}")
-
             if language in SUPPORTED_LANGUAGES:
-                model = load_sentiment_model(f'sentiment_model_{language}.h5')
-                tokenizer = load_tokenizer(f'tokenizer_{language}.json')
-                sentiment_score = analyze_sentiment([tweet], model, tokenizer, real_time_score)
-                logging.info(f"Sentiment score for tweet '{tweet}': {sentiment_score}")
+                tweets_by_language.setdefault(language, []).append(tweet)
             else:
                 logging.error(f"Unsupported language: {language}")
-                continue
 
-            average_sentiment = analyze_sentiment([tweet], model, tokenizer, real_time_score)
-            logging.info(f"Tweet: {tweet}, Sentiment score: {average_sentiment}")
+        for language, tweets in tweets_by_language.items():
+            model = load_sentiment_model(f'sentiment_model_{language}.h5')
+            tokenizer = load_preprocessor(f'tokenizer_{language}.json')
+            data, _ = preprocess_text(tweets, tokenizer)
+            scores = np.ravel(model.predict(data))
+            for tweet, sentiment_score in zip(tweets, scores):
+                if real_time_score is not None:
+                    sentiment_score = (sentiment_score + real_time_score) / 2
+                logging.info(f"Tweet: {tweet}, Sentiment score: {sentiment_score}")
 
     if args.update_model:
         update_data = args.update_model.split(',')
-        for tweet in update_data:
-            language = detect_language(tweet)
+        tweets_by_language = {}
+        for tweet, language in zip(update_data, detect_languages(update_data)):
             logging.info(f"Detected language: {language}")
+            tweets_by_language.setdefault(language, []).append(tweet)
 
+        for language, tweets in tweets_by_language.items():
             if language in SUPPORTED_LANGUAGES:
                 model = load_sentiment_model(f'sentiment_model_{language}.h5')
-                tokenizer = load_tokenizer(f'tokenizer_{language}.json')
+                tokenizer = load_preprocessor(f'tokenizer_{language}.json')
 
-                data, _ = preprocess_text([tweet], tokenizer)
-                labels = [1]  # This should be the correct label for the tweet
+                data, _ = preprocess_text(tweets, tokenizer)
+                labels = [1] * len(tweets)  # These should be the correct labels for the tweets
                 label_encoder = LabelEncoder()
                 labels = label_encoder.fit_transform(labels)
 
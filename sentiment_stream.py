@@ -0,0 +1,152 @@
+import logging
+import math
+import threading
+import time
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class SentimentAggregator:
+    """
+    Streaming, time-decayed sentiment per symbol.
+
+    Every update folds a scored text into an exponentially decayed weight, mean and variance in
+    O(1); older scores fade with the configured half-life. Writers serialize on a lock, and after
+    each update the symbol's figures are published as a new immutable tuple with a single dict
+    assignment, so readers such as signal detection never take the lock or wait on a fetch.
+
+    Parameters:
+    - half_life (float): Seconds after which a score's weight has halved.
+    """
+
+    def __init__(self, half_life=3600.0):
+        self.half_life = half_life
+        self._decay_rate = math.log(2) / half_life
+        self._lock = threading.Lock()
+        self._state = {}  # symbol -> [time, weight, mean, weighted sum of squared deviations, updates]
+        self._published = {}  # symbol -> (time, weight, mean, std, updates)
+        self._pollers = {}
+
+    def update(self, symbol, score, timestamp=None, weight=1.0):
+        """
+        Add one sentiment score for a symbol.
+
+        Parameters:
+        - symbol (str): Symbol the text refers to.
+        - score (float): Sentiment score, e.g. TextBlob polarity in [-1, 1].
+        - timestamp (float): Unix time of the text in seconds. Defaults to now.
+        - weight (float): Weight of the score, e.g. follower count or model confidence.
+        """
+        now = time.time() if timestamp is None else timestamp
+        with self._lock:
+            state = self._state.get(symbol)
+            if state is None:
+                state = self._state[symbol] = [now, 0.0, 0.0, 0.0, 0]
+            last, total, mean, squares, updates = state
+            if now >= last:
+                decay = math.exp(-self._decay_rate * (now - last))
+                total *= decay
+                squares *= decay
+                last = now
+            else:
+                # A late score is folded in with the weight it would have by now
+                weight *= math.exp(-self._decay_rate * (last - now))
+            total += weight
+            if total > 0:
+                delta = score - mean
+                mean += weight / total * delta
+                squares += weight * delta * (score - mean)
+            updates += 1
+            state[:] = [last, total, mean, squares, updates]
+            std = math.sqrt(max(squares / total, 0.0)) if total > 0 else 0.0
+            self._published[symbol] = (last, total, mean, std, updates)
+
+    def update_many(self, symbol, scores, timestamps=None):
+        """
+        Add a batch of scores for a symbol, e.g. one polling round of tweets.
+        """
+        if timestamps is None:
+            now = time.time()
+            timestamps = [now] * len(scores)
+        for score, timestamp in zip(scores, timestamps):
+            self.update(symbol, score, timestamp)
+
+    def snapshot(self, symbol, now=None):
+        """
+        Lock-free read of a symbol's aggregate.
+
+        Returns:
+        - dict: 'mean', 'std', 'count' (decayed effective number of scores, as of now), 'updates'
+          and 'last_update', or None if no score has been seen for the symbol.
+        """
+        published = self._published.get(symbol)
+        if published is None:
+            return None
+        last, total, mean, std, updates = published
+        now = time.time() if now is None else now
+        count = total * math.exp(-self._decay_rate * max(now - last, 0.0))
+        return {'mean': mean, 'std': std, 'count': count, 'updates': updates, 'last_update': last}
+
+    def score(self, symbol, default=0.0, min_count=1.0):
+        """
+        Decayed mean sentiment of a symbol, or default if too little recent data has been seen.
+        """
+        snapshot = self.snapshot(symbol)
+        if snapshot is None or snapshot['count'] < min_count:
+            return default
+        return snapshot['mean']
+
+    def start_polling(self, symbol, fetch_scores, interval=60.0):
+        """
+        Poll a blocking sentiment source on a daemon thread and feed its scores into the aggregator.
+
+        Parameters:
+        - symbol (str): Symbol to attribute the scores to.
+        - fetch_scores (callable): Returns a score or a list of scores, or None when nothing is available.
+        - interval (float): Seconds between polls.
+
+        Returns:
+        - threading.Event: Set it to stop polling.
+        """
+        stop = threading.Event()
+
+        def poll():
+            while not stop.is_set():
+                try:
+                    scores = fetch_scores()
+                    if scores is not None:
+                        self.update_many(symbol, scores if isinstance(scores, (list, tuple)) else [scores])
+                except Exception as e:
+                    logging.error("Sentiment polling for %s failed: %s", symbol, e)
+                stop.wait(interval)
+
+        thread = threading.Thread(target=poll, name=f"sentiment-{symbol}", daemon=True)
+        thread.start()
+        self._pollers[symbol] = stop
+        return stop
+
+# Shared aggregator used by data fetching and signal detection
+sentiment_aggregator = SentimentAggregator()
+
+if __name__ == "__main__":
+    # Example: a burst of positive tweets followed by negative ones, an hour apart
+    import random
+    rng = random.Random(0)
+    aggregator = SentimentAggregator(half_life=1800)
+    start_time = time.time() - 7200
+    for i in range(500):
+        aggregator.update('BTCUSDT', rng.gauss(0.4, 0.2), start_time + i)
+    logging.info("After positive burst: %s", aggregator.snapshot('BTCUSDT', now=start_time + 500))
+    for i in range(500):
+        aggregator.update('BTCUSDT', rng.gauss(-0.3, 0.2), start_time + 3600 + i)
+    logging.info("After negative burst: %s", aggregator.snapshot('BTCUSDT', now=start_time + 4100))
+
+    n = 100000
+    begin = time.perf_counter()
+    for i in range(n):
+        aggregator.update('ETHUSDT', 0.1, start_time + i * 0.01)
+    logging.info("update() took %.2f microseconds", (time.perf_counter() - begin) / n * 1e6)
+    begin = time.perf_counter()
+    for _ in range(n):
+        aggregator.score('ETHUSDT')
+    logging.info("score() took %.2f microseconds", (time.perf_counter() - begin) / n * 1e6)
@@ -0,0 +1,327 @@
+import logging
+import random
+import time
+from bisect import bisect_left, insort
+from itertools import count
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class _LevelBook:
+    """
+    Fixed trigger levels for one symbol and one direction, kept sorted so that the
+    triggered levels are always a suffix of the list.
+
+    Levels that fire when the price falls to them are stored as-is; levels that fire when
+    the price rises to them are stored negated, so both directions pop from the end.
+    """
+    def __init__(self, sign):
+        self.sign = sign
+        self.entries = []  # sorted (sign * level, seq, stop_id)
+
+    def add(self, level, seq, stop_id):
+        insort(self.entries, (self.sign * level, seq, stop_id))
+
+    def remove(self, level, seq, stop_id):
+        entry = (self.sign * level, seq, stop_id)
+        index = bisect_left(self.entries, entry)
+        if index < len(self.entries) and self.entries[index] == entry:
+            del self.entries[index]
+
+    def pop_triggered(self, price):
+        index = bisect_left(self.entries, (self.sign * price,))
+        triggered = [entry[2] for entry in self.entries[index:]]
+        del self.entries[index:]
+        return triggered
+
+class _TrailingGroup:
+    """
+    Trailing stops for one symbol, position side and trail percentage.
+
+    Stops that share a peak share a bucket. Peaks are kept sorted; a price update
+    collapses every bucket whose peak it exceeds into a single bucket at the new price
+    (the ratchet), and the stops that trigger are always the buckets with the highest
+    peaks. Short positions track the trough by working on negated prices.
+    """
+    def __init__(self, sign, trail_percent):
+        self.sign = sign
+        self.trail_percent = trail_percent
+        # A long stop triggers at peak * (1 - pct), a short stop at trough * (1 + pct)
+        self.factor = 1 - trail_percent if sign > 0 else 1 + trail_percent
+        self.peaks = []
+        self.buckets = []  # parallel to peaks: [peak, set of stop ids]
+
+    def add(self, price, stop_id):
+        peak = self.sign * price
+        index = bisect_left(self.peaks, peak)
+        if index < len(self.peaks) and self.peaks[index] == peak:
+            bucket = self.buckets[index]
+        else:
+            bucket = [peak, set()]
+            self.peaks.insert(index, peak)
+            self.buckets.insert(index, bucket)
+        bucket[1].add(stop_id)
+        return bucket
+
+    def remove(self, bucket, stop_id):
+        bucket[1].discard(stop_id)
+        if not bucket[1]:
+            index = bisect_left(self.peaks, bucket[0])
+            if index < len(self.buckets) and self.buckets[index] is bucket:
+                del self.peaks[index]
+                del self.buckets[index]
+
+    def stop_price(self, bucket):
+        return self.sign * bucket[0] * self.factor
+
+    def update(self, price):
+        """
+        Ratchet the peaks to the new price and pop the triggered buckets.
+
+        Returns:
+        - tuple: (triggered buckets, merged bucket or None, ids moved into the merged bucket)
+        """
+        x = self.sign * price
+        # Triggered: x <= peak * factor, i.e. peak >= x / factor
+        index = bisect_left(self.peaks, x / self.factor)
+        triggered = self.buckets[index:]
+        del self.peaks[index:]
+        del self.buckets[index:]
+
+        # Ratchet: every bucket with a peak below the price moves up to the price
+        index = bisect_left(self.peaks, x)
+        if index == 0:
+            return triggered, None, []
+        if index < len(self.peaks) and self.peaks[index] == x:
+            index += 1
+        merged = self.buckets[:index]
+        # Merge the smaller buckets into the largest so each stop moves O(log n) times overall
+        target = max(merged, key=lambda bucket: len(bucket[1]))
+        moved = []
+        for bucket in merged:
+            if bucket is not target:
+                moved.extend(bucket[1])
+                target[1].update(bucket[1])
+        target[0] = x
+        del self.peaks[:index]
+        del self.buckets[:index]
+        self.peaks.insert(0, x)
+        self.buckets.insert(0, target)
+        return triggered, target, moved
+
+class StopManager:
+    """
+    Holds stop-loss, take-profit and trailing-stop levels for many positions across symbols.
+
+    On every price update the triggered stops are found with a binary search over
+    price-sorted levels, and trailing stops are ratcheted in place by merging their peak
+    buckets, so an update costs O(log n + k) for k triggered or ratcheted levels rather than a
+    pass over every open position.
+
+    Stops created with the same group cancel each other once one of them triggers, which
+    gives one-cancels-other brackets (a stop-loss and take-profit on the same position).
+    """
+
+    def __init__(self):
+        self.stops = {}
+        self._books = {}
+        self._trailing = {}
+        self._groups = {}
+        self._seq = count()
+
+    def __len__(self):
+        return len(self.stops)
+
+    def add_stop_loss(self, symbol, side, price, amount=None, group=None, stop_id=None):
+        """
+        Add a stop-loss for a position.
+
+        Parameters:
+        - symbol (str): Trading pair symbol.
+        - side (str): Position side, 'long' or 'short'.
+        - price (float): Stop level.
+        - amount (float): Amount to close when the stop triggers.
+        - group: Optional one-cancels-other group key.
+        - stop_id: Optional identifier, generated if omitted.
+
+        Returns:
+        - The stop identifier.
+        """
+        # A long stop-loss fires on a fall to the level, a short one on a rise
+        return self._add_level('stop_loss', symbol, side, price, 1 if side == 'long' else -1, amount, group, stop_id)
+
+    def add_take_profit(self, symbol, side, price, amount=None, group=None, stop_id=None):
+        """
+        Add a take-profit for a position. Parameters are as for add_stop_loss.
+        """
+        return self._add_level('take_profit', symbol, side, price, -1 if side == 'long' else 1, amount, group, stop_id)
+
+    def add_trailing_stop(self, symbol, side, trail_percent, price, amount=None, group=None, stop_id=None):
+        """
+        Add a trailing stop that follows the best price seen since it was added.
+
+        Parameters:
+        - symbol (str): Trading pair symbol.
+        - side (str): Position side, 'long' or 'short'.
+        - trail_percent (float): Distance of the stop from the peak (or trough), e.g. 0.02 for 2%.
+        - price (float): Current price, used as the starting peak.
+        - amount (float): Amount to close when the stop triggers.
+        - group: Optional one-cancels-other group key.
+        - stop_id: Optional identifier, generated if omitted.
+
+        Returns:
+        - The stop identifier.
+        """
+        if not 0 < trail_percent < 1:
+            raise ValueError("trail_percent must be between 0 and 1")
+        self._check_side(side)
+        groups = self._trailing.setdefault(symbol, {})
+        trailing = groups.get((side, trail_percent))
+        if trailing is None:
+            trailing = groups[(side, trail_percent)] = _TrailingGroup(1 if side == 'long' else -1, trail_percent)
+        stop = self._new_stop('trailing_stop', symbol, side, amount, group, stop_id)
+        stop['trail_percent'] = trail_percent
+        stop['_group'] = trailing
+        stop['_bucket'] = trailing.add(price, stop['id'])
+        return stop['id']
+
+    def cancel(self, stop_id):
+        """
+        Remove a stop. Returns False if it does not exist or has already triggered.
+        """
+        stop = self.stops.pop(stop_id, None)
+        if stop is None:
+            return False
+        if stop['type'] == 'trailing_stop':
+            stop['_group'].remove(stop['_bucket'], stop_id)
+        else:
+            stop['_book'].remove(stop['stopPrice'], stop['_seq'], stop_id)
+        if stop['group'] is not None:
+            members = self._groups.get(stop['group'])
+            if members is not None:
+                members.discard(stop_id)
+                if not members:
+                    del self._groups[stop['group']]
+        return True
+
+    def stop_price(self, stop_id):
+        """
+        Current trigger level of a stop, including the ratchet for trailing stops.
+        """
+        stop = self.stops[stop_id]
+        if stop['type'] == 'trailing_stop':
+            return stop['_group'].stop_price(stop['_bucket'])
+        return stop['stopPrice']
+
+    def fetch_stops(self, symbol=None):
+        return [self._public(stop) for stop in self.stops.values() if symbol is None or stop['symbol'] == symbol]
+
+    def on_price(self, symbol, price, timestamp=None):
+        """
+        Process a price update for a symbol.
+
+        Parameters:
+        - symbol (str): Trading pair symbol.
+        - price (float): Latest traded or mark price.
+        - timestamp (int): Optional timestamp in milliseconds, recorded on triggered stops.
+
+        Returns:
+        - list: The triggered stops, each with 'triggerPrice' set to the price that fired it.
+        """
+        triggered_ids = []
+        for book_key in ((symbol, 1), (symbol, -1)):
+            book = self._books.get(book_key)
+            if book is not None and book.entries:
+                triggered_ids.extend(book.pop_triggered(price))
+
+        trailing_triggered = []
+        for trailing in self._trailing.get(symbol, {}).values():
+            if not trailing.peaks:
+                continue
+            buckets, target, moved = trailing.update(price)
+            for bucket in buckets:
+                stop_price = trailing.stop_price(bucket)
+                for stop_id in bucket[1]:
+                    trailing_triggered.append((stop_id, stop_price))
+            for stop_id in moved:
+                self.stops[stop_id]['_bucket'] = target
+
+        triggered = []
+        for stop_id in triggered_ids:
+            stop = self.stops.pop(stop_id, None)
+            if stop is not None:
+                triggered.append(stop)
+        for stop_id, stop_price in trailing_triggered:
+            stop = self.stops.pop(stop_id, None)
+            if stop is not None:
+                stop['stopPrice'] = stop_price
+                triggered.append(stop)
+
+        result = []
+        for stop in triggered:
+            stop['triggerPrice'] = price
+            stop['timestamp'] = timestamp
+            result.append(self._public(stop))
+            if stop['group'] is not None:
+                for other in list(self._groups.pop(stop['group'], ())):
+                    if other != stop['id']:
+                        self.cancel(other)
+        if result:
+            logging.debug("%d stops triggered on %s at %s", len(result), symbol, price)
+        return result
+
+    def _add_level(self, stop_type, symbol, side, price, sign, amount, group, stop_id):
+        self._check_side(side)
+        key = (symbol, sign)
+        book = self._books.get(key)
+        if book is None:
+            book = self._books[key] = _LevelBook(sign)
+        stop = self._new_stop(stop_type, symbol, side, amount, group, stop_id)
+        stop['stopPrice'] = price
+        stop['_book'] = book
+        book.add(price, stop['_seq'], stop['id'])
+        return stop['id']
+
+    def _new_stop(self, stop_type, symbol, side, amount, group, stop_id):
+        seq = next(self._seq)
+        stop_id = stop_id if stop_id is not None else str(seq)
+        if stop_id in self.stops:
+            raise ValueError(f"Stop {stop_id} already exists")
+        stop = {'id': stop_id, 'symbol': symbol, 'type': stop_type, 'side': side, 'amount': amount,
+                'group': group, 'stopPrice': None, '_seq': seq}
+        self.stops[stop_id] = stop
+        if group is not None:
+            self._groups.setdefault(group, set()).add(stop_id)
+        return stop
+
+    def _public(self, stop):
+        public = {key: value for key, value in stop.items() if not key.startswith('_')}
+        if stop['type'] == 'trailing_stop' and stop['id'] in self.stops:
+            public['stopPrice'] = self.stop_price(stop['id'])
+        return public
+
+    @staticmethod
+    def _check_side(side):
+        if side not in ('long', 'short'):
+            raise ValueError(f"Position side must be 'long' or 'short', got {side!r}")
+
+if __name__ == "__main__":
+    # Example: a grid of 5000 long positions with brackets and trailing stops on a random walk
+    rng = random.Random(1)
+    manager = StopManager()
+    price = 30000.0
+    for i in range(5000):
+        entry = price * (1 + rng.uniform(-0.01, 0.01))
+        manager.add_stop_loss('BTCUSDT', 'long', entry * 0.97, amount=0.001, group=i)
+        manager.add_take_profit('BTCUSDT', 'long', entry * 1.05, amount=0.001, group=i)
+        manager.add_trailing_stop('BTCUSDT', 'long', rng.choice([0.01, 0.02, 0.03]), entry, amount=0.001)
+
+    updates = 10000
+    fired = 0
+    start = time.perf_counter()
+    for _ in range(updates):
+        price *= 1 + rng.gauss(0, 0.0005)
+        fired += len(manager.on_price('BTCUSDT', price))
+    elapsed = time.perf_counter() - start
+    logging.info("%d updates in %.3f s (%.1f microseconds each), %d stops triggered, %d still open",
+                 updates, elapsed, elapsed / updates * 1e6, fired, len(manager))
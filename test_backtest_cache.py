@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from backtest_cache import BacktestCache, code_version, fingerprint
+
+class TestBacktestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_keys_follow_data_code_and_parameters(self):
+        df = pd.DataFrame({'close': np.arange(10.0), 'volume': np.ones(10)})
+        same = pd.DataFrame({'close': np.arange(10.0), 'volume': np.ones(10)}, index=np.arange(10, 20))
+        changed = df.assign(close=df['close'] + 1e-9)
+        self.assertEqual(fingerprint(df), fingerprint(same))
+        self.assertNotEqual(fingerprint(df), fingerprint(changed))
+
+        def strategy(x):
+            return x
+
+        def edited_strategy(x):
+            return x + 1
+
+        version = code_version(strategy)
+        self.assertNotEqual(version, code_version(edited_strategy))
+        key = BacktestCache.key(df, version, {'fast': 10, 'slow': 50})
+        self.assertEqual(key, BacktestCache.key(same, version, {'slow': 50, 'fast': 10}))
+        self.assertNotEqual(key, BacktestCache.key(df, version, {'fast': 10, 'slow': 60}))
+
+        cache = BacktestCache(self.root)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, {'equity': np.array([1.0, 2.0])}, {'sharpe': 1.5, 'max_drawdown': float('nan')})
+        arrays, metrics = BacktestCache(self.root).get(key)
+        np.testing.assert_array_equal(arrays['equity'], [1.0, 2.0])
+        self.assertEqual(metrics['sharpe'], 1.5)
+        self.assertTrue(np.isnan(metrics['max_drawdown']))
+
+    def test_sweep_computes_only_new_cells_and_evicts_least_recently_used(self):
+        calls = []
+
+        def run(fast, slow):
+            calls.append((fast, slow))
+            return {'equity': np.full(1000, fast + slow, dtype=float)}, {'score': fast - slow}
+
+        cache = BacktestCache(self.root, max_bytes=1 << 20)
+        first = cache.sweep(run, np.arange(5), {'fast': [1, 2], 'slow': [10, 20]}, 'v1')
+        self.assertEqual(len(calls), 4)
+        second = cache.sweep(run, np.arange(5), {'fast': [1, 2, 3], 'slow': [10, 20]}, 'v1')
+        self.assertEqual(calls[4:], [(3, 10), (3, 20)])
+        self.assertEqual([result[2] for result in second[:4]], [result[2] for result in first])
+        cache.sweep(run, np.arange(5), {'fast': [1], 'slow': [10]}, 'v2')
+        self.assertEqual(calls[-1], (1, 10))
+
+        entry_size = os.path.getsize(cache._path(cache.key(np.arange(5), 'v2', {'fast': 1, 'slow': 10})))
+        small = BacktestCache(self.root, max_bytes=3 * entry_size)
+        oldest = small.key(np.arange(5), 'v1', {'fast': 1, 'slow': 10})
+        os.utime(small._path(oldest), (0, 0))
+        recent = small.key(np.arange(5), 'v1', {'fast': 1, 'slow': 20})
+        self.assertIsNotNone(small.get(recent))
+        small.put(small.key(np.arange(5), 'v3', {}), *run(0, 0))
+        self.assertIsNone(small.get(oldest))
+        self.assertIsNotNone(small.get(recent))
+        self.assertEqual(len(small._entries), 3)
+
+if __name__ == '__main__':
+    unittest.main()
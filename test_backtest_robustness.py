@@ -0,0 +1,41 @@
+import itertools
+import unittest
+import numpy as np
+import pandas as pd
+from backtest_robustness import bootstrap_returns, resample_trades, trade_ledger
+
+class TestBacktestRobustness(unittest.TestCase):
+
+    def test_trade_ledger_and_shuffled_sequences(self):
+        backtest_df = pd.DataFrame({'capital': [1000, 899, 1000, 1110, 1000, 950, 1000, 1040, 1000, 960]})
+        trades = trade_ledger(backtest_df)
+        # The last entry is still open and not part of the ledger
+        self.assertEqual(trades['pnl'].tolist(), [9.0, -10.0])
+        self.assertEqual(trades['exit_index'].tolist(), [3, 7])
+
+        pnls = np.array([50.0, -80.0, 30.0, -20.0, 60.0])
+        report = resample_trades(pnls, n_resamples=2000, method='shuffle', seed=0)
+        # Shuffling keeps the final balance; only the path and so the drawdown changes
+        np.testing.assert_allclose(report.samples['final_balance'], 1000 + pnls.sum())
+        self.assertAlmostEqual(report.original['max_drawdown'], 80 / 1050)
+        drawdowns = set()
+        for order in itertools.permutations(pnls):
+            equity = 1000 + np.cumsum(order)
+            peaks = np.maximum(np.maximum.accumulate(equity), 1000)
+            drawdowns.add(round(((peaks - equity) / peaks).max(), 12))
+        self.assertTrue(set(np.round(report.samples['max_drawdown'], 12)) <= drawdowns)
+        self.assertAlmostEqual(report.samples['max_drawdown'].max(), max(drawdowns))
+
+    def test_process_pool_matches_single_process(self):
+        returns = np.random.default_rng(0).normal(0.0002, 0.01, 300)
+        single = bootstrap_returns(returns, n_resamples=400, block_size=10, seed=5, n_jobs=1)
+        again = bootstrap_returns(returns, n_resamples=400, block_size=10, seed=5, n_jobs=1)
+        np.testing.assert_array_equal(single.samples['final_balance'], again.samples['final_balance'])
+
+        pooled = bootstrap_returns(returns, n_resamples=400, block_size=10, seed=5, n_jobs=2)
+        self.assertEqual(len(pooled.samples['sharpe']), 400)
+        self.assertLess(pooled.bands['final_balance'][5], pooled.bands['final_balance'][95])
+        self.assertAlmostEqual(pooled.original['final_balance'], 1000 * np.prod(1 + returns))
+
+if __name__ == '__main__':
+    unittest.main()
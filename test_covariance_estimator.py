@@ -0,0 +1,54 @@
+import json
+import unittest
+import numpy as np
+import pandas as pd
+from covariance_estimator import CovarianceEstimator
+
+class TestCovarianceEstimator(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (300, 5)), axis=0))
+
+    def test_streaming_matches_full_recomputation(self):
+        estimator = CovarianceEstimator(5, shrinkage=None, annualization=1)
+        estimator.update_prices_many(self.prices[:100])
+        for row in self.prices[100:]:
+            estimator.update_prices(row)
+        returns = pd.DataFrame(self.prices).pct_change()
+        np.testing.assert_allclose(estimator.mean_returns(), returns.mean(), atol=1e-15)
+        np.testing.assert_allclose(estimator.covariance(), returns.cov(), atol=1e-15)
+
+        # EWMA weighting, fed in uneven batches
+        halflife = 20
+        X = returns.to_numpy()[1:]
+        weights = 0.5 ** (np.arange(len(X) - 1, -1, -1) / halflife)
+        mean = weights @ X / weights.sum()
+        cov = ((X - mean) * weights[:, None]).T @ (X - mean) / (weights.sum() - (weights ** 2).sum() / weights.sum())
+        ewma = CovarianceEstimator(5, halflife=halflife, shrinkage=None, annualization=1)
+        for chunk in np.array_split(self.prices, [1, 50, 51, 200]):
+            ewma.update_prices_many(chunk)
+        np.testing.assert_allclose(ewma.covariance(), cov, atol=1e-15)
+
+    def test_ledoit_wolf_and_serialization(self):
+        estimator = CovarianceEstimator(5, annualization=1)
+        estimator.update_prices_many(self.prices[:40])
+        X = pd.DataFrame(self.prices[:40]).pct_change().to_numpy()[1:]
+        # Ledoit-Wolf intensity as computed by sklearn with assume_centered=True
+        n, p = X.shape
+        second = X.T @ X / n
+        mu = np.trace(second) / p
+        beta = ((X ** 2).T @ (X ** 2)).sum() / n - (second ** 2).sum()
+        beta /= p * n
+        delta = ((second ** 2).sum() - 2 * mu * np.trace(second) + p * mu ** 2) / p
+        self.assertAlmostEqual(estimator.shrinkage_intensity(), min(beta, delta) / delta)
+        shrunk = estimator.covariance()
+        self.assertTrue(np.all(np.linalg.eigvalsh(shrunk) > 0))
+
+        restored = CovarianceEstimator.from_dict(json.loads(json.dumps(estimator.to_dict())))
+        for estimate in (estimator, restored):
+            estimate.update_prices_many(self.prices[40:])
+        np.testing.assert_allclose(restored.covariance(), estimator.covariance())
+
+if __name__ == '__main__':
+    unittest.main()
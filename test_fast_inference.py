@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from fast_inference import NumpyModel, export_model, load_numpy_model
+
+try:
+    import tensorflow as tf
+except ImportError:
+    tf = None
+
+def reference_lstm(x, kernel, recurrent, bias):
+    # Textbook Keras LSTM with gates in (i, f, c, o) order
+    sigmoid = lambda v: 1 / (1 + np.exp(-v))
+    units = recurrent.shape[0]
+    h = np.zeros((len(x), units))
+    c = np.zeros((len(x), units))
+    outputs = []
+    for t in range(x.shape[1]):
+        z = x[:, t] @ kernel + h @ recurrent + bias
+        i, f, g, o = sigmoid(z[:, :units]), sigmoid(z[:, units:2 * units]), np.tanh(z[:, 2 * units:3 * units]), sigmoid(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        outputs.append(h)
+    return np.stack(outputs, axis=1)
+
+class TestNumpyModel(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_lstm_matches_reference(self):
+        kernel, recurrent, bias = self.rng.normal(0, 0.3, (3, 32)), self.rng.normal(0, 0.3, (8, 32)), self.rng.normal(0, 0.3, 32)
+        spec = {'type': 'LSTM', 'activation': 'tanh', 'recurrent_activation': 'sigmoid', 'return_sequences': True, 'weights': 3}
+        model = NumpyModel([spec], [[kernel, recurrent, bias]])
+        x = self.rng.normal(size=(4, 20, 3))
+        np.testing.assert_allclose(model.predict(x), reference_lstm(x, kernel, recurrent, bias), atol=1e-5)
+
+    def test_fused_embedding_conv_matches_unfused(self):
+        specs = [{'type': 'Embedding', 'weights': 1}, {'type': 'Conv1D', 'activation': 'relu', 'weights': 2},
+                 {'type': 'GlobalMaxPooling1D', 'weights': 0}, {'type': 'Dense', 'activation': 'sigmoid', 'weights': 2}]
+        weights = [[self.rng.normal(size=(50, 8))], [self.rng.normal(size=(3, 8, 6)), self.rng.normal(size=6)], [],
+                   [self.rng.normal(size=(6, 1)), self.rng.normal(size=1)]]
+        tokens = self.rng.integers(0, 50, (5, 12))
+        fused = NumpyModel(specs, weights).predict(tokens)
+        unfused = NumpyModel(specs, weights, fuse=False).predict(tokens)
+        np.testing.assert_allclose(fused, unfused, rtol=1e-5)
+        self.assertEqual(fused.shape, (5, 1))
+
+    @unittest.skipIf(tf is None, "TensorFlow is not installed")
+    def test_export_matches_keras(self):
+        models = {
+            'lstm': (tf.keras.Sequential([tf.keras.layers.LSTM(50, return_sequences=True, input_shape=(60, 1)),
+                                          tf.keras.layers.LSTM(50), tf.keras.layers.Dense(1)]),
+                     self.rng.random((8, 60, 1), dtype=np.float32)),
+            'sentiment': (tf.keras.Sequential([tf.keras.layers.Embedding(5000, 128), tf.keras.layers.Conv1D(128, 5, activation='relu'),
+                                               tf.keras.layers.GlobalMaxPooling1D(), tf.keras.layers.Dense(10, activation='relu'),
+                                               tf.keras.layers.Dense(1, activation='sigmoid')]),
+                          self.rng.integers(0, 5000, (8, 100))),
+        }
+        for name, (keras_model, X) in models.items():
+            expected = keras_model.predict(X, verbose=0)
+            path = os.path.join(tempfile.mkdtemp(), f'{name}.npz')
+            export_model(keras_model, path)
+            np.testing.assert_allclose(load_numpy_model(path).predict(X), expected, atol=1e-5, err_msg=name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from feature_store import FeatureStore, compute_features
+
+def build_features(root, candles, queue):
+    features = FeatureStore(root).get(candles)
+    queue.put(np.asarray(features.raw).tobytes())
+
+class TestFeatureStore(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 3000)))
+        self.candles = pd.DataFrame({'timestamp': np.arange(close.size) * 60000, 'close': close,
+                                     'volume': rng.uniform(1, 10, close.size)})
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_append_matches_full_computation_and_rescales(self):
+        store = FeatureStore(self.root)
+        store.get(self.candles.iloc[:2000])
+        extended = self.candles.copy()
+        # A new high forces the scaler range, and every scaled row, to be updated
+        extended.loc[2999, 'close'] = extended['close'].max() * 2
+        features = store.get(extended)
+
+        expected = compute_features(extended).to_numpy(dtype=np.float32)
+        np.testing.assert_allclose(np.asarray(features.raw), expected, rtol=1e-6)
+        close = features.scaled[:, features.columns.index('close')]
+        self.assertEqual(close.max(), 1.0)
+        self.assertEqual(close[-1], 1.0)
+
+    def test_windows_and_inverse_transform(self):
+        features = FeatureStore(self.root).get(self.candles)
+        X, y = features.windows(60)
+        self.assertEqual(X.shape, (len(self.candles) - 61, 60, 1))
+        np.testing.assert_array_equal(X[1, :-1, 0], X[0, 1:, 0])
+        self.assertEqual(y[0], X[1, -1, 0])
+        restored = features.target_scaler().inverse_transform(y[:5].reshape(-1, 1))[:, 0]
+        np.testing.assert_allclose(restored, self.candles['close'].to_numpy()[60:65], rtol=1e-5)
+
+        new_X, _ = features.windows(60, start=len(self.candles) - 10)
+        self.assertEqual(len(new_X), 9)
+
+    def test_sliding_windows_are_evicted(self):
+        store = FeatureStore(self.root)
+        first = store.get(self.candles.iloc[:500])
+        dataset_bytes = sum(os.path.getsize(os.path.join(first.path, name)) for name in os.listdir(first.path))
+        store.max_bytes = 3 * dataset_bytes
+        # Every cycle of a live loop passes a window starting one candle later
+        for start in range(1, 10):
+            features = store.get(self.candles.iloc[start:start + 500])
+        datasets = os.listdir(self.root)
+        self.assertEqual(len(datasets), 3)
+        self.assertTrue(os.path.exists(features.path))
+        self.assertFalse(os.path.exists(first.path))
+
+    def test_processes_share_a_dataset(self):
+        queue = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=build_features, args=(self.root, self.candles, queue)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        results = [queue.get(timeout=60) for _ in processes]
+        for process in processes:
+            process.join(timeout=60)
+        expected = compute_features(self.candles).to_numpy(dtype=np.float32).tobytes()
+        self.assertTrue(all(result == expected for result in results))
+
+        # A rebuild replaces the files, so features mapped before it keep their values
+        features = FeatureStore(self.root).get(self.candles)
+        before = np.array(features.raw)
+        changed = self.candles.copy()
+        changed.loc[1000:, 'close'] *= 1.5
+        rebuilt = FeatureStore(self.root).get(changed)
+        self.assertEqual(rebuilt.path, features.path)
+        np.testing.assert_array_equal(np.asarray(features.raw), before)
+        np.testing.assert_allclose(np.asarray(rebuilt.raw), compute_features(changed).to_numpy(dtype=np.float32), rtol=1e-6)
+
+if __name__ == '__main__':
+    unittest.main()
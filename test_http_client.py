@@ -0,0 +1,86 @@
+import asyncio
+import unittest
+from aiohttp import web
+from http_client import AsyncHTTPClient, CircuitOpenError, HTTPStatusError
+
+class TestAsyncHTTPClient(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.calls = 0
+        self.failures = 0
+
+        async def sentiment(request):
+            self.calls += 1
+            if self.calls <= self.failures:
+                return web.Response(status=503)
+            return web.json_response({'score': 0.5})
+
+        async def missing(request):
+            self.calls += 1
+            return web.Response(status=404)
+
+        async def slow(request):
+            await asyncio.sleep(1)
+            return web.json_response({})
+
+        app = web.Application()
+        app.router.add_get('/sentiment', sentiment)
+        app.router.add_get('/missing', missing)
+        app.router.add_get('/slow', slow)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.base = f'http://127.0.0.1:{port}'
+        self.client = AsyncHTTPClient(backoff=0.001, failure_threshold=3, reset_timeout=60)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.runner.cleanup()
+
+    async def test_retries_server_errors_but_not_client_errors(self):
+        self.failures = 2
+        response = await self.client.get(self.base + '/sentiment')
+        self.assertEqual(response.json(), {'score': 0.5})
+        self.assertEqual(self.calls, 3)
+
+        self.calls = 0
+        with self.assertRaises(HTTPStatusError) as raised:
+            await self.client.get(self.base + '/missing')
+        self.assertEqual(raised.exception.status, 404)
+        self.assertEqual(self.calls, 1)
+
+    async def test_circuit_opens_after_repeated_failures(self):
+        self.failures = 100
+        with self.assertRaises(HTTPStatusError):
+            await self.client.get(self.base + '/sentiment', max_retries=5)
+        # The third consecutive failure opened the circuit, so later calls never reach the server
+        self.assertEqual(self.calls, 3)
+        with self.assertRaises(CircuitOpenError):
+            await self.client.get(self.base + '/sentiment')
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(self.client.breaker(self.base).state, 'open')
+
+    async def test_cancelled_trial_does_not_block_the_circuit(self):
+        client = AsyncHTTPClient(backoff=0.001, failure_threshold=1, reset_timeout=0.05)
+        self.failures = 1
+        with self.assertRaises(HTTPStatusError):
+            await client.get(self.base + '/sentiment', max_retries=0)
+        await asyncio.sleep(0.06)
+        self.assertEqual(client.breaker(self.base).state, 'half_open')
+
+        # The half-open trial is cancelled, as request() does when its deadline passes
+        trial = asyncio.ensure_future(client.get(self.base + '/slow'))
+        await asyncio.sleep(0.05)
+        trial.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await trial
+
+        response = await client.get(self.base + '/sentiment')
+        self.assertEqual(response.json(), {'score': 0.5})
+        self.assertEqual(client.breaker(self.base).state, 'closed')
+        await client.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+import unittest
+import numpy as np
+from market_data_bus import CANDLE, MarketDataPublisher, RingChannel, channel_name, shared_ohlcv
+from mock_exchange import MockExchange
+
+PREFIX = f"mdbustest{os.getpid()}"
+
+def read_closes(queue):
+    df = shared_ohlcv('BTCUSDT', '1h', limit=50, prefix=PREFIX)
+    queue.put(None if df is None else df['close'].tolist())
+
+class TestMarketDataBus(unittest.TestCase):
+
+    def test_ring_wraps_and_serves_contiguous_views(self):
+        name = channel_name('candles', 'ETH/USDT', '1m', PREFIX)
+        writer = RingChannel(name, 'candles', capacity=8, create=True)
+        try:
+            reader = RingChannel(name)
+            records = np.array([(i, i, i + 1, i - 1, i + 0.5, 10) for i in range(13)], dtype=CANDLE)
+            writer.extend(records[:5])
+            for record in records[5:]:
+                writer.append(record)
+            self.assertEqual(len(reader), 8)
+
+            seq, view = reader.window(6)
+            self.assertEqual(view['timestamp'].tolist(), list(range(7, 13)))
+            self.assertFalse(view.flags.writeable)
+            self.assertTrue(np.shares_memory(view, reader.records))
+            self.assertTrue(reader.consistent(seq))
+
+            writer.update_last((12, 12, 14, 11, 13.5, 25))
+            self.assertFalse(reader.consistent(seq))
+            self.assertEqual(reader.latest()['close'], 13.5)
+            self.assertEqual(reader.snapshot()['timestamp'].tolist(), list(range(5, 13)))
+
+            writer.extend(np.array([(i, i, i + 1, i - 1, i + 0.5, 10) for i in range(13, 23)], dtype=CANDLE))
+            self.assertEqual(int(reader.header['count']), 23)
+            writer.append((23, 23, 24, 22, 23.5, 10))
+            self.assertEqual(reader.snapshot()['timestamp'].tolist(), list(range(16, 24)))
+            reader.close()
+        finally:
+            writer.close()
+            writer.unlink()
+
+    def test_strategy_process_reads_published_candles(self):
+        exchange = MockExchange(seed=3)
+        exchange.add_symbol('BTC/USDT')
+        exchange.rewind(900)
+        publisher = MarketDataPublisher(exchange, ['BTC/USDT'], timeframes=('1h',), capacity=500, prefix=PREFIX)
+        try:
+            publisher.poll()
+            for _ in range(3):
+                exchange.advance()
+                publisher.poll()
+            expected = [candle[4] for candle in exchange.fetch_ohlcv('BTC/USDT', '1h', limit=50)]
+            self.assertEqual(publisher.tickers['BTC/USDT'].latest()['last'], expected[-1])
+
+            queue = multiprocessing.Queue()
+            process = multiprocessing.Process(target=read_closes, args=(queue,))
+            process.start()
+            closes = queue.get(timeout=30)
+            process.join(timeout=30)
+            self.assertEqual(closes, expected)
+            self.assertIsNone(shared_ohlcv('BTCUSDT', '1h', limit=501, prefix=PREFIX))
+        finally:
+            publisher.close()
+        self.assertIsNone(shared_ohlcv('SOL/USDT', '1h', prefix=PREFIX))
+
+    def test_reader_reattaches_after_publisher_restart(self):
+        exchange = MockExchange(seed=5)
+        exchange.add_symbol('BTC/USDT')
+        exchange.rewind(100)
+        publisher = MarketDataPublisher(exchange, ['BTC/USDT'], timeframes=('1h',), capacity=200, prefix=PREFIX)
+        try:
+            publisher.poll()
+            first = shared_ohlcv('BTCUSDT', '1h', prefix=PREFIX)
+        finally:
+            publisher.close()
+
+        def restart(capacity):
+            exchange.advance()
+            publisher = MarketDataPublisher(exchange, ['BTC/USDT'], timeframes=('1h',), capacity=capacity, prefix=PREFIX)
+            self.addCleanup(publisher.close)
+            publisher.poll()
+            expected = [candle[4] for candle in exchange.fetch_ohlcv('BTC/USDT', '1h', limit=capacity)]
+            self.assertEqual(shared_ohlcv('BTCUSDT', '1h', prefix=PREFIX)['close'].tolist(), expected)
+
+        # A clean restart with a new capacity, then one after a crash that left the segment behind
+        restart(50)
+        self.assertGreater(len(first), 50)
+        restart(40)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import ccxt
+from mock_exchange import MockExchange, generate_synthetic_candles
+
+class TestMockExchange(unittest.TestCase):
+
+    def setUp(self):
+        self.candles = generate_synthetic_candles(50, start_price=30000, seed=1)
+        self.exchange = MockExchange(candles={'BTCUSDT': self.candles}, seed=1)
+        self.exchange.rewind(9)
+
+    def test_fetch_ohlcv_replays_up_to_cursor(self):
+        ohlcv = self.exchange.fetch_ohlcv('BTCUSDT', limit=5)
+        self.assertEqual(len(ohlcv), 5)
+        self.assertEqual(ohlcv[-1], self.candles[9].tolist())
+
+        self.exchange.advance()
+        self.assertEqual(self.exchange.fetch_ticker('BTCUSDT')['last'], self.candles[10, 4])
+
+    def test_market_order_updates_position_and_balance(self):
+        self.exchange.set_leverage(10, 'BTCUSDT')
+        order = self.exchange.create_order('BTCUSDT', 'market', 'buy', 0.5)
+        self.assertEqual(order['status'], 'closed')
+        self.assertEqual(order['average'], self.candles[9, 4])
+
+        positions = self.exchange.fetch_positions()
+        self.assertEqual(positions[0]['side'], 'long')
+        self.assertEqual(positions[0]['contracts'], 0.5)
+
+        self.exchange.create_order('BTCUSDT', 'market', 'sell', 0.5)
+        self.assertEqual(self.exchange.fetch_positions(), [])
+        fees = 0.5 * self.candles[9, 4] * self.exchange.fee * 2
+        self.assertAlmostEqual(self.exchange.fetch_balance()['total']['USDT'], 10000 - fees, places=6)
+
+    def test_limit_order_fills_when_crossed(self):
+        price = float(self.candles[10:, 3].min())
+        order = self.exchange.create_order('BTCUSDT', 'limit', 'buy', 1, price)
+        self.assertEqual(order['status'], 'open')
+        while self.exchange.advance():
+            pass
+        self.assertEqual(self.exchange.fetch_order(order['id'])['status'], 'closed')
+
+    def test_duplicate_client_order_id_is_rejected(self):
+        params = {'clientOrderId': 'abc'}
+        self.exchange.create_order('BTCUSDT', 'market', 'buy', 0.1, params=params)
+        with self.assertRaises(ccxt.DuplicateOrderId):
+            self.exchange.create_order('BTCUSDT', 'market', 'buy', 0.1, params=params)
+
+    def test_injected_errors_and_rate_limit(self):
+        failing = MockExchange(error_rate=1.0, seed=1)
+        with self.assertRaises(ccxt.NetworkError):
+            failing.fetch_ticker('BTCUSDT')
+
+        limited = MockExchange(rate_limit=2, seed=1)
+        limited.fetch_ticker('BTCUSDT')
+        limited.fetch_ticker('BTCUSDT')
+        with self.assertRaises(ccxt.RateLimitExceeded):
+            limited.fetch_ticker('BTCUSDT')
+
+if __name__ == '__main__':
+    unittest.main()
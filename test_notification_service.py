@@ -0,0 +1,72 @@
+import time
+import unittest
+from notification_service import NotificationService
+
+class RecordingChannel:
+    name = 'email'
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.messages = []
+
+    def send(self, subject, body, to=None):
+        time.sleep(self.delay)
+        self.messages.append((subject, body, to))
+
+    def idle(self):
+        pass
+
+    def close(self):
+        pass
+
+class TestNotificationService(unittest.TestCase):
+
+    def test_coalesces_and_rate_limits_into_digest(self):
+        channel = RecordingChannel()
+        service = NotificationService([channel], coalesce_window=60, rate_limit=2, rate_period=3600, digest_interval=3600)
+        for _ in range(100):
+            service.notify("Stop loss hit on BTCUSDT")
+        service.notify("Order rejected", to='ops@example.com')
+        service.notify("Exchange reconnected")
+        service.notify("Exchange initialized", digest=True)
+        self.assertTrue(service.flush(5))
+
+        # Two messages within the rate limit, then one digest
+        self.assertEqual(len(channel.messages), 3)
+        self.assertEqual(channel.messages[0][1], "Stop loss hit on BTCUSDT")
+        self.assertEqual(channel.messages[1][2], 'ops@example.com')
+        subject, body, to = channel.messages[2]
+        self.assertIn("3 notifications", subject)
+        self.assertIn("Exchange reconnected", body)
+        self.assertIn("Exchange initialized", body)
+        self.assertIn("Stop loss hit on BTCUSDT (repeated 99 more times)", body)
+        service.close()
+
+    def test_repeats_survive_an_expired_window(self):
+        channel = RecordingChannel()
+        service = NotificationService([channel], coalesce_window=0.2, digest_interval=3600)
+        for _ in range(5):
+            service.notify("Funding rate spike")
+        time.sleep(0.3)
+        # A new window starts before the digest has reported the old one's repeats
+        service.notify("Funding rate spike")
+        service.notify("Funding rate spike")
+        self.assertTrue(service.flush(5))
+
+        self.assertEqual([body for _, body, _ in channel.messages[:2]], ["Funding rate spike"] * 2)
+        body = channel.messages[2][1]
+        self.assertIn("Funding rate spike (repeated 4 more times)", body)
+        self.assertIn("Funding rate spike (repeated 1 more times)", body)
+        service.close()
+
+    def test_notify_does_not_wait_for_slow_channels(self):
+        channel = RecordingChannel(delay=0.5)
+        service = NotificationService([channel])
+        start = time.perf_counter()
+        for i in range(50):
+            service.notify(f"Alert {i}")
+        self.assertLess(time.perf_counter() - start, 0.1)
+        service.close(timeout=0.1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import asyncio
+import unittest
+import ccxt
+import pandas as pd
+from mock_exchange import MockExchange
+from order_router import OrderRouter, bar_intent_id, make_client_order_id
+
+class NoOpenOrdersExchange(MockExchange):
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params={}):
+        raise ccxt.NotSupported('fetch_open_orders() is not supported')
+
+class LookupOutageExchange(MockExchange):
+    lookups_down = True
+
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params={}):
+        if self.lookups_down:
+            raise ccxt.NetworkError('lookup timed out')
+        return super().fetch_open_orders(symbol, since, limit, params)
+
+    def fetch_orders(self, symbol=None, since=None, limit=None, params={}):
+        if self.lookups_down:
+            raise ccxt.NetworkError('lookup timed out')
+        return super().fetch_orders(symbol, since, limit, params)
+
+class TestOrderRouter(unittest.TestCase):
+
+    def test_client_order_id_is_deterministic(self):
+        first = make_client_order_id('sma', 'BTCUSDT', 'buy', 0.01, intent_id=1625097600000)
+        self.assertEqual(first, make_client_order_id('sma', 'BTCUSDT', 'buy', 0.01, intent_id=1625097600000))
+        self.assertNotEqual(first, make_client_order_id('sma', 'BTCUSDT', 'buy', 0.01, intent_id=1625101200000))
+        self.assertLessEqual(len(first), 36)
+
+        bar = pd.Timestamp('2021-07-01 00:00:00')
+        self.assertEqual(bar_intent_id(bar), 1625097600000)
+        self.assertEqual(bar_intent_id(bar.to_datetime64()), 1625097600000)
+        self.assertEqual(bar_intent_id(1625097600000), 1625097600000)
+
+    def test_lost_acknowledgements_never_double_fill(self):
+        exchange = MockExchange(ack_loss_rate=0.3, seed=5)
+        router = OrderRouter(exchange, default_rate=1000, retry_delay=0)
+        batch = [{'symbol': f'SYM{i % 4}USDT', 'side': 'buy', 'amount': 1, 'intent_id': i} for i in range(40)]
+        # Every intent is submitted twice, as if the caller retried after a timeout
+        results = asyncio.run(router.submit_many(batch + batch))
+
+        self.assertFalse([result for result in results if isinstance(result, Exception)])
+        self.assertEqual(len(exchange.orders), 40)
+        self.assertEqual(router.stats()['states'], {'filled': 40})
+
+    def test_lookup_skips_unsupported_endpoints(self):
+        exchange = NoOpenOrdersExchange(ack_loss_rate=1.0, seed=5)
+        router = OrderRouter(exchange, default_rate=1000, retry_delay=0)
+        tracked = asyncio.run(router.submit('SYM0USDT', 'buy', 1, intent_id=1))
+        self.assertEqual(tracked.state, 'filled')
+        self.assertEqual(len(exchange.orders), 1)
+
+    def test_unconfirmed_order_is_looked_up_again_on_resubmit(self):
+        exchange = LookupOutageExchange(ack_loss_rate=1.0, seed=5)
+        router = OrderRouter(exchange, default_rate=1000, max_retries=1, retry_delay=0)
+        with self.assertRaises(ccxt.RequestTimeout):
+            asyncio.run(router.submit('SYM0USDT', 'buy', 1, intent_id=1))
+        self.assertEqual(router.stats()['states'], {'unknown': 1})
+
+        exchange.lookups_down = False
+        tracked = asyncio.run(router.submit('SYM0USDT', 'buy', 1, intent_id=1))
+        self.assertEqual(tracked.state, 'filled')
+        self.assertIsNotNone(tracked.info)
+        self.assertEqual(exchange.calls['create_order'], 1)
+
+    def test_finished_orders_are_pruned(self):
+        router = OrderRouter(MockExchange(seed=5), default_rate=1000, max_orders=5)
+        batch = [{'symbol': 'SYM0USDT', 'side': 'buy', 'amount': 1, 'intent_id': i} for i in range(8)]
+        results = asyncio.run(router.submit_many(batch))
+        self.assertEqual(list(router.orders), [tracked.client_order_id for tracked in results[3:]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from paper_trading import FeeModel, FixedSlippage, OrderBook, PaperTradingEngine
+
+class TestOrderBook(unittest.TestCase):
+
+    def test_price_time_priority_and_partial_fill(self):
+        book = OrderBook('BTCUSDT')
+        first = {'side': 'buy', 'price': 100.0, 'remaining': 1.0}
+        second = {'side': 'buy', 'price': 100.0, 'remaining': 1.0}
+        better = {'side': 'buy', 'price': 101.0, 'remaining': 1.0}
+        for order in (first, second, better):
+            book.add(order)
+        self.assertEqual(book.best_bid(), 101.0)
+
+        fills = book.match(100.0, liquidity=1.5)
+        self.assertEqual([(order is better, quantity) for order, quantity in fills], [(True, 1.0), (False, 0.5)])
+        self.assertIs(fills[1][0], first)
+        self.assertEqual(book.best_bid(), 100.0)
+
+class TestPaperTradingEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = PaperTradingEngine(balance=1000, fee_model=FeeModel(maker=0.0, taker=0.001),
+                                         slippage_model=FixedSlippage(bps=10))
+        self.engine.on_trade('BTCUSDT', 100.0)
+
+    def test_market_order_applies_slippage_and_fees(self):
+        order = self.engine.create_order('BTCUSDT', 'market', 'buy', 2)
+        self.assertEqual(order['status'], 'closed')
+        self.assertAlmostEqual(order['average'], 100.1)
+        self.assertAlmostEqual(self.engine.balance['USDT'], 1000 - 2 * 100.1 * 0.001)
+        self.assertEqual(self.engine.positions['BTCUSDT']['contracts'], 2)
+
+    def test_limit_order_partially_fills_from_trades(self):
+        order = self.engine.create_order('BTCUSDT', 'limit', 'buy', 3, 99.0)
+        self.engine.on_trade('BTCUSDT', 99.5, amount=5)
+        self.assertEqual(self.engine.fetch_order(order['id'])['filled'], 0)
+
+        self.engine.on_trade('BTCUSDT', 99.0, amount=1)
+        self.assertEqual(self.engine.fetch_order(order['id'])['filled'], 1)
+        self.engine.on_trade('BTCUSDT', 98.0, amount=5)
+        filled = self.engine.fetch_order(order['id'])
+        self.assertEqual(filled['status'], 'closed')
+        self.assertEqual(filled['average'], 99.0)
+
+    def test_stop_loss_and_take_profit_fire_within_candle(self):
+        self.engine.slippage_model = FixedSlippage()
+        self.engine.create_order('BTCUSDT', 'market', 'buy', 1)
+        stop = self.engine.create_order('BTCUSDT', 'stop', 'sell', 1, 95.0, {'reduceOnly': True})
+        take_profit = self.engine.create_order('BTCUSDT', 'take_profit', 'sell', 1, 110.0, {'reduceOnly': True})
+
+        # Down bar: open -> high -> low -> close, so the take-profit is touched first
+        self.engine.on_candle('BTCUSDT', [0, 100.0, 111.0, 94.0, 96.0, 0])
+        self.assertEqual(self.engine.fetch_order(take_profit['id'])['average'], 110.0)
+        self.assertEqual(self.engine.fetch_order(stop['id'])['status'], 'canceled')
+        self.assertNotIn('BTCUSDT', self.engine.positions)
+        self.assertAlmostEqual(self.engine.trades[1]['realized_pnl'], 10.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import pandas as pd
+from performance_metrics import compute_metrics, pad_trades, rank_results, rolling_metrics
+
+class TestPerformanceMetrics(unittest.TestCase):
+
+    def test_metrics_of_a_small_curve_and_of_a_sweep(self):
+        equity = np.array([100.0, 110.0, 99.0, 104.5, 121.0])
+        metrics = compute_metrics(equity, positions=[1, 1, 0, 0.5, 0.5], trade_pnls=[10, -11, 5.5, 16.5],
+                                  periods_per_year=4)
+        returns = pd.Series(equity).pct_change().dropna()
+        downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+        self.assertAlmostEqual(metrics['total_return'], 0.21)
+        self.assertAlmostEqual(metrics['annual_return'], 0.21)
+        self.assertAlmostEqual(metrics['sharpe'], returns.mean() / returns.std() * 2)
+        self.assertAlmostEqual(metrics['sortino'], returns.mean() / downside * 2)
+        self.assertAlmostEqual(metrics['max_drawdown'], 0.1)
+        self.assertEqual(metrics['max_drawdown_duration'], 2)
+        self.assertAlmostEqual(metrics['calmar'], 2.1)
+        self.assertAlmostEqual(metrics['win_rate'], 0.75)
+        self.assertAlmostEqual(metrics['profit_factor'], 32 / 11)
+        self.assertAlmostEqual(metrics['exposure'], 0.8)
+        self.assertAlmostEqual(metrics['turnover'], (1 + 1 + 0.5) / 5 * 4)
+
+        rng = np.random.default_rng(0)
+        curves = 1000 * np.cumprod(1 + rng.normal(0, 0.01, (50, 200)), axis=1)
+        trades = [rng.normal(1, 10, n) for n in rng.integers(0, 30, 50)]
+        sweep = compute_metrics(curves, trade_pnls=pad_trades(trades), initial_capital=1000)
+        for row in (0, 17, 49):
+            single = compute_metrics(curves[row], trade_pnls=trades[row], initial_capital=1000)
+            for name, value in single.items():
+                np.testing.assert_allclose(sweep[name][row], value, err_msg=name)
+
+        ranked = rank_results(sweep, by='sharpe', top=10)
+        self.assertEqual(list(ranked.index), list(np.argsort(-sweep['sharpe'], kind='stable')[:10]))
+
+    def test_rolling_metrics_match_pandas_windows(self):
+        rng = np.random.default_rng(1)
+        equity = 1000 * np.cumprod(1 + rng.normal(0.001, 0.01, 300))
+        positions = (rng.random(300) < 0.5).astype(float)
+        rolling = rolling_metrics(equity, 50, positions=positions, periods_per_year=1)
+
+        returns = pd.Series(equity).pct_change()
+        expected = returns.rolling(49).mean() / returns.rolling(49).std()
+        np.testing.assert_allclose(rolling['sharpe'][49:], expected[49:], rtol=1e-8)
+        self.assertTrue(np.isnan(rolling['sharpe'][:49]).all())
+        np.testing.assert_allclose(rolling['exposure'][49:], pd.Series(positions).rolling(50).mean()[49:])
+        for t in (49, 120, 299):
+            window = compute_metrics(equity[t - 49:t + 1], periods_per_year=1)
+            self.assertAlmostEqual(rolling['max_drawdown'][t], window['max_drawdown'])
+            self.assertEqual(rolling['max_drawdown_duration'][t], window['max_drawdown_duration'])
+            self.assertAlmostEqual(rolling['total_return'][t], window['total_return'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+import pandas as pd
+from portfolio_backtester import backtest_portfolio, position_sizes, signals_to_positions
+
+class TestPortfolioBacktester(unittest.TestCase):
+
+    def test_single_symbol_matches_hand_calculation(self):
+        close = pd.DataFrame({'BTC/USDT': [100.0, 110.0, 121.0]})
+        directions = signals_to_positions(pd.DataFrame({'BTC/USDT': ['buy', 'hold', 'sell']}))
+        self.assertEqual(directions['BTC/USDT'].tolist(), [1.0, 1.0, 0.0])
+
+        history, positions, final_balance = backtest_portfolio(close, directions, initial_capital=10000,
+                                                               risk_percentage=1.0, stop_loss_pct=0.02,
+                                                               rebalance_every=0, transaction_cost=0.001)
+        # 1% of 10,000 risked with the stop 2 below the entry: 50 units, sold at 121
+        self.assertEqual(positions['BTC/USDT'].tolist(), [50.0, 50.0, 0.0])
+        self.assertAlmostEqual(history['costs'].sum(), 0.001 * (5000 + 6050))
+        self.assertAlmostEqual(final_balance, 10000 + 50 * 21 - 0.001 * (5000 + 6050))
+
+        # A stop at the entry has no defined risk, so nothing is bought
+        sizes = position_sizes(10000, 1.0, np.array([100.0, 100.0, 100.0]), np.array([98.0, 100.0, 99.9]))
+        np.testing.assert_allclose(sizes, [50.0, 0.0, 100.0])
+
+    def test_leverage_cap_and_missing_prices(self):
+        close = pd.DataFrame({'A': [100.0, 100.0], 'B': [50.0, 50.0], 'C': [np.nan, 20.0]})
+        directions = pd.DataFrame(1.0, index=close.index, columns=close.columns)
+        history, positions, _ = backtest_portfolio(close, directions, initial_capital=10000, risk_percentage=1.0,
+                                                   stop_loss_pct=0.02, max_leverage=0.6, transaction_cost=0.0)
+        # Each target is 5,000 of notional; together they are scaled down to 60% of equity
+        np.testing.assert_allclose(positions.iloc[0].to_numpy(), [30.0, 60.0, 0.0])
+        self.assertAlmostEqual(history['leverage'].iloc[0], 0.6)
+        # C only gets a price on the second bar, when the cap leaves no room without resizing A and B
+        self.assertAlmostEqual(positions['C'].iloc[1], 0.0)
+        self.assertAlmostEqual(history['gross_exposure'].iloc[1], 6000.0)
+
+if __name__ == '__main__':
+    unittest.main()
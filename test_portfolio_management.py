@@ -0,0 +1,87 @@
+import unittest
+from unittest import mock
+import numpy as np
+import portfolio_management
+
+class StubExchange:
+    def __init__(self, positions, tickers=None):
+        self.positions = positions
+        self.tickers = tickers or {}
+        self.calls = {'fetch_positions': 0, 'fetch_tickers': []}
+
+    def fetch_positions(self):
+        self.calls['fetch_positions'] += 1
+        return self.positions
+
+    def fetch_tickers(self, symbols):
+        self.calls['fetch_tickers'].append(list(symbols))
+        return {symbol: self.tickers[symbol] for symbol in symbols if symbol in self.tickers}
+
+def position(symbol, side, contracts, entry_price, mark_price=None):
+    return {'symbol': symbol, 'side': side, 'contracts': contracts, 'entryPrice': entry_price,
+            'markPrice': mark_price, 'info': {'side': 'Buy' if side == 'long' else 'Sell'}}
+
+class TestPortfolioManagement(unittest.TestCase):
+
+    def setUp(self):
+        portfolio_management._market_cache.clear()
+        self.exchange = StubExchange([
+            position('BTC/USDT:USDT', 'long', 0.5, 20000.0, 22000.0),
+            position('ETH/USDT:USDT', 'short', 4.0, 1500.0),
+            position('XRP/USDT:USDT', 'long', 1000.0, 0.5, 0.6),
+            dict(position('SOL/USDT:USDT', 'long', 0.0, 20.0, 25.0), info={'side': 'None'}),
+        ], tickers={'ETH/USDT:USDT': {'last': 1400.0}})
+        patcher = mock.patch.object(portfolio_management, 'exchange', self.exchange)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(portfolio_management._market_cache.clear)
+
+    def test_snapshot_matches_row_wise_formulas_with_bulk_requests(self):
+        targets = {'BTC/USDT:USDT': 0.5, 'ETH/USDT:USDT': 0.5}
+        with mock.patch.object(portfolio_management.time, 'monotonic', return_value=100.0):
+            portfolio = portfolio_management.portfolio_snapshot(targets, ttl=2.0)
+            portfolio_management.portfolio_snapshot(ttl=2.0)
+        self.assertEqual(self.exchange.calls['fetch_positions'], 1)
+        # Only the position without a mark price needs a ticker
+        self.assertEqual(self.exchange.calls['fetch_tickers'], [['ETH/USDT:USDT']])
+
+        prices = {'BTC/USDT:USDT': 22000.0, 'ETH/USDT:USDT': 1400.0, 'XRP/USDT:USDT': 0.6}
+        self.assertEqual(portfolio['asset'].tolist(), list(prices))
+        values = []
+        for _, row in portfolio.iterrows():
+            price = prices[row['asset']]
+            if row['side'] == 'long':
+                values.append(row['quantity'] * (price - row['entry_price']))
+            else:
+                values.append(row['quantity'] * (row['entry_price'] - price))
+        total_value = sum(values)
+        np.testing.assert_allclose(portfolio['value'], values)
+        np.testing.assert_allclose(portfolio['weight'], [value / total_value for value in values])
+        target_quantity = [total_value * targets[asset] / prices[asset] for asset in targets]
+        np.testing.assert_allclose(portfolio['target_quantity'][:2], target_quantity)
+        self.assertTrue(np.isnan(portfolio['target_quantity'][2]))
+
+        portfolio_management.rebalance_portfolio(portfolio, targets)
+        np.testing.assert_allclose(portfolio['quantity'], target_quantity + [1000.0])
+        np.testing.assert_allclose(portfolio['weight'][:2], [0.5, 0.5])
+
+        # Once the TTL has passed positions are fetched again
+        with mock.patch.object(portfolio_management.time, 'monotonic', return_value=102.5):
+            portfolio_management.portfolio_snapshot(ttl=2.0)
+        self.assertEqual(self.exchange.calls['fetch_positions'], 2)
+
+    def test_empty_portfolio_and_bounded_cache(self):
+        self.exchange.positions = []
+        portfolio = portfolio_management.portfolio_snapshot({'BTC/USDT:USDT': 1.0})
+        self.assertTrue(portfolio.empty)
+        self.assertIn('weight', portfolio.columns)
+        self.assertIsNone(portfolio_management.rebalance_portfolio(portfolio, {'BTC/USDT:USDT': 1.0}))
+        self.assertEqual(self.exchange.calls['fetch_tickers'], [])
+
+        with mock.patch.object(portfolio_management, 'MARKET_CACHE_SIZE', 8):
+            for i in range(20):
+                portfolio_management.fetch_current_prices([f'SYM{i}/USDT:USDT'], ttl=60.0)
+            self.assertLessEqual(len(portfolio_management._market_cache), 8)
+
+if __name__ == '__main__':
+    unittest.main()
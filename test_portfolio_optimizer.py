@@ -0,0 +1,113 @@
+import itertools
+import unittest
+import numpy as np
+from portfolio_optimizer import (OptimizationError, efficient_frontier, long_only_max_sharpe, long_only_min_variance,
+                                 max_sharpe_weights, min_variance_weights, solve_long_only)
+
+try:
+    from scipy.optimize import minimize
+except ImportError:
+    minimize = None
+
+def brute_force_min_variance(cov, A, b):
+    # Solve the equality-constrained problem on every support and keep the best feasible one
+    n, best = len(cov), (np.inf, None)
+    for size in range(1, n + 1):
+        for support in itertools.combinations(range(n), size):
+            support = list(support)
+            k = len(support)
+            kkt = np.zeros((k + len(b), k + len(b)))
+            kkt[:k, :k] = cov[np.ix_(support, support)]
+            kkt[:k, k:] = -A[:, support].T
+            kkt[k:, :k] = A[:, support]
+            try:
+                solution = np.linalg.solve(kkt, np.r_[np.zeros(k), b])
+            except np.linalg.LinAlgError:
+                continue
+            weights = np.zeros(n)
+            weights[support] = solution[:k]
+            if weights.min() >= -1e-9 and np.allclose(A @ weights, b):
+                variance = weights @ cov @ weights
+                if variance < best[0]:
+                    best = (variance, weights)
+    return best[1]
+
+def slsqp_min_variance(cov, A, b):
+    n = len(cov)
+    result = minimize(lambda w: w @ cov @ w, np.full(n, 1.0 / n), jac=lambda w: 2 * cov @ w, method='SLSQP',
+                      bounds=[(0, None)] * n, constraints=[{'type': 'eq', 'fun': lambda w: A @ w - b, 'jac': lambda w: A}],
+                      options={'ftol': 1e-15, 'maxiter': 1000})
+    return result.x
+
+class TestPortfolioOptimizer(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        daily = rng.normal(0, 0.01, (250, 5)) * [1, 2, 1.5, 0.5, 3]
+        daily[:, 1] += daily[:, 0]
+        self.returns = np.array([0.10, 0.25, -0.05, 0.04, 0.30])
+        self.cov = np.cov(daily, rowvar=False) * 252
+
+    def test_long_only_solutions_match_brute_force(self):
+        weights, _ = long_only_min_variance(self.cov)
+        expected = brute_force_min_variance(self.cov, np.ones((1, 5)), np.array([1.0]))
+        np.testing.assert_allclose(weights, expected, atol=1e-9)
+
+        weights, _ = long_only_max_sharpe(self.returns, self.cov, risk_free_rate=0.01)
+        y = brute_force_min_variance(self.cov, (self.returns - 0.01)[None, :], np.array([1.0]))
+        np.testing.assert_allclose(weights, y / y.sum(), atol=1e-9)
+
+        targets, frontier, volatilities = efficient_frontier(self.returns, self.cov, n_points=10)
+        A = np.vstack([np.ones(5), self.returns])
+        for target, weights in zip(targets, frontier):
+            expected = brute_force_min_variance(self.cov, A, np.array([1.0, target]))
+            np.testing.assert_allclose(weights, expected, atol=1e-8)
+        self.assertTrue(np.all(np.diff(volatilities) >= -1e-12))
+
+    @unittest.skipIf(minimize is None, "SciPy is not installed")
+    def test_long_only_solutions_match_slsqp_on_random_problems(self):
+        rng = np.random.default_rng(11)
+        for _ in range(40):
+            n = rng.integers(8, 30)
+            # Few observations give badly conditioned, sometimes singular, covariance matrices
+            observations = rng.integers(n // 2 + 2, 4 * n)
+            factors = rng.normal(0, 0.02, (observations, 3))
+            daily = factors @ rng.normal(0, 1, (3, n)) + rng.normal(0, 0.01, (observations, n)) * rng.uniform(0.3, 3, n)
+            returns, cov = rng.normal(0.08, 0.1, n), np.cov(daily, rowvar=False) * 252
+
+            problems = [(np.ones((1, n)), np.array([1.0]), long_only_min_variance(cov)[0])]
+            y = long_only_max_sharpe(returns, cov, risk_free_rate=0.01)[0]
+            excess = returns - 0.01
+            problems.append((excess[None, :], np.array([1.0]), y / (excess @ y)))
+            targets, frontier, _ = efficient_frontier(returns, cov, n_points=8)
+            A = np.vstack([np.ones(n), returns])
+            problems += [(A, np.array([1.0, target]), weights) for target, weights in zip(targets, frontier)]
+
+            for A, b, weights in problems:
+                self.assertGreaterEqual(weights.min(), 0.0)
+                np.testing.assert_allclose(A @ weights, b, atol=1e-9)
+                expected = slsqp_min_variance(cov, A, b)
+                # SLSQP may bend the constraints slightly, so it can only come out marginally lower
+                self.assertLessEqual(weights @ cov @ weights, (expected @ cov @ expected) * (1 + 1e-6))
+
+    def test_infeasible_constraints_raise(self):
+        with self.assertRaises(OptimizationError):
+            solve_long_only(self.cov, np.ones((1, 5)), [-1.0])
+        A = np.vstack([np.ones(5), self.returns])
+        with self.assertRaises(OptimizationError):
+            solve_long_only(self.cov, A, [1.0, self.returns.max() + 0.1])
+        with self.assertRaises(OptimizationError):
+            solve_long_only(self.cov, A, [1.0, 0.2], max_iter=0)
+
+    def test_unconstrained_frontier_is_closed_form(self):
+        targets, frontier, _ = efficient_frontier(self.returns, self.cov, n_points=20, long_only=False)
+        np.testing.assert_allclose(frontier.sum(axis=1), 1.0)
+        np.testing.assert_allclose(frontier @ self.returns, targets)
+        np.testing.assert_allclose(frontier[0], min_variance_weights(self.cov), atol=1e-10)
+        # The tangency portfolio has the highest Sharpe ratio of all frontier portfolios
+        tangency = max_sharpe_weights(self.returns, self.cov, risk_free_rate=0.01)
+        sharpe = lambda w: (w @ self.returns - 0.01) / np.sqrt(w @ self.cov @ w)
+        self.assertTrue(all(sharpe(tangency) >= sharpe(weights) - 1e-12 for weights in frontier))
+
+if __name__ == '__main__':
+    unittest.main()
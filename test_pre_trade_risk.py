@@ -0,0 +1,85 @@
+import unittest
+import pandas as pd
+from mock_exchange import MockExchange
+from Placing_Orders import execute_trading_strategy
+from pre_trade_risk import PreTradeRiskGate, RiskLimits
+
+class StubExchange:
+    def fetch_balance(self):
+        return {'total': {'USDT': 10000.0}}
+
+    def fetch_positions(self):
+        return [
+            {'symbol': 'BTCUSDT', 'side': 'long', 'contracts': 0.5, 'entryPrice': 20000.0, 'markPrice': 21000.0},
+            {'symbol': 'ETHUSDT', 'side': 'short', 'contracts': 2.0, 'entryPrice': 1500.0, 'markPrice': None},
+            {'symbol': 'XRPUSDT', 'side': 'long', 'contracts': 0.0, 'entryPrice': 0.5},
+        ]
+
+class TestPreTradeRiskGate(unittest.TestCase):
+
+    def test_check_enforces_limits_and_lets_reductions_through(self):
+        limits = RiskLimits(max_order_notional=1000, max_leverage=2, max_symbol_exposure=120, max_daily_loss=50)
+        gate = PreTradeRiskGate(limits, balance=1000, positions={'BTCUSDT': (1.0, 100.0)})
+
+        self.assertFalse(gate.check('ETHUSDT', 'buy', 1)[0])  # No mark price
+        self.assertFalse(gate.check('BTCUSDT', 'buy', 0)[0])
+        self.assertFalse(gate.check('BTCUSDT', 'buy', 20, price=100.0)[0])  # Order notional
+        self.assertEqual(gate.check('BTCUSDT', 'buy', 0.1), (True, None))
+        # A buy limit below the mark still grows the position to 150 at the mark
+        approved, reason = gate.check('BTCUSDT', 'buy', 0.5, price=60.0)
+        self.assertFalse(approved)
+        self.assertIn('exposure', reason)
+
+        # Past the daily loss limit only orders that shrink the position pass, at any price
+        gate.update_mark('BTCUSDT', 40.0)
+        self.assertFalse(gate.check('BTCUSDT', 'buy', 0.1)[0])
+        self.assertEqual(gate.check('BTCUSDT', 'sell', 0.5, price=200.0), (True, None))
+        self.assertEqual(gate.check('BTCUSDT', 'sell', 1.0), (True, None))
+        self.assertFalse(gate.check('BTCUSDT', 'sell', 1.5)[0])  # Flips to a new short
+
+    def test_fills_marks_and_sync_keep_state_incremental(self):
+        gate = PreTradeRiskGate(RiskLimits(), balance=1000)
+        gate.on_fill('BTCUSDT', 'buy', 2, 100.0)
+        gate.update_mark('BTCUSDT', 110.0)
+        self.assertAlmostEqual(gate.unrealized_pnl, 20.0)
+        self.assertAlmostEqual(gate.gross_exposure, 220.0)
+
+        gate.on_fill('BTCUSDT', 'sell', 1, 120.0, fee=1.0)
+        self.assertEqual(gate.positions['BTCUSDT'], [1.0, 100.0])
+        self.assertAlmostEqual(gate.balance, 1019.0)
+        self.assertAlmostEqual(gate.unrealized_pnl, 20.0)
+        self.assertAlmostEqual(gate.gross_exposure, 120.0)
+        self.assertAlmostEqual(gate.daily_pnl(), 39.0)
+
+        gate.on_fill('BTCUSDT', 'sell', 2, 130.0)  # Close and reverse
+        self.assertEqual(gate.positions['BTCUSDT'], [-1.0, 130.0])
+        self.assertAlmostEqual(gate.balance, 1049.0)
+        self.assertAlmostEqual(gate.unrealized_pnl, 0.0)
+        self.assertAlmostEqual(gate.gross_exposure, 130.0)
+
+        gate.sync(StubExchange())
+        self.assertEqual(gate.balance, 10000.0)
+        self.assertEqual(gate.positions, {'BTCUSDT': [0.5, 20000.0], 'ETHUSDT': [-2.0, 1500.0]})
+        self.assertAlmostEqual(gate.unrealized_pnl, 500.0)
+        self.assertAlmostEqual(gate.gross_exposure, 0.5 * 21000 + 2 * 1500)
+        self.assertEqual(gate.marks['ETHUSDT'], 1500.0)
+
+    def test_trading_strategy_marks_checks_and_records_fills(self):
+        exchange = MockExchange(seed=2)
+        exchange.add_symbol('BTCUSDT')
+        exchange.rewind(100)
+        df = pd.DataFrame(exchange.fetch_ohlcv('BTCUSDT', limit=10), columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df['signal'] = ['hold', 'buy', 'hold', 'buy', 'sell', 'hold', 'buy', 'hold', 'hold', 'hold']
+        # The leverage the risk percentage allows is far above the gate's limit
+        gate = PreTradeRiskGate(RiskLimits(max_leverage=3), balance=10000)
+
+        execute_trading_strategy(exchange, df, 'BTCUSDT', 0.01, 0.5, risk_gate=gate)
+        self.assertEqual(exchange.leverage['BTCUSDT'], 3)
+        self.assertEqual(gate.leverage['BTCUSDT'], 3)
+        self.assertEqual(len(exchange.orders), 4)
+        self.assertAlmostEqual(gate.positions['BTCUSDT'][0], 0.02)
+        self.assertAlmostEqual(exchange.fetch_positions()[0]['contracts'], 0.02)
+        self.assertAlmostEqual(gate.balance, exchange.fetch_balance()['total']['USDT'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+from ring_buffer import RingBuffer, ohlcv_dtype
+
+class TestRingBuffer(unittest.TestCase):
+
+    def test_wraps_and_returns_contiguous_views(self):
+        buffer = RingBuffer(4)
+        for minute in range(10):
+            self.assertEqual(buffer.update([minute * 60000, 1.0, 2.0, 0.5, float(minute), 10.0]), 'appended')
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(buffer.count, 10)
+
+        window = buffer.window()
+        np.testing.assert_array_equal(window['close'], [6.0, 7.0, 8.0, 9.0])
+        self.assertTrue(window.flags['C_CONTIGUOUS'])
+        self.assertTrue(np.shares_memory(window, buffer.window(2)))
+
+        # The forming bar is replaced in place, older candles are ignored
+        self.assertEqual(buffer.update([9 * 60000, 1.0, 2.0, 0.5, 9.5, 12.0]), 'updated')
+        self.assertEqual(buffer.update([3 * 60000, 1.0, 2.0, 0.5, 3.0, 1.0]), 'stale')
+        np.testing.assert_array_equal(buffer.column('close', 2), [8.0, 9.5])
+        self.assertEqual(window['volume'][-1], 12.0)
+
+        buffer.extend([(minute * 60000, 1.0, 2.0, 0.5, float(minute), 1.0) for minute in range(10, 16)])
+        np.testing.assert_array_equal(buffer.column('close'), [12.0, 13.0, 14.0, 15.0])
+
+        # An extend larger than the buffer keeps the newest records and counts them all
+        buffer.extend([(minute * 60000, 1.0, 2.0, 0.5, float(minute), 1.0) for minute in range(16, 27)])
+        self.assertEqual(buffer.count, 27)
+        np.testing.assert_array_equal(buffer.column('close'), [23.0, 24.0, 25.0, 26.0])
+        buffer.append((27 * 60000, 1.0, 2.0, 0.5, 27.0, 1.0))
+        np.testing.assert_array_equal(buffer.column('close'), [24.0, 25.0, 26.0, 27.0])
+
+    def test_candles_fill_leading_fields_of_wider_records(self):
+        buffer = RingBuffer(3, ohlcv_dtype('SMA_2'))
+        buffer.update([0, 1.0, 1.0, 1.0, 1.0, 1.0])
+        buffer.set_last('SMA_2', 5.0)
+        buffer.update([0, 1.0, 1.0, 1.0, 2.0, 1.0])
+        self.assertEqual(buffer.last()['SMA_2'], 5.0)
+        self.assertEqual(buffer.last()['close'], 2.0)
+
+        # A new bar starts with empty indicator fields, also when it reuses an old slot
+        for minute in range(1, 4):
+            buffer.update([minute * 60000, 1.0, 1.0, 1.0, 3.0, 1.0])
+        self.assertTrue(np.isnan(buffer.last()['SMA_2']))
+        self.assertTrue(np.isnan(buffer.window()['SMA_2']).all())
+
+if __name__ == '__main__':
+    unittest.main()
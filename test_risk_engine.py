@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+from risk_engine import MonteCarloRiskEngine
+
+class TestMonteCarloRiskEngine(unittest.TestCase):
+
+    def test_parametric_var_matches_normal_quantiles(self):
+        exposures = np.array([1000.0, -500.0])
+        mean = np.array([0.0005, 0.0002])
+        cov = np.array([[1e-4, 2e-5], [2e-5, 4e-4]])
+        engine = MonteCarloRiskEngine(n_paths=100000, horizon=10, method='parametric', chunk_size=7000, seed=1)
+        report = engine.run(exposures, mean=mean, cov=cov, equity=10000)
+
+        horizon_mean = 10 * exposures @ mean
+        horizon_std = np.sqrt(10 * exposures @ cov @ exposures)
+        # 95% and 99% one-sided normal quantiles and the matching expected shortfalls
+        self.assertAlmostEqual(report.var[0.95], -horizon_mean + 1.6449 * horizon_std, delta=0.02 * horizon_std)
+        self.assertAlmostEqual(report.var[0.99], -horizon_mean + 2.3263 * horizon_std, delta=0.03 * horizon_std)
+        self.assertAlmostEqual(report.cvar[0.95], -horizon_mean + 2.0627 * horizon_std, delta=0.03 * horizon_std)
+        self.assertTrue(np.all((report.drawdowns >= 0) & (report.drawdowns < 1)))
+
+        again = engine.run(exposures, mean=mean, cov=cov, equity=10000)
+        np.testing.assert_array_equal(again.pnl, report.pnl)
+
+    def test_bootstrap_resamples_historical_portfolio_pnl(self):
+        returns = np.array([[0.01, -0.02], [0.02, 0.0], [-0.03, 0.01]])
+        exposures = {'BTC/USDT': 100.0, 'ETH/USDT': 50.0}
+        engine = MonteCarloRiskEngine(n_paths=2000, horizon=2, block_size=2, chunk_size=300, seed=0)
+        report = engine.run(exposures, returns, equity=1000)
+        # Blocks of two consecutive bars: the only possible horizon P&Ls are bars 0+1 and 1+2
+        step_pnl = returns @ [100.0, 50.0]
+        self.assertEqual(set(np.round(report.pnl, 9)), {round(step_pnl[0] + step_pnl[1], 9), round(step_pnl[1] + step_pnl[2], 9)})
+        self.assertAlmostEqual(report.max_drawdown[99], max(-step_pnl[2] / (1000 + step_pnl[1]), 0.0))
+
+if __name__ == '__main__':
+    unittest.main()
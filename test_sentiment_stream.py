@@ -0,0 +1,29 @@
+import unittest
+from sentiment_stream import SentimentAggregator
+
+class TestSentimentAggregator(unittest.TestCase):
+
+    def test_scores_decay_with_half_life(self):
+        aggregator = SentimentAggregator(half_life=100)
+        aggregator.update('BTCUSDT', 1.0, timestamp=0)
+        aggregator.update('BTCUSDT', -1.0, timestamp=100)
+
+        snapshot = aggregator.snapshot('BTCUSDT', now=100)
+        # The first score has half the weight of the second by then
+        self.assertAlmostEqual(snapshot['mean'], (0.5 - 1.0) / 1.5)
+        self.assertAlmostEqual(snapshot['count'], 1.5)
+        self.assertAlmostEqual(aggregator.snapshot('BTCUSDT', now=200)['count'], 0.75)
+        self.assertIsNone(aggregator.snapshot('ETHUSDT'))
+        self.assertEqual(aggregator.score('ETHUSDT', default=0.0), 0.0)
+
+    def test_late_scores_and_variance(self):
+        aggregator = SentimentAggregator(half_life=100)
+        aggregator.update('BTCUSDT', -1.0, timestamp=100)
+        aggregator.update('BTCUSDT', 1.0, timestamp=0)  # arrives late
+        snapshot = aggregator.snapshot('BTCUSDT', now=100)
+        self.assertAlmostEqual(snapshot['mean'], (0.5 - 1.0) / 1.5)
+        weighted_variance = (1.0 * (-1 - snapshot['mean']) ** 2 + 0.5 * (1 - snapshot['mean']) ** 2) / 1.5
+        self.assertAlmostEqual(snapshot['std'] ** 2, weighted_variance)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from stop_manager import StopManager
+
+class TestStopManager(unittest.TestCase):
+
+    def test_bracket_cancels_other_leg(self):
+        manager = StopManager()
+        stop = manager.add_stop_loss('BTCUSDT', 'long', 95.0, amount=1, group='position-1')
+        manager.add_take_profit('BTCUSDT', 'long', 110.0, amount=1, group='position-1')
+        manager.add_stop_loss('BTCUSDT', 'short', 105.0, amount=1)
+
+        self.assertEqual(manager.on_price('BTCUSDT', 100.0), [])
+        triggered = manager.on_price('BTCUSDT', 94.0)
+        self.assertEqual([s['id'] for s in triggered], [stop])
+        self.assertEqual(triggered[0]['triggerPrice'], 94.0)
+        # The take-profit was cancelled with its stop-loss; the short stop is untouched
+        self.assertEqual(len(manager), 1)
+
+    def test_trailing_stops_ratchet_and_trigger(self):
+        manager = StopManager()
+        low = manager.add_trailing_stop('BTCUSDT', 'long', 0.1, 100.0)
+        high = manager.add_trailing_stop('BTCUSDT', 'long', 0.1, 120.0)
+        short = manager.add_trailing_stop('BTCUSDT', 'short', 0.1, 100.0)
+
+        manager.on_price('BTCUSDT', 110.0)
+        self.assertAlmostEqual(manager.stop_price(low), 99.0)
+        self.assertAlmostEqual(manager.stop_price(high), 108.0)
+        self.assertAlmostEqual(manager.stop_price(short), 110.0)
+
+        triggered = manager.on_price('BTCUSDT', 107.0)
+        self.assertEqual([s['id'] for s in triggered], [high])
+        self.assertAlmostEqual(triggered[0]['stopPrice'], 108.0)
+        # The short stop ratchets down on the dip
+        self.assertAlmostEqual(manager.stop_price(short), 110.0)
+        manager.on_price('BTCUSDT', 90.0)
+        self.assertAlmostEqual(manager.stop_price(short), 99.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+import numpy as np
+from text_preprocessing import TextPreprocessor, load_preprocessor
+
+class TestTextPreprocessor(unittest.TestCase):
+
+    def test_matches_keras_texts_to_sequences_and_pad_sequences(self):
+        word_index = {'this': 1, 'is': 2, 'the': 3, 'best': 4, 'worst': 5}
+        preprocessor = TextPreprocessor(word_index, num_words=5, maxlen=4)
+        out = preprocessor.transform(["This is the BEST!", "the worst, the worst\nthe best", "", "unknown words only"])
+
+        expected = np.array([[1, 2, 3, 4],     # exactly maxlen words
+                             [3, 3, 3, 4],     # 'worst' is beyond num_words; 'pre' truncation keeps the end
+                             [0, 0, 0, 0],
+                             [0, 0, 0, 0]], dtype=np.int32)
+        np.testing.assert_array_equal(out, expected)
+        self.assertEqual(out.dtype, np.int32)
+
+    def test_loads_repository_tokenizer(self):
+        preprocessor = load_preprocessor('tokenizer.json')
+        self.assertIs(preprocessor, load_preprocessor('tokenizer.json'))
+        out = np.full((2, 100), 7, dtype=np.int32)
+        preprocessor.transform(["I love this!", "This is the worst!"], out=out)
+        np.testing.assert_array_equal(out[:, -4:], [[0, 2, 5, 1], [1, 3, 4, 8]])
+        self.assertFalse(out[:, :-4].any())
+
+if __name__ == '__main__':
+    unittest.main()
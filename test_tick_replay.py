@@ -0,0 +1,65 @@
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from paper_trading import FeeModel, PaperTradingEngine
+from tick_replay import ReplayEngine, SimulatedClock, TickStore, synthetic_trades
+
+class TestTickReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = TickStore(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_store_appends_and_reads_time_ranges_in_chunks(self):
+        trades = synthetic_trades(1000, seed=0)
+        self.store.append('BTC/USDT', trades.iloc[:600])
+        self.assertEqual(self.store.append('BTC/USDT', trades.iloc[600:]), 1000)
+        with self.assertRaises(ValueError):
+            self.store.append('BTC/USDT', trades.iloc[:10])
+
+        series = self.store.open('BTC/USDT')
+        start, end = int(trades['timestamp'].iloc[100]), int(trades['timestamp'].iloc[900])
+        chunks = list(series.chunks(start, end, chunk_rows=128))
+        self.assertTrue(all(len(chunk['price']) <= 128 for chunk in chunks))
+        expected = trades[(trades['timestamp'] >= start) & (trades['timestamp'] < end)]
+        np.testing.assert_array_equal(np.concatenate([chunk['price'] for chunk in chunks]), expected['price'])
+
+    def test_skipping_quiet_ticks_matches_tick_by_tick_replay(self):
+        for i, symbol in enumerate(('BTCUSDT', 'ETHUSDT')):
+            trades = synthetic_trades(20000, price=100.0 * (i + 1), seed=i)
+            self.store.append(symbol, trades.iloc[:7000])
+            self.store.append(symbol, trades.iloc[7000:])
+
+        def replay(on_tick):
+            engine = PaperTradingEngine(balance=10000, fee_model=FeeModel(maker=0.0, taker=0.001))
+            replay = ReplayEngine(self.store, engine, SimulatedClock(), chunk_rows=3000)
+
+            def every_ten_seconds(clock):
+                for symbol in ('BTCUSDT', 'ETHUSDT'):
+                    if symbol in engine.last_price and symbol not in engine.positions:
+                        for order in engine.fetch_open_orders(symbol):
+                            engine.cancel_order(order['id'])
+                        price = engine.last_price[symbol]
+                        engine.create_order(symbol, 'limit', 'buy', 1.0, price * 0.9998)
+                        engine.create_order(symbol, 'stop', 'sell', 1.0, price * 0.999, {'reduceOnly': True})
+                        engine.create_order(symbol, 'take_profit', 'sell', 1.0, price * 1.001, {'reduceOnly': True})
+
+            replay.clock.call_every(10, every_ten_seconds)
+            stats = replay.run(['BTCUSDT', 'ETHUSDT'], on_tick=on_tick, equity_interval=60)
+            return engine, replay, stats
+
+        fast, fast_replay, fast_stats = replay(None)
+        slow, slow_replay, slow_stats = replay(lambda engine, symbol, tick: None)
+        self.assertEqual(fast_stats['ticks'], 40000)
+        self.assertLess(fast_stats['events'], slow_stats['events'] / 5)
+        self.assertGreater(len(fast.trades), 20)
+        self.assertEqual(fast.trades, slow.trades)
+        self.assertEqual(fast.last_price, slow.last_price)
+        self.assertEqual(fast_replay.equity_curve, slow_replay.equity_curve)
+
+if __name__ == '__main__':
+    unittest.main()
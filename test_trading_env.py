@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+import pandas as pd
+from trading_env import TradingEnv, VecTradingEnv, normalize_features
+
+class TestTradingEnv(unittest.TestCase):
+
+    def test_rewards_follow_marked_to_market_balance(self):
+        close = [100.0, 110.0, 99.0, 99.0, 120.0]
+        df = pd.DataFrame({'close': close, 'volume': [1.0, 2.0, 3.0, 4.0, 5.0]})
+        env = TradingEnv(df, initial_balance=1000, leverage=1, fee=0.001)
+        features = normalize_features(df)
+
+        obs = env.reset()
+        np.testing.assert_array_equal(obs, features[0])
+        self.assertEqual(env.observation_space.shape, (2,))
+
+        # Buy opens a long with the whole equity and pays the fee on its notional
+        obs, reward, done, _ = env.step(1)
+        size = 1000 / 110.0
+        np.testing.assert_array_equal(obs, features[1])
+        self.assertAlmostEqual(reward, -1.0)
+        self.assertEqual((env.position, env.position_size, env.entry_price), ('long', size, 110.0))
+        self.assertFalse(done)
+
+        # Hold marks the position to the new price
+        _, reward, done, _ = env.step(0)
+        self.assertAlmostEqual(reward, size * (99.0 - 110.0))
+        self.assertAlmostEqual(env.balance, 1000 - 1.0 - 100.0)
+
+        # Sell closes the long; it does not open a short in the same step
+        _, reward, done, _ = env.step(2)
+        self.assertAlmostEqual(reward, -size * 99.0 * 0.001)
+        self.assertIsNone(env.position)
+        self.assertEqual(env.position_size, 0.0)
+
+        # Sell on a flat account opens a short, and the episode ends on the last row
+        obs, reward, done, _ = env.step(2)
+        equity = 1000 - 1.0 - 100.0 - size * 99.0 * 0.001
+        np.testing.assert_array_equal(obs, features[4])
+        self.assertAlmostEqual(reward, -equity * 0.001)
+        self.assertEqual(env.position, 'short')
+        self.assertTrue(done)
+
+        np.testing.assert_array_equal(env.reset(), features[0])
+        self.assertEqual((env.balance, env.position, env.current_step), (1000, None, 0))
+
+    def test_vectorized_env_matches_single_env(self):
+        rng = np.random.default_rng(7)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 300)))
+        df = pd.DataFrame({'close': close, 'volume': rng.uniform(1, 10, close.size)})
+        episode_length = 20
+        # The highest leverage also ends some episodes early by ruin
+        vec_env = VecTradingEnv(df, n_envs=4, initial_balance=1000, leverage=[1, 5, 20, 100], fee=0.001,
+                                episode_length=episode_length, seed=3)
+
+        def single_env(i):
+            offset = vec_env.offsets[i]
+            rows = slice(offset, offset + episode_length + 1)
+            return TradingEnv(df.iloc[rows], initial_balance=1000, leverage=vec_env.leverage[i], fee=0.001,
+                              features=vec_env.features[rows])
+
+        obs = vec_env.reset()
+        envs = [single_env(i) for i in range(vec_env.num_envs)]
+        for i, env in enumerate(envs):
+            np.testing.assert_array_equal(obs[i], env.reset())
+
+        resets = 0
+        for _ in range(100):
+            actions = rng.integers(0, 3, vec_env.num_envs)
+            obs, rewards, dones, infos = vec_env.step(actions)
+            for i, env in enumerate(envs):
+                expected_obs, reward, done, _ = env.step(int(actions[i]))
+                self.assertAlmostEqual(rewards[i], reward, delta=1e-4 * max(1.0, abs(reward)))
+                self.assertEqual(dones[i], done)
+                if done:
+                    # Finished episodes restart at a new offset
+                    np.testing.assert_array_equal(infos[i]['terminal_observation'], expected_obs)
+                    envs[i] = single_env(i)
+                    expected_obs = envs[i].reset()
+                    resets += 1
+                np.testing.assert_array_equal(obs[i], expected_obs)
+        self.assertGreater(resets, vec_env.num_envs)
+
+if __name__ == '__main__':
+    unittest.main()
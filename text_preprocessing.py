@@ -0,0 +1,183 @@
+import json
+import logging
+import os
+import time
+from itertools import repeat
+import numpy as np
+from langdetect import DetectorFactory, LangDetectException, detect
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Make langdetect deterministic so cached and fresh detections agree
+DetectorFactory.seed = 0
+
+# Marks text boundaries in the joined batch; removed from the texts beforehand
+_SEPARATOR = '\x1e'
+
+class TextPreprocessor:
+    """
+    Frozen-vocabulary replacement for Tokenizer.texts_to_sequences followed by pad_sequences.
+
+    A batch is lower-cased, filtered and split as one joined string, words are looked up in a
+    plain dict with a C-level map, and the ids are scattered into a preallocated int32 matrix
+    with 'pre' padding and truncation, exactly as the Keras defaults do. There is no per-text
+    Python loop.
+
+    Parameters:
+    - word_index (dict): Word to index mapping of a fitted Keras Tokenizer.
+    - num_words (int): Keep only indices below this, as Tokenizer(num_words=...) does.
+    - filters (str): Characters replaced by the split character.
+    - lower (bool): Lower-case texts first.
+    - split (str): Word separator.
+    - oov_token (str): Token whose index replaces unknown words, if the tokenizer had one.
+    - maxlen (int): Sequence length of the output matrix.
+    """
+    def __init__(self, word_index, num_words=None, filters='!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n', lower=True,
+                 split=' ', oov_token=None, maxlen=100):
+        self.maxlen = maxlen
+        self.lower = lower
+        self.split = split
+        self.oov_index = word_index.get(oov_token, 0) if oov_token is not None else 0
+        if num_words and self.oov_index >= num_words:
+            self.oov_index = 0
+        self.vocab = {}
+        for word, index in word_index.items():
+            if not num_words or index < num_words:
+                self.vocab[word] = index
+            else:
+                self.vocab[word] = self.oov_index
+        # Empty strings come from repeated separators and are always dropped
+        self.vocab[''] = 0
+        self.vocab[_SEPARATOR] = -1
+        self._table = str.maketrans({char: split for char in filters if char != _SEPARATOR})
+        self._clean_table = str.maketrans({_SEPARATOR: split})
+
+    @classmethod
+    def from_json(cls, path='tokenizer.json', maxlen=100):
+        """
+        Build a preprocessor from a tokenizer saved with save_tokenizer or Tokenizer.to_json.
+        """
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, str):
+            # save_tokenizer stores the tokenizer JSON as a JSON string
+            data = json.loads(data)
+        config = data['config']
+        if config.get('char_level'):
+            raise ValueError("Character-level tokenizers are not supported")
+        word_index = config['word_index']
+        if isinstance(word_index, str):
+            word_index = json.loads(word_index)
+        return cls(word_index, num_words=config.get('num_words'), filters=config.get('filters', ''),
+                   lower=config.get('lower', True), split=config.get('split', ' '), oov_token=config.get('oov_token'),
+                   maxlen=maxlen)
+
+    @classmethod
+    def from_tokenizer(cls, tokenizer, maxlen=100):
+        return cls(tokenizer.word_index, num_words=tokenizer.num_words, filters=tokenizer.filters, lower=tokenizer.lower,
+                   split=tokenizer.split, oov_token=tokenizer.oov_token, maxlen=maxlen)
+
+    def transform(self, texts, out=None):
+        """
+        Tokenize and pad a batch of texts.
+
+        Parameters:
+        - texts (list): Texts to tokenize.
+        - out (np.ndarray): Optional preallocated int32 matrix of shape (len(texts), maxlen) to fill.
+
+        Returns:
+        - np.ndarray: int32 matrix of word indices, left-padded with zeros.
+        """
+        count = len(texts)
+        if out is None:
+            out = np.zeros((count, self.maxlen), dtype=np.int32)
+        else:
+            out[...] = 0
+        if not count:
+            return out
+
+        separator = f'{self.split}{_SEPARATOR}{self.split}'
+        joined = separator.join(texts)
+        if joined.count(_SEPARATOR) != count - 1:
+            joined = separator.join(text.translate(self._clean_table) for text in texts)
+        if self.lower:
+            joined = joined.lower()
+        words = joined.translate(self._table).split(self.split)
+        ids = np.fromiter(map(self.vocab.get, words, repeat(self.oov_index)), dtype=np.int64, count=len(words))
+
+        # Text number of every word, then the kept words' positions counted from the end of their text
+        text_ids = np.cumsum(ids == -1)
+        kept = ids > 0
+        ids, text_ids = ids[kept], text_ids[kept]
+        lengths = np.bincount(text_ids, minlength=count)
+        ends = np.cumsum(lengths)
+        columns = self.maxlen - ends[text_ids] + np.arange(len(ids))
+        inside = columns >= 0  # 'pre' truncation keeps the last maxlen words
+        out[text_ids[inside], columns[inside]] = ids[inside]
+        return out
+
+class LanguageDetector:
+    """
+    Batched, cached language detection.
+
+    Texts are normalized (stripped and lower-cased) for the cache key, duplicates in a batch are
+    detected once, and results are kept in a bounded dict so repeated texts such as retweets
+    skip langdetect entirely.
+    """
+    def __init__(self, cache_size=100000):
+        self.cache_size = cache_size
+        self.cache = {}
+
+    def detect(self, texts):
+        """
+        Return the detected language code for every text, or 'unknown' when detection fails.
+        """
+        keys = [text.strip().lower() for text in texts]
+        cache = self.cache
+        for key in set(keys):
+            if key not in cache:
+                try:
+                    cache[key] = detect(key)
+                except LangDetectException:
+                    cache[key] = 'unknown'
+        results = [cache[key] for key in keys]
+        if len(cache) > self.cache_size:
+            # Drop the oldest half; dicts keep insertion order
+            for key in list(cache)[:len(cache) // 2]:
+                del cache[key]
+        return results
+
+_preprocessors = {}
+_language_detector = LanguageDetector()
+
+def load_preprocessor(path='tokenizer.json', maxlen=100):
+    """
+    Load a TextPreprocessor once per tokenizer file, reloading only when the file changes.
+    """
+    key = (os.path.abspath(path), maxlen)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _preprocessors.get(key)
+    if cached is None or cached[0] != mtime:
+        cached = _preprocessors[key] = (mtime, TextPreprocessor.from_json(path, maxlen))
+    return cached[1]
+
+def detect_languages(texts):
+    """
+    Detect the language of a batch of texts with the shared cache.
+    """
+    return _language_detector.detect(texts)
+
+if __name__ == "__main__":
+    # Example: tokenize a large batch of short texts with the repository tokenizer
+    preprocessor = load_preprocessor('tokenizer.json')
+    words = ['I', 'love', 'this', 'hate', 'is', 'the', 'best', 'worst', 'BTC', 'to', 'moon!', 'crash...']
+    rng = np.random.default_rng(0)
+    texts = [' '.join(rng.choice(words, rng.integers(3, 30))) for _ in range(100000)]
+    out = np.zeros((len(texts), preprocessor.maxlen), dtype=np.int32)
+
+    start = time.perf_counter()
+    preprocessor.transform(texts, out=out)
+    elapsed = time.perf_counter() - start
+    logging.info("Tokenized %d texts in %.3f s (%.0f texts per second)", len(texts), elapsed, len(texts) / elapsed)
+    logging.info("First row: %s", out[0][-10:])
@@ -0,0 +1,367 @@
+import heapq
+import json
+import logging
+import os
+import time
+import numpy as np
+import pandas as pd
+from paper_trading import PaperTradingEngine
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+TICK_STORE_DIR = os.getenv('TICK_STORE_DIR', 'tick_store')
+
+# Column layout per kind of data; timestamps are milliseconds since the epoch
+SCHEMAS = {
+    'trades': (('timestamp', 'int64'), ('price', 'float64'), ('amount', 'float64')),
+    'bars': (('timestamp', 'int64'), ('open', 'float64'), ('high', 'float64'), ('low', 'float64'),
+             ('close', 'float64'), ('volume', 'float64')),
+}
+
+class TickSeries:
+    """
+    Memory-mapped columns of one symbol's trades or bars in a TickStore.
+
+    Nothing is read until it is sliced, so opening a series of any size is cheap.
+    """
+    def __init__(self, path, meta):
+        self.path = path
+        self.kind = meta['kind']
+        self.rows = meta['rows']
+        self.columns = {}
+        for name, dtype in SCHEMAS[self.kind]:
+            if self.rows:
+                self.columns[name] = np.memmap(os.path.join(path, name + '.bin'), dtype=dtype, mode='r', shape=(self.rows,))
+            else:
+                self.columns[name] = np.empty(0, dtype)
+
+    def __len__(self):
+        return self.rows
+
+    def locate(self, start=None, end=None):
+        """
+        Row range [first, last) of the timestamps in [start, end), found by binary search.
+        """
+        timestamps = self.columns['timestamp']
+        first = int(np.searchsorted(timestamps, start, side='left')) if start is not None else 0
+        last = int(np.searchsorted(timestamps, end, side='left')) if end is not None else self.rows
+        return first, max(first, last)
+
+    def chunks(self, start=None, end=None, chunk_rows=1 << 20):
+        """
+        Yield consecutive chunks of at most chunk_rows rows as {column: np.ndarray}.
+
+        Each chunk is copied out of the memory map, so memory use is bounded by the chunk size
+        regardless of the length of the series.
+        """
+        first, last = self.locate(start, end)
+        for begin in range(first, last, chunk_rows):
+            stop = min(begin + chunk_rows, last)
+            yield {name: np.array(column[begin:stop]) for name, column in self.columns.items()}
+
+class TickStore:
+    """
+    Append-only columnar store of trade prints or 1s bars.
+
+    Every symbol and kind is a directory holding one flat binary file per column plus a
+    meta.json with the committed row count. Appends write past the committed rows first and
+    commit by replacing meta.json, so an interrupted append is discarded by the next one.
+    """
+
+    def __init__(self, root=TICK_STORE_DIR):
+        self.root = root
+
+    def _path(self, symbol, kind):
+        return os.path.join(self.root, symbol.replace('/', '_').replace(':', '_'), kind)
+
+    def append(self, symbol, data, kind='trades'):
+        """
+        Append rows for a symbol. Timestamps must not go backwards, within the data or
+        relative to what is already stored.
+
+        Parameters:
+        - symbol (str): Symbol, e.g. 'BTCUSDT'.
+        - data (pd.DataFrame or dict): One array per column of SCHEMAS[kind].
+        - kind (str): 'trades' or 'bars'.
+
+        Returns:
+        - int: Rows stored for the symbol after the append.
+        """
+        if kind not in SCHEMAS:
+            raise ValueError(f"Unknown kind: {kind}")
+        columns = {name: np.ascontiguousarray(np.asarray(data[name]), dtype=dtype) for name, dtype in SCHEMAS[kind]}
+        timestamps = columns['timestamp']
+        if len(timestamps) == 0:
+            return self.rows(symbol, kind)
+        if np.any(np.diff(timestamps) < 0):
+            raise ValueError("Timestamps must be sorted")
+
+        path = self._path(symbol, kind)
+        os.makedirs(path, exist_ok=True)
+        meta = self._read_meta(path) or {'kind': kind, 'rows': 0, 'last_timestamp': None}
+        if meta['last_timestamp'] is not None and timestamps[0] < meta['last_timestamp']:
+            raise ValueError(f"Data for {symbol} starts before the last stored timestamp")
+        for name, dtype in SCHEMAS[kind]:
+            with open(os.path.join(path, name + '.bin'), 'ab') as f:
+                # Drop anything written after the last committed meta
+                f.truncate(meta['rows'] * np.dtype(dtype).itemsize)
+                f.write(columns[name].tobytes())
+        meta = dict(meta, rows=meta['rows'] + len(timestamps), last_timestamp=int(timestamps[-1]))
+        self._write_meta(path, meta)
+        return meta['rows']
+
+    def open(self, symbol, kind='trades'):
+        path = self._path(symbol, kind)
+        meta = self._read_meta(path)
+        if meta is None:
+            raise KeyError(f"No {kind} stored for {symbol}")
+        return TickSeries(path, meta)
+
+    def rows(self, symbol, kind='trades'):
+        meta = self._read_meta(self._path(symbol, kind))
+        return meta['rows'] if meta else 0
+
+    @staticmethod
+    def _read_meta(path):
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_meta(path, meta):
+        tmp_path = os.path.join(path, 'meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(path, 'meta.json'))
+
+class SimulatedClock:
+    """
+    Clock driven by the replayed data instead of the wall clock.
+
+    Timers registered with call_every fire on multiples of their interval (like candle closes),
+    before the first tick at or after their due time is applied, so they see the market as it was
+    at that moment. Periods without any data fire once, not once per missed interval.
+    """
+    def __init__(self, start=0):
+        self.now = int(start)
+        self._timers = []
+        self._seq = 0
+
+    def time(self):
+        return self.now / 1000.0
+
+    def milliseconds(self):
+        return self.now
+
+    def call_every(self, interval, callback):
+        """
+        Call callback(clock) every interval seconds of simulated time.
+        """
+        interval_ms = max(int(interval * 1000), 1)
+        self._seq += 1
+        heapq.heappush(self._timers, ((self.now // interval_ms + 1) * interval_ms, self._seq, interval_ms, callback))
+
+    def next_due(self):
+        return self._timers[0][0] if self._timers else np.iinfo(np.int64).max
+
+    def advance(self, timestamp):
+        """
+        Move the clock to timestamp, firing every timer due at or before it.
+        """
+        while self._timers and self._timers[0][0] <= timestamp:
+            due, seq, interval_ms, callback = heapq.heappop(self._timers)
+            self.now = due
+            callback(self)
+            heapq.heappush(self._timers, ((timestamp // interval_ms + 1) * interval_ms, seq, interval_ms, callback))
+        self.now = max(self.now, int(timestamp))
+
+class ReplayEngine:
+    """
+    Push trades or 1s bars from a TickStore through a PaperTradingEngine on a simulated clock.
+
+    The symbols' series are read in chunks and merged by timestamp, so memory is bounded by
+    chunk_rows per symbol however long the run is. Strategies use the same ccxt order calls as
+    against a live exchange, either per tick (on_tick) or on clock timers.
+
+    Without an on_tick callback most ticks cannot change anything: they neither cross a resting
+    order or trigger (PaperTradingEngine.trigger_bounds) nor reach a timer. Those ticks are
+    skipped with vectorized scans and only move the last price; the engine processes the
+    remaining ones exactly as it would a tick-by-tick feed.
+
+    Parameters:
+    - store (TickStore): Data source.
+    - engine (PaperTradingEngine): Matching engine; a new one with default settings if omitted.
+    - clock (SimulatedClock): Clock; a new one if omitted.
+    - chunk_rows (int): Rows read per symbol at a time.
+    """
+
+    def __init__(self, store, engine=None, clock=None, chunk_rows=1 << 20):
+        self.store = store
+        self.engine = engine or PaperTradingEngine()
+        self.clock = clock or SimulatedClock()
+        self.chunk_rows = chunk_rows
+        self.equity_curve = []
+
+    def run(self, symbols, kind='trades', start=None, end=None, on_tick=None, equity_interval=None):
+        """
+        Replay the symbols between start and end (milliseconds, end exclusive).
+
+        Parameters:
+        - symbols (list): Symbols to replay together.
+        - kind (str): 'trades' (fed through engine.on_trade) or 'bars' (engine.on_candle).
+        - on_tick (callable): on_tick(engine, symbol, tick) after every tick, where tick is
+          (timestamp, price, amount) or (timestamp, open, high, low, close, volume).
+        - equity_interval (float): Seconds between samples appended to self.equity_curve as
+          (timestamp, equity).
+
+        Returns:
+        - dict: ticks, events (ticks the engine processed) and elapsed seconds.
+        """
+        started = time.perf_counter()
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        if equity_interval:
+            self.clock.call_every(equity_interval, lambda clock: self.equity_curve.append((clock.now, self.engine.equity())))
+        self._symbols = list(symbols)
+        self._kind = kind
+        self._on_tick = on_tick
+        self._low_column, self._high_column = ('price', 'price') if kind == 'trades' else ('low', 'high')
+        self._last_column = 'price' if kind == 'trades' else 'close'
+        self._events = 0
+        ticks = 0
+        for block in self._merged(start, end):
+            ticks += len(block['timestamp'])
+            self._process(block)
+        stats = {'ticks': ticks, 'events': self._events, 'elapsed': time.perf_counter() - started}
+        logging.info("Replayed %d ticks (%d processed by the engine) in %.2f s", ticks, self._events, stats['elapsed'])
+        return stats
+
+    def _merged(self, start, end):
+        # Yield blocks of all symbols' rows in timestamp order, tagged with the symbol's position
+        streams = [self.store.open(symbol, self._kind).chunks(start, end, self.chunk_rows) for symbol in self._symbols]
+        buffers = [next(stream, None) for stream in streams]
+        while True:
+            active = [i for i, buffer in enumerate(buffers) if buffer is not None and len(buffer['timestamp'])]
+            if not active:
+                return
+            # Everything up to the earliest buffer end is complete: no later chunk can precede it
+            bound = min(buffers[i]['timestamp'][-1] for i in active)
+            parts = []
+            for i in active:
+                buffer = buffers[i]
+                cut = int(np.searchsorted(buffer['timestamp'], bound, side='right'))
+                part = {name: column[:cut] for name, column in buffer.items()}
+                part['symbol'] = np.full(cut, i, dtype=np.int32)
+                parts.append(part)
+                if cut == len(buffer['timestamp']):
+                    buffers[i] = next(streams[i], None)
+                else:
+                    buffers[i] = {name: column[cut:] for name, column in buffer.items()}
+            if len(parts) == 1:
+                yield parts[0]
+                continue
+            block = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+            order = np.argsort(block['timestamp'], kind='stable')
+            yield {name: column[order] for name, column in block.items()}
+
+    def _next_event(self, block, i):
+        n = len(block['timestamp'])
+        if self._on_tick is not None:
+            return i
+        bounds = np.array([self.engine.trigger_bounds(symbol) for symbol in self._symbols])
+        due = self.clock.next_due()
+        size = 256
+        while i < n:
+            stop = min(i + size, n)
+            codes = block['symbol'][i:stop]
+            hits = np.flatnonzero((block[self._low_column][i:stop] <= bounds[codes, 0])
+                                  | (block[self._high_column][i:stop] >= bounds[codes, 1])
+                                  | (block['timestamp'][i:stop] >= due))
+            if len(hits):
+                return i + int(hits[0])
+            i = stop
+            size = min(size * 4, self.chunk_rows)
+        return n
+
+    def _skip(self, block, i, j):
+        # Ticks in [i, j) only move the last price of their symbol
+        codes = block['symbol'][i:j]
+        prices = block[self._last_column][i:j]
+        if len(self._symbols) == 1:
+            self.engine.last_price[self._symbols[0]] = float(prices[-1])
+        else:
+            present, last = np.unique(codes[::-1], return_index=True)
+            for code, index in zip(present, last):
+                self.engine.last_price[self._symbols[code]] = float(prices[len(codes) - 1 - index])
+        self.engine.timestamp = int(block['timestamp'][j - 1])
+        self.clock.now = max(self.clock.now, self.engine.timestamp)
+
+    def _process(self, block):
+        n = len(block['timestamp'])
+        i = 0
+        while i < n:
+            j = self._next_event(block, i)
+            if j > i:
+                self._skip(block, i, j)
+            if j == n:
+                return
+            symbol = self._symbols[block['symbol'][j]]
+            timestamp = int(block['timestamp'][j])
+            self.clock.advance(timestamp)
+            if self._kind == 'trades':
+                tick = (timestamp, float(block['price'][j]), float(block['amount'][j]))
+                self.engine.on_trade(symbol, tick[1], tick[2], timestamp)
+            else:
+                tick = (timestamp,) + tuple(float(block[name][j]) for name, _ in SCHEMAS['bars'][1:])
+                self.engine.on_candle(symbol, tick)
+            if self._on_tick is not None:
+                self._on_tick(self.engine, symbol, tick)
+            self._events += 1
+            i = j + 1
+
+def synthetic_trades(n, start=1700000000000, price=30000.0, seed=None):
+    """
+    Random-walk trade prints about 50 ms apart, for examples and tests.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = start + np.cumsum(rng.integers(1, 100, n))
+    prices = price * np.exp(np.cumsum(rng.normal(0, 2e-5, n)))
+    return pd.DataFrame({'timestamp': timestamps, 'price': np.round(prices, 1), 'amount': rng.exponential(0.05, n)})
+
+if __name__ == "__main__":
+    # Example: 20 million ticks for two symbols, a minute-timer strategy with stop and take-profit
+    import shutil
+    import tempfile
+
+    root = tempfile.mkdtemp()
+    store = TickStore(root)
+    for symbol, price in (('BTCUSDT', 30000.0), ('ETHUSDT', 2000.0)):
+        start = 1700000000000
+        for part in range(10):
+            trades = synthetic_trades(1000000, start=start, price=price, seed=part)
+            store.append(symbol, trades)
+            start, price = int(trades['timestamp'].iloc[-1]) + 1, float(trades['price'].iloc[-1])
+
+    replay = ReplayEngine(store)
+    engine = replay.engine
+
+    def every_minute(clock):
+        for symbol in ('BTCUSDT', 'ETHUSDT'):
+            if symbol in engine.last_price and symbol not in engine.positions:
+                # The bracket leg that did not fire is left over once the position is closed
+                for order in engine.fetch_open_orders(symbol):
+                    engine.cancel_order(order['id'])
+                price = engine.last_price[symbol]
+                amount = 1000 / price
+                engine.create_order(symbol, 'market', 'buy', amount)
+                engine.create_order(symbol, 'stop', 'sell', amount, price * 0.995, {'reduceOnly': True})
+                engine.create_order(symbol, 'take_profit', 'sell', amount, price * 1.005, {'reduceOnly': True})
+
+    replay.clock.call_every(60, every_minute)
+    stats = replay.run(['BTCUSDT', 'ETHUSDT'], equity_interval=3600)
+    logging.info("%.1f M ticks/s, %d fills, final equity %.2f", stats['ticks'] / stats['elapsed'] / 1e6,
+                 len(engine.trades), engine.equity())
+    shutil.rmtree(root)
@@ -0,0 +1,280 @@
+import logging
+import time
+import numpy as np
+import pandas as pd
+import gym
+from stable_baselines3.common.vec_env import VecEnv
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PRICE_COLUMNS = ('Close', 'close')
+
+def price_array(df, price_column=None):
+    """
+    Extract the price series an environment trades at as a contiguous float64 array.
+
+    Parameters:
+    - df (pd.DataFrame): Market data.
+    - price_column (str): Column to trade at. Defaults to 'Close' or 'close', falling back to the last column.
+
+    Returns:
+    - np.ndarray: Prices.
+    """
+    if price_column is None:
+        price_column = next((column for column in PRICE_COLUMNS if column in df.columns), df.columns[-1])
+    return np.ascontiguousarray(df[price_column].to_numpy(dtype=np.float64))
+
+def normalize_features(df):
+    """
+    Min-max scale every numeric column of a DataFrame to [0, 1] in one pass.
+
+    Parameters:
+    - df (pd.DataFrame): Market data and indicators.
+
+    Returns:
+    - np.ndarray: C-contiguous float32 matrix of shape (len(df), number of numeric columns).
+    """
+    values = df.select_dtypes(include=[np.number]).to_numpy(dtype=np.float64)
+    minimum = np.nanmin(values, axis=0)
+    span = np.nanmax(values, axis=0) - minimum
+    span[span == 0] = 1.0
+    scaled = np.nan_to_num((values - minimum) / span, nan=0.0)
+    return np.ascontiguousarray(scaled, dtype=np.float32)
+
+class TradingEnv(gym.Env):
+    """
+    Single-asset leveraged trading environment backed by NumPy arrays.
+
+    Observations are rows of a normalized float32 feature matrix computed once in the
+    constructor; step() returns a preallocated read-only view of the next row. Prices are held
+    in a plain list and position, size and balance are plain Python scalars, so a step does no
+    pandas indexing and no array allocation.
+
+    Actions: 0 = hold, 1 = buy (open a long or close a short), 2 = sell (open a short or close a long).
+    The reward is the change in marked-to-market balance over the step, net of fees.
+    """
+    metadata = {'render.modes': ['human']}
+
+    def __init__(self, df, initial_balance=10000, leverage=50, fee=0.0, price_column=None, features=None):
+        super(TradingEnv, self).__init__()
+        self.features = normalize_features(df) if features is None else np.ascontiguousarray(features, dtype=np.float32)
+        self.features.setflags(write=False)
+        self._rows = list(self.features)
+        self._prices = price_array(df, price_column).tolist()
+        self._last_step = len(self._prices) - 1
+        if self._last_step < 1:
+            raise ValueError("TradingEnv needs at least two rows of data")
+        self.initial_balance = initial_balance
+        self.leverage = leverage
+        self.fee = fee
+        self.action_space = gym.spaces.Discrete(3)  # 0: Hold, 1: Buy, 2: Sell
+        self.observation_space = gym.spaces.Box(low=0, high=1, shape=(self.features.shape[1],), dtype=np.float32)
+        self.reset()
+
+    @property
+    def position(self):
+        return {1: 'long', -1: 'short'}.get(self.direction)
+
+    def reset(self):
+        self.current_step = 0
+        self.done = False
+        self.balance = self.initial_balance
+        self.direction = 0  # 1 long, -1 short, 0 flat
+        self.position_size = 0.0
+        self.entry_price = 0.0
+        return self._rows[0]
+
+    def step(self, action):
+        step = self.current_step + 1
+        price = self._prices[step]
+        size = self.position_size
+
+        # Mark the open position to the new price
+        reward = self.direction * size * (price - self._prices[step - 1])
+
+        if action == 1 and self.direction <= 0 or action == 2 and self.direction >= 0:
+            if self.direction:
+                # Opposite signal closes the open position
+                reward -= size * price * self.fee
+                self.direction = 0
+                self.position_size = 0.0
+                self.entry_price = 0.0
+            else:
+                equity = self.balance + reward
+                if equity > 0:
+                    self.direction = 1 if action == 1 else -1
+                    self.position_size = equity * self.leverage / price
+                    self.entry_price = price
+                    reward -= self.position_size * price * self.fee
+
+        self.balance += reward
+        self.current_step = step
+        self.done = step >= self._last_step or self.balance <= 0
+        return self._rows[step], reward, self.done, {}
+
+    def render(self, mode='human', close=False):
+        print(f'Step: {self.current_step}')
+        print(f'Balance: {self.balance}')
+        print(f'Position: {self.position}')
+        print(f'Position Size: {self.position_size}')
+        print(f'Entry Price: {self.entry_price}')
+
+class VecTradingEnv(VecEnv):
+    """
+    N independent TradingEnv episodes simulated together with batched NumPy operations.
+
+    Each episode has its own start offset into the data, balance, leverage, position direction
+    and size, held in arrays of length n_envs, so a step for all environments is a handful of
+    vectorized operations in one process instead of N Python steps or N subprocesses. Finished
+    episodes are reset automatically to a new random offset, with the final observation passed
+    in info['terminal_observation'] as stable-baselines3 expects. Wrap with VecMonitor to record
+    episode statistics.
+
+    Parameters:
+    - df (pd.DataFrame): Market data and indicators.
+    - n_envs (int): Number of parallel episodes.
+    - initial_balance (float): Starting balance of each episode.
+    - leverage (float or array): Leverage, either shared or one value per environment.
+    - fee (float): Fee rate charged on the notional of every open and close.
+    - episode_length (int): Steps per episode. Defaults to the whole dataset.
+    - price_column (str): Column to trade at.
+    - features (np.ndarray): Precomputed observation matrix, e.g. from a feature store.
+    - seed (int): Seed for the episode start offsets.
+    """
+
+    def __init__(self, df, n_envs=8, initial_balance=10000, leverage=50, fee=0.0, episode_length=None,
+                 price_column=None, features=None, seed=None):
+        self.features = normalize_features(df) if features is None else np.ascontiguousarray(features, dtype=np.float32)
+        self.prices = price_array(df, price_column)
+        last_step = len(self.prices) - 1
+        if last_step < 1:
+            raise ValueError("VecTradingEnv needs at least two rows of data")
+        self.episode_length = min(episode_length or last_step, last_step)
+        self.initial_balance = initial_balance
+        self.fee = fee
+        self.leverage = np.broadcast_to(np.asarray(leverage, dtype=np.float64), (n_envs,)).copy()
+        self.offsets = np.zeros(n_envs, dtype=np.int64)
+        self.steps = np.zeros(n_envs, dtype=np.int64)
+        self.balance = np.zeros(n_envs)
+        self.direction = np.zeros(n_envs)  # 1 long, -1 short, 0 flat
+        self.position_size = np.zeros(n_envs)
+        self.entry_price = np.zeros(n_envs)
+        self._actions = np.zeros(n_envs, dtype=np.int64)
+        self._rng = np.random.default_rng(seed)
+        observation_space = gym.spaces.Box(low=0, high=1, shape=(self.features.shape[1],), dtype=np.float32)
+        super(VecTradingEnv, self).__init__(n_envs, observation_space, gym.spaces.Discrete(3))
+
+    def _reset_envs(self, indices):
+        count = len(indices)
+        self.offsets[indices] = self._rng.integers(0, len(self.prices) - self.episode_length, count)
+        self.steps[indices] = self.offsets[indices]
+        self.balance[indices] = self.initial_balance
+        self.direction[indices] = 0
+        self.position_size[indices] = 0
+        self.entry_price[indices] = 0
+
+    def reset(self):
+        self._reset_envs(np.arange(self.num_envs))
+        return self.features[self.steps]
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions).reshape(self.num_envs)
+
+    def step_wait(self):
+        actions = self._actions
+        steps = self.steps + 1
+        price = self.prices[steps]
+        direction = self.direction
+        size = self.position_size
+
+        # Mark open positions to the new price
+        rewards = direction * size * (price - self.prices[steps - 1])
+
+        # Opposite signals close the open position
+        closing = ((actions == 1) & (direction < 0)) | ((actions == 2) & (direction > 0))
+        rewards -= np.where(closing, size * price * self.fee, 0.0)
+        direction[closing] = 0
+        size[closing] = 0
+        self.entry_price[closing] = 0
+
+        # Buy or sell signals on flat environments open a position with the whole equity
+        opening = (actions != 0) & (direction == 0) & ~closing & (self.balance + rewards > 0)
+        if opening.any():
+            new_size = (self.balance[opening] + rewards[opening]) * self.leverage[opening] / price[opening]
+            size[opening] = new_size
+            direction[opening] = np.where(actions[opening] == 1, 1, -1)
+            self.entry_price[opening] = price[opening]
+            rewards[opening] -= new_size * price[opening] * self.fee
+
+        self.balance += rewards
+        self.steps = steps
+        dones = (steps - self.offsets >= self.episode_length) | (self.balance <= 0)
+        # Fancy indexing returns a fresh array, which stable-baselines3 needs as it keeps the previous observation
+        obs = self.features[steps]
+        infos = [{} for _ in range(self.num_envs)]
+        if dones.any():
+            finished = np.flatnonzero(dones)
+            for i in finished:
+                infos[i]['terminal_observation'] = obs[i].copy()
+            self._reset_envs(finished)
+            obs[finished] = self.features[self.steps[finished]]
+        return obs, rewards.astype(np.float32), dones, infos
+
+    def close(self):
+        pass
+
+    def seed(self, seed=None):
+        self._rng = np.random.default_rng(seed)
+        return [seed] * self.num_envs
+
+    def get_attr(self, attr_name, indices=None):
+        value = getattr(self, attr_name)
+        indices = self._get_indices(indices)
+        if isinstance(value, np.ndarray) and value.shape[:1] == (self.num_envs,):
+            return [value[i] for i in indices]
+        return [value for _ in indices]
+
+    def set_attr(self, attr_name, value, indices=None):
+        current = getattr(self, attr_name)
+        if isinstance(current, np.ndarray) and current.shape[:1] == (self.num_envs,):
+            current[list(self._get_indices(indices))] = value
+        else:
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+if __name__ == "__main__":
+    # Example: measure raw environment throughput on a random walk
+    rng = np.random.default_rng(0)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, 100000)))
+    df = pd.DataFrame({'open': close, 'high': close * 1.001, 'low': close * 0.999, 'close': close,
+                       'volume': rng.uniform(1, 10, close.size)})
+
+    env = TradingEnv(df, leverage=10, fee=0.0006)
+    actions = rng.integers(0, 3, close.size).tolist()
+    obs = env.reset()
+    steps = 0
+    start = time.perf_counter()
+    for action in actions:
+        obs, reward, done, _ = env.step(action)
+        steps += 1
+        if done:
+            obs = env.reset()
+    elapsed = time.perf_counter() - start
+    logging.info("%d steps in %.3f s (%.0f steps per second)", steps, elapsed, steps / elapsed)
+
+    vec_env = VecTradingEnv(df, n_envs=256, leverage=10, fee=0.0006, episode_length=1000, seed=0)
+    vec_env.reset()
+    batches = 1000
+    start = time.perf_counter()
+    for _ in range(batches):
+        vec_env.step(rng.integers(0, 3, vec_env.num_envs))
+    elapsed = time.perf_counter() - start
+    logging.info("%d vectorized steps in %.3f s (%.0f steps per second)", batches * vec_env.num_envs, elapsed,
+                 batches * vec_env.num_envs / elapsed)
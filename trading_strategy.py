@@ -2,7 +2,7 @@ from email.policy import HTTP
 import subprocess
 import sys
 
-from sentiment_analysis import fetch_real_time_sentiment
+from sentiment_analysis import latest_real_time_sentiment
 
 # Ensure the required libraries are installed
 subprocess.check_call([sys.executable, "-m", "pip", "install", "scikit-learn"])
@@ -17,18 +17,20 @@ import os
 import time
 import ntplib
 import numpy as np
-import gym
 from stable_baselines3 import PPO
 from stable_baselines3.common.evaluation import evaluate_policy
 from stable_baselines3.common.monitor import Monitor
-from stable_baselines3.common.env_util import make_vec_env
+from stable_baselines3.common.vec_env import VecMonitor
 from stable_baselines3.common.callbacks import CheckpointCallback
-from sklearn.preprocessing import MinMaxScaler
 from backtesting import get_data_for_backtesting
 from keras.models import Sequential
 from keras.layers import LSTM, Dense
 from datetime import datetime
 from fetch_data import main
+from mock_exchange import mock_exchange_from_env
+from trading_env import TradingEnv, VecTradingEnv
+from feature_store import get_features
+from market_data_bus import shared_ohlcv
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -37,111 +39,6 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 API_KEY = os.getenv('BYBIT_API_KEY')
 API_SECRET = os.getenv('BYBIT_API_SECRET')
 
-class TradingEnv(gym.Env):
-    def __init__(self, df, initial_balance=10000, leverage=50):
-        super(TradingEnv, self).__init__()
-        self.df = df
-        self.current_step = 0
-        self.done = False
-        self.initial_balance = initial_balance
-        self.balance = initial_balance
-        self.leverage = leverage
-        self.position = None  # None, 'long', 'short'
-        self.position_size = 0
-        self.entry_price = 0
-        self.action_space = gym.spaces.Discrete(3)  # 0: Hold, 1: Buy, 2: Sell
-        self.observation_space = gym.spaces.Box(low=0, high=1, shape=(len(df.columns),), dtype=np.float32)
-
-    def reset(self):
-        self.current_step = 0
-        self.done = False
-        self.balance = self.initial_balance
-        self.position = None
-        self.position_size = 0
-        self.entry_price = 0
-        return self.df.iloc[self.current_step].values , self._next_observation()
-    
-    def step(self, action):
-        # Execute one time step within the environment
-        self.current_step += 1
-        if self.current_step >= len(self.df):
-            done = True
-        else:
-            done = False
-        
-        reward = self._calculate_reward(action)
-        obs = self._next_observation() if not done else np.zeros(self.df.shape[1])
-
-        return obs, reward, self.done, {}
-    
-    def _take_action(self, action):
-        current_price = self.df.iloc[self.current_step]['Close']
-        reward = 0
-
-        if action == 1:  # Buy/Long
-            if self.position is None:
-                self.position = 'long'
-                self.position_size = (self.balance * self.leverage) / current_price
-                self.entry_price = current_price
-
-        elif action == 2:  # Sell/Short
-            if self.position is None:
-                self.position = 'short'
-                self.position_size = (self.balance * self.leverage) / current_price
-                self.entry_price = current_price
-
-        if self.position == 'long':
-            reward = (current_price - self.entry_price) * self.position_size
-        elif self.position == 'short':
-            reward = (self.entry_price - current_price) * self.position_size
-
-        self.balance += reward
-
-        if self.position and action == 0:  # Hold position
-            reward = 0
-
-        if action == 1 and self.position == 'short':
-            self.balance += self.position_size * (self.entry_price - current_price)
-            self.position = None
-            self.position_size = 0
-            self.entry_price = 0
-
-        if action == 2 and self.position == 'long':
-            self.balance += self.position_size * (current_price - self.entry_price)
-            self.position = None
-            self.position_size = 0
-            self.entry_price = 0    
-    
-    def _calculate_reward(self, action):
-        current_price = self.df.iloc[self.current_step]['Close']
-        reward = 0
-        
-        # Implement more sophisticated reward calculation based on trading performance
-        if self.position == 'long':
-            reward = (current_price - self.entry_price) * self.position_size
-        elif self.position == 'short':
-            reward = (self.entry_price - current_price) * self.position_size
-        
-        # Consider additional factors such as fees, slippage, or risk-adjusted returns
-
-        return reward
-        
-    def render(self, mode='human', close=False):
-        print(f'Step: {self.current_step}')
-        print(f'Balance: {self.balance}')
-        print(f'Position: {self.position}')
-        print(f'Position Size: {self.position_size}')
-        print(f'Entry Price: {self.entry_price}')
-    
-    def _next_observation(self):
-        # Get the next observation
-        obs = self.df.iloc[self.current_step].values
-        return obs , reward
-
-
-    def _next_observation(self):
-        return self.df.iloc[self.current_step].values
-
 if __name__ == "__main__":
     # Sample DataFrame with cryptocurrency data
     data = {
@@ -170,10 +67,7 @@ if __name__ == "__main__":
     df = pd.DataFrame(data)
 
 # Create and wrap the environment
-def create_env():
-    return TradingEnv(df)
-
-vec_env = make_vec_env(create_env, n_envs=4)
+vec_env = VecMonitor(VecTradingEnv(df, n_envs=4))
 
 # Create the PPO model
 model = PPO('MlpPolicy', vec_env, verbose=1)
@@ -194,13 +88,16 @@ model = PPO.load("ppo_trading_model")
 mean_reward, std_reward = evaluate_policy(model, vec_env, n_eval_episodes=10)
 print(f"Mean reward: {mean_reward} +/- {std_reward}")
 
-def train_rl_model(df):
-    env = TradingEnv(df)
+def train_rl_model(df, n_envs=16):
+    features = get_features(df).scaled
+    env = TradingEnv(df, features=features)
     env = Monitor(env)
+    # Training episodes run batched in one process; the single environment is kept for evaluation
+    vec_env = VecMonitor(VecTradingEnv(df, n_envs=n_envs, features=features))
     model = PPO(
         'MlpPolicy',
         vec_env,
-        n_steps=2048,  # Increased steps for better learning
+        n_steps=max(2048 // n_envs, 64),  # Keep about 2048 transitions per rollout across all environments
         batch_size=64,
         gae_lambda=0.95,
         gamma=0.99,
@@ -355,7 +252,12 @@ def generate_signals(df):
 def initialize_exchange(api_key, api_secret):
     """
     Initialize the Bybit exchange.
+    Returns the in-process mock exchange instead when USE_MOCK_EXCHANGE is set.
     """
+    mock_exchange = mock_exchange_from_env()
+    if mock_exchange is not None:
+        return mock_exchange
+
     try:
         exchange = ccxt.bybit({
             'apiKey': api_key,
@@ -370,8 +272,11 @@ def initialize_exchange(api_key, api_secret):
 
 def fetch_ohlcv(exchange, symbol, timeframe='1h', limit=100, time_offset=0):
     """
-    Fetch OHLCV data from the exchange.
+    Fetch OHLCV data from the market data bus if a publisher is running, else from the exchange.
     """
+    df = shared_ohlcv(symbol, timeframe, limit)
+    if df is not None:
+        return df
     params = {
         'recvWindow': 10000,
         'timestamp': int(time.time() * 1000 + time_offset)
@@ -414,14 +319,11 @@ def calculate_indicators(df):
     return df
 
 def prepare_data(df, n_features):
-    data = df.values
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    scaled_data = scaler.fit_transform(data)
-    X, y = [], []
-    for i in range(len(scaled_data)-n_features-1):
-        X.append(scaled_data[i:(i+n_features), 0])
-        y.append(scaled_data[i + n_features, 0])
-    return np.array(X), np.array(y), scaler
+    # Features and scaler ranges come from the feature store, so training and then predicting
+    # on the same data computes and fits them only once
+    features = get_features(df)
+    X, y = features.windows(n_features)
+    return X, y, features.target_scaler()
 
 def build_and_train_model(df):
     n_features = 60
@@ -464,8 +366,8 @@ def execute_trade():
     api_secret = 'YOUR_BYBIT_API_SECRET'
     session = HTTP("https://api.bybit.com", api_key=api_key, api_secret=api_secret)
 
-    # Fetch sentiment data
-    sentiment_score = fetch_real_time_sentiment()
+    # Latest sentiment data; the fetch runs in the background so a slow API never delays trading
+    sentiment_score = latest_real_time_sentiment()
 
     if sentiment_score is not None:
         if sentiment_score > 0.5:
@@ -14,6 +14,8 @@ from risk_management import calculate_stop_loss, calculate_take_profit, calculat
 from sentiment_analysis import fetch_real_time_sentiment, analyze_sentiment
 from config import API_KEY, API_SECRET, DB_FILE, TRAILING_STOP_PERCENT, RISK_REWARD_RATIO
 from utils import send_email
+from order_router import bar_intent_id, route_order
+from market_data_bus import shared_ohlcv
 
 # Logging Configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -84,9 +86,11 @@ class TradingBot:
 
     def fetch_data(self, symbol, timeframe='1h', limit=100):
         try:
-            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+            df = shared_ohlcv(symbol, timeframe, limit)
+            if df is None:
+                ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+                df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+                df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
             df.set_index('timestamp', inplace=True)
             logging.info(f"Fetched OHLCV data for {symbol}")
             return df
@@ -189,9 +193,9 @@ class TradingBot:
             logging.error(f"Error executing {signal} order: {e}")
             raise e
 
-    def execute_order(self, side, amount):
+    def execute_order(self, side, amount, intent_id=None):
         try:
-            order = self.exchange.create_order(self.symbol, 'market', side, amount)
+            order = route_order(self.exchange, self.symbol, side, amount, intent_id=intent_id)
             logging.info(f"Order executed: {order}")
             return order
         except Exception as e:
@@ -209,12 +213,14 @@ class TradingBot:
             signals = self.detect_signals(analyzed_data)
             self.trading_strategy(signals)
             
+            # The signal candle identifies the order, so a retried run does not trade it twice
+            intent_id = bar_intent_id(signals.index[-1])
             if signals['buy'].iloc[-1]:
                 logging.info("Buy signal detected.")
-                self.execute_order('buy', 1)
+                self.execute_order('buy', 1, intent_id=intent_id)
             elif signals['sell'].iloc[-1]:
                 logging.info("Sell signal detected.")
-                self.execute_order('sell', 1)
+                self.execute_order('sell', 1, intent_id=intent_id)
             else:
                 logging.info("No trading signal detected.")
             